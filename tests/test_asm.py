@@ -0,0 +1,80 @@
+"""Ensamblador: ida y vuelta de toda la ISA, secciones y símbolos, caché y errores."""
+import pytest
+
+from vonsim8 import INSTRUCTION_SET, OP_HLT, VonSim8System, describe_instruction, run_simulation
+from vonsim8_asm import AssemblerError, assemble, assemble_file, assemble_lines, load_program
+
+OPERAND = 0x42
+
+
+@pytest.mark.parametrize("opcode", sorted(INSTRUCTION_SET))
+def test_every_opcode_round_trips(opcode):
+    text = describe_instruction(opcode).replace("addr", f"0x{OPERAND:02X}")
+    expected = bytes((opcode, OPERAND))[:INSTRUCTION_SET[opcode]["size"]]
+    assert assemble_lines([text]).image == expected
+
+
+def test_sections_symbols_and_forward_references():
+    program = assemble_lines("""
+    N       EQU 3
+            .code
+    inicio: LOAD AL, [contador]
+            JNZ fin
+    fin:    HLT
+            .data
+    contador: DB N, 'A', "hi"
+    buffer:   DS N - 1
+    """.splitlines())
+    symbols = program.symbols
+    assert (program.origin, symbols["inicio"], symbols["N"]) == (0, 0, 3)
+    assert symbols["contador"] == symbols["fin"] + 1
+    assert symbols["buffer"] == symbols["contador"] + 4
+    assert program.image[symbols["contador"]:] == bytes((3, ord("A"), ord("h"), ord("i"), 0, 0))
+    assert program.image[1] == symbols["contador"]
+    assert program.image[symbols["fin"]] == OP_HLT
+
+
+def test_assembled_program_runs():
+    system = VonSim8System()
+    program = load_program(system.mem, """
+            LOAD AL, [valor]
+            ADD AL, AL
+            STORE [valor], AL
+            HLT
+    valor:  DB 21
+    """)
+    summary = run_simulation(system, "iss", 16)
+    assert summary.stop_reason == "halt"
+    assert system.mem.dump(program.symbols["valor"], 1) == bytes((42,))
+
+
+def test_cache_returns_equal_programs_with_private_symbols(tmp_path):
+    source = "MOV AL, BL\nfin: HLT\n"
+    first = assemble(source)
+    first.symbols["fin"] = 0x40
+    del first.symbols["fin"]
+    second = assemble(source)
+    assert second == assemble_lines(source.splitlines())._replace(source_hash=second.source_hash)
+    assert second.symbols == {"fin": 1} and second.symbols is not assemble(source).symbols
+    path = tmp_path / "programa.asm"
+    path.write_text(source, encoding="utf-8")
+    assert assemble_file(path).image == assemble(source).image
+
+
+@pytest.mark.parametrize("source, message", [
+    ("FOO AL", "desconocida: FOO"),
+    ("HLT AL", "operandos no válidos"),
+    ("LOAD AL, [nada]", "símbolo no definido: nada"),
+    ('DB "\\x"', "secuencia de escape no válida"),
+    ('DB "€"', "fuera de Latin-1"),
+    ("DS -1", "no negativo"),
+    ("DB", "al menos un valor"),
+    ("DB 0x1FF", None),
+    ("ORG 0x10\nHLT\nORG 0x10\nHLT", "solapamiento"),
+])
+def test_errors_report_line(source, message):
+    with pytest.raises(AssemblerError) as error:
+        assemble_lines(source.splitlines())
+    assert error.value.line_number >= 1
+    if message is not None:
+        assert message in str(error.value)
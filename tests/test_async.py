@@ -0,0 +1,102 @@
+"""API asyncio: paso a paso, ejecución hasta una condición, eventos y cierre."""
+import asyncio
+
+from vonsim8 import CPUSystem, VonSim8System, run_simulation
+from vonsim8_async import EVENT_HALT, EVENT_STEP, EVENT_STOP, AsyncSimulator
+from vonsim8_asm import assemble
+
+COUNTDOWN = assemble("""
+        LOAD AL, [n]
+        LOAD BL, [uno]
+bucle:  SUB AL, BL
+        STORE [n], AL
+        JNZ bucle
+        HLT
+n:      DB 5
+uno:    DB 1
+""").image
+
+
+def _simulator(max_events: int = 256) -> AsyncSimulator:
+    env = CPUSystem()
+    env.vonsim8.mem.load_image(COUNTDOWN)
+    return AsyncSimulator(env, max_events=max_events)
+
+
+def _reference(instructions: int) -> VonSim8System:
+    system = VonSim8System()
+    system.mem.load_image(COUNTDOWN)
+    run_simulation(system, "iss", instructions)
+    return system
+
+
+def test_step_and_run_until_match_reference():
+    async def scenario():
+        simulator = _simulator()
+        event = await simulator.step()
+        assert event.kind == EVENT_STEP and event.instruction == 1
+        executed = await simulator.run_until(max_instructions=9)
+        return simulator, executed
+
+    simulator, executed = asyncio.run(scenario())
+    reference = _reference(10)
+    assert executed == 9
+    assert simulator.uc.instruction_count == reference.uc.instruction_count
+    assert simulator.uc.total_cycles == reference.uc.total_cycles
+    assert simulator.system.mem.dump() == reference.mem.dump()
+
+
+def test_run_until_condition_and_halt():
+    async def scenario():
+        simulator = _simulator()
+        await simulator.run_until(lambda sim: sim.uc.instruction_count >= 3)
+        await simulator.run_until()
+        simulator.close()
+        return simulator, [event async for event in simulator.events()]
+
+    simulator, events = asyncio.run(scenario())
+    kinds = [event.kind for event in events]
+    assert kinds.index(EVENT_STOP) == 3
+    assert kinds[-1] == EVENT_HALT and simulator.halted
+    asyncio.run(_after_halt(simulator))
+
+
+async def _after_halt(simulator):
+    assert await simulator.step() is None
+
+
+def test_events_report_changes_and_drop_oldest():
+    async def scenario():
+        simulator = _simulator(max_events=4)
+        await simulator.run_until(max_instructions=10)
+        simulator.close()
+        return simulator, [event async for event in simulator.events()]
+
+    simulator, events = asyncio.run(scenario())
+    assert simulator.dropped == 6
+    assert [event.instruction for event in events] == [7, 8, 9, 10]
+    changed = [event for event in events if event.changes or event.memory]
+    assert changed
+
+
+def test_step_while_run_until_is_paused():
+    async def scenario():
+        simulator = _simulator()
+        runner = asyncio.create_task(simulator.run_until(max_instructions=6))
+        await simulator.step()
+        simulator.pause()
+        await asyncio.sleep(0)
+        paused_at = simulator.uc.instruction_count
+        stepped = await asyncio.wait_for(simulator.step(), timeout=5)
+        assert not runner.done() and simulator.uc.instruction_count == paused_at + 1
+        simulator.resume()
+        executed = await asyncio.wait_for(runner, timeout=5)
+        simulator.close()
+        return simulator, stepped, paused_at, executed, [event async for event in simulator.events()]
+
+    simulator, stepped, paused_at, executed, events = asyncio.run(scenario())
+    assert stepped.instruction == paused_at + 1
+    assert executed == 6 and simulator.uc.instruction_count == executed + 2
+    kinds = [event.kind for event in events]
+    assert kinds.index("pause") < kinds.index("resume")
+    assert sum(kind == EVENT_STEP for kind in kinds) == simulator.uc.instruction_count
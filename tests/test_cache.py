@@ -0,0 +1,81 @@
+"""Caché de resultados: aciertos, fallos, entradas corruptas, expulsión LRU y estadísticas compartidas."""
+import os
+import time
+
+from vonsim8_bench import BENCHMARK_PROGRAM
+from vonsim8_cache import CachedResult, ResultCache, config_key, run_cached, simulate
+from vonsim8_sweep import SweepConfig
+
+CONFIG = SweepConfig(BENCHMARK_PROGRAM, max_instructions=40)
+
+
+def _result(size: int) -> CachedResult:
+    return CachedResult({"padding": os.urandom(size)}, 1, 2, 1, 1, 3, 4, "halt")
+
+
+def test_miss_then_hit(tmp_path):
+    cache = ResultCache(tmp_path)
+    first, hit = run_cached(CONFIG, cache)
+    assert not hit
+    second, hit = run_cached(CONFIG, cache)
+    assert hit and second == first == simulate(CONFIG)
+    assert (cache.hits, cache.misses, cache.stores) == (1, 1, 1)
+
+
+def test_key_depends_on_configuration():
+    assert config_key(CONFIG) == config_key(SweepConfig(BENCHMARK_PROGRAM, max_instructions=40))
+    assert config_key(CONFIG) != config_key(CONFIG._replace(max_instructions=41))
+    assert config_key(CONFIG) != config_key(CONFIG._replace(registers={"AL": 1}))
+
+
+def test_corrupt_entry_is_a_miss_and_removed(tmp_path):
+    cache = ResultCache(tmp_path)
+    key = config_key(CONFIG)
+    cache.put(key, _result(16))
+    path = cache._path(key)
+    with open(path, "r+b") as stream:
+        stream.truncate(5)
+    assert cache.get(key) is None
+    assert not os.path.exists(path)
+
+
+def test_eviction_drops_least_recently_used(tmp_path):
+    cache = ResultCache(tmp_path, low_water=0.5)
+    keys = [f"{index:02x}" + "0" * 62 for index in range(8)]
+    for age, key in enumerate(keys):
+        cache.put(key, _result(900))
+        os.utime(cache._path(key), (time.time() - 100 + age, time.time() - 100 + age))
+    assert cache.get(keys[0]) is not None
+    cache.max_bytes = 4096
+    cache.evict()
+    stats = cache.stats()
+    assert stats.size <= 2048 and stats.evictions == cache.evictions > 0
+    assert cache.get(keys[0]) is not None
+    assert cache.get(keys[1]) is None
+
+
+def test_stats_are_shared_between_instances(tmp_path):
+    writer, reader = ResultCache(tmp_path), ResultCache(tmp_path)
+    key = config_key(CONFIG)
+    writer.put(key, _result(16))
+    assert reader.get(key) is not None
+    assert writer.get("f" * 64) is None
+    stats = ResultCache(tmp_path).stats()
+    assert (stats.hits, stats.misses, stats.stores, stats.entries) == (1, 1, 1, 1)
+    assert stats.hit_rate == 0.5
+    writer.clear()
+    assert ResultCache(tmp_path).stats()[:5] == (0, 0, 0, 0, 0)
+
+
+def test_hit_survives_concurrent_removal(tmp_path, monkeypatch):
+    cache = ResultCache(tmp_path)
+    key = config_key(CONFIG)
+    result = _result(16)
+    cache.put(key, result)
+
+    def removed(path, *args, **kwargs):
+        raise FileNotFoundError(path)
+
+    monkeypatch.setattr(os, "utime", removed)
+    assert cache.get(key) == result
+    assert (cache.hits, cache.misses) == (1, 0)
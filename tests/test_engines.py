@@ -0,0 +1,61 @@
+"""Paridad de los motores devs, iss, bbt, check y del lote NumPy con la máquina de referencia del fuzzer."""
+import random
+
+import pytest
+
+from vonsim8 import REGISTER_NAMES, VonSim8System, run_simulation
+from vonsim8_batch import BatchSimulator
+from vonsim8_fuzz import FuzzState, ReferenceMachine, generate_case, run_case
+
+SEEDS = range(12)
+MAX_INSTRUCTIONS = 48
+
+
+def _cases():
+    rng = random.Random(2024)
+    return [generate_case(rng, max_instructions=MAX_INSTRUCTIONS) for _ in SEEDS]
+
+
+def _system(case) -> VonSim8System:
+    system = VonSim8System()
+    system.mem.load_image(case.memory)
+    for name, value in zip(REGISTER_NAMES, case.registers):
+        getattr(system.reg_bank, name.lower()).value = value
+    return system
+
+
+def _state(system: VonSim8System) -> FuzzState:
+    uc = system.uc
+    registers = tuple(getattr(system.reg_bank, name.lower()).value for name in REGISTER_NAMES)
+    return FuzzState(system.ip.value, registers, system.alu.flags, uc.halted, uc.instruction_count,
+                     uc.total_cycles, system.mem.dump())
+
+
+def _reference(case) -> FuzzState:
+    machine = ReferenceMachine(case)
+    for _ in range(case.max_instructions):
+        if not machine.step():
+            break
+    return machine.state()
+
+
+@pytest.mark.parametrize("case", _cases())
+def test_devs_matches_reference_in_lockstep(case):
+    assert run_case(case, VonSim8System()) is None
+
+
+@pytest.mark.parametrize("engine", ["iss", "bbt", "check"])
+@pytest.mark.parametrize("case", _cases())
+def test_engine_matches_reference(engine, case):
+    system = _system(case)
+    summary = run_simulation(system, engine, case.max_instructions)
+    assert summary.divergence is None
+    assert _state(system) == _reference(case)
+
+
+def test_batch_matches_reference():
+    cases = _cases()
+    batch = BatchSimulator.from_systems([_system(case) for case in cases])
+    batch.run(MAX_INSTRUCTIONS)
+    for lane, case in enumerate(cases):
+        assert _state(batch.to_system(lane)) == _reference(case)
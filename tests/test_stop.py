@@ -0,0 +1,26 @@
+"""Condiciones de parada: el motivo y el detalle que quedan en ``StopConditions`` y en ``RunSummary``."""
+import pytest
+
+from vonsim8 import STOP_BREAKPOINT, STOP_CYCLES, STOP_HALT, StopConditions, VonSim8System, run_simulation
+
+ENGINES = ("devs", "iss", "bbt", "check")
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("stop", [lambda: StopConditions(breakpoints=[0x02]), lambda: StopConditions(max_cycles=24)],
+                         ids=["breakpoint-after-hlt", "budget-at-hlt"])
+def test_halt_is_not_overwritten_by_later_checks(engine, stop):
+    stop = stop()
+    summary = run_simulation(VonSim8System(), engine, None, stop=stop)
+    assert summary.stop_reason == STOP_HALT
+    assert (stop.reason, stop.detail) == (None, None)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_breakpoint_and_budget_before_hlt(engine):
+    stop = StopConditions(breakpoints=[0x01])
+    summary = run_simulation(VonSim8System(), engine, None, stop=stop)
+    assert (summary.stop_reason, stop.detail, summary.instructions) == (STOP_BREAKPOINT, 0x01, 1)
+    stop = StopConditions(max_cycles=12)
+    summary = run_simulation(VonSim8System(), engine, None, stop=stop)
+    assert summary.stop_reason == STOP_CYCLES and summary.instructions == 1
@@ -0,0 +1,122 @@
+"""Traza binaria de puertos: escritura, lectura aleatoria, continuación y exportación a VCD."""
+import pytest
+from xdevs.models import Atomic, Port
+
+from vonsim8 import VonSim8System, run_simulation
+from vonsim8_bench import BENCHMARK_PROGRAM
+from vonsim8_trace import PortTrace, PortTraceWriter, export_vcd
+
+
+def _trace(path, chunk_size=64, append=False, instructions=20):
+    system = VonSim8System()
+    system.mem.load_image(BENCHMARK_PROGRAM)
+    with PortTraceWriter(path, chunk_size=chunk_size, append=append) as writer:
+        run_simulation(system, "devs", instructions, port_trace=writer)
+        return len(writer)
+
+
+def test_records_read_back_in_order(tmp_path):
+    path = tmp_path / "traza.vs8t"
+    written = _trace(path)
+    with PortTrace(path) as trace:
+        assert len(trace) == written and trace.chunks > 1
+        records = list(trace.records())
+        assert len(records) == written
+        times = [record.time for record in records]
+        assert times == sorted(times)
+        assert [trace[index] for index in (0, written // 2, written - 1)] == \
+               [records[0], records[written // 2], records[-1]]
+        assert {"bool", "int", "str"} <= set(trace.port_types)
+        assert any(record.port.endswith("alu_op") and isinstance(record.value, str) for record in records)
+
+
+def test_time_window_and_port_filter(tmp_path):
+    path = tmp_path / "traza.vs8t"
+    _trace(path)
+    with PortTrace(path) as trace:
+        records = list(trace.records())
+        start, end = records[len(records) // 3].time, records[2 * len(records) // 3].time
+        port = records[0].port
+        window = list(trace.records(start, end, [port]))
+        assert window == [record for record in records if start <= record.time < end and record.port == port]
+        assert trace.index_at(start) == next(index for index, record in enumerate(records) if record.time >= start)
+        with pytest.raises(KeyError):
+            trace.port_ids(["NO.existe"])
+
+
+def test_append_continues_and_ignores_truncated_chunk(tmp_path):
+    path = tmp_path / "traza.vs8t"
+    first = _trace(path, instructions=5)
+    with open(path, "ab") as stream:
+        stream.write(b"D\xff\xff")
+    second = _trace(path, append=True, instructions=5)
+    assert second > first
+    with PortTrace(path) as trace:
+        assert len(trace) == second
+
+
+def test_export_vcd(tmp_path):
+    path = tmp_path / "traza.vs8t"
+    _trace(path)
+    vcd = tmp_path / "traza.vcd"
+    with PortTrace(path) as trace:
+        changes = export_vcd(trace, vcd)
+        ports = len(trace.ports)
+    text = vcd.read_text()
+    assert changes > 0
+    assert text.startswith("$date") or "$timescale" in text
+    assert text.count("$var ") == ports
+    assert "$enddefinitions $end" in text
+
+
+def test_tuple_ports_of_memory_mapped_devices(tmp_path):
+    from vonsim8_asm import load_program
+    from vonsim8_io import DEMO_PROGRAM, TIMER_BASE, Timer, attach_devices
+
+    system = VonSim8System()
+    load_program(system.mem, DEMO_PROGRAM.format(period=4, prescale=1, ticks=2))
+    attach_devices(system, [(TIMER_BASE, Timer())])
+    path = tmp_path / "traza.vs8t"
+    with PortTraceWriter(path) as writer:
+        run_simulation(system, "devs", None, port_trace=writer)
+    with PortTrace(path) as trace:
+        assert "tuple" in trace.port_types
+        values = [record.value for record in trace.records() if record.port.endswith("io_TIMER")]
+        assert values and all(isinstance(value, tuple) and len(value) == 2 for value in values)
+        assert export_vcd(trace, tmp_path / "traza.vcd") > 0
+
+
+class _Emitter(Atomic):
+    def __init__(self):
+        super().__init__("EMISOR")
+        self.pair = Port(tuple, "pair")
+        self.ratio = Port(float, "ratio")
+        self.add_out_port(self.pair)
+        self.add_out_port(self.ratio)
+
+    def initialize(self):
+        self.passivate()
+
+    def exit(self):
+        pass
+
+    def deltint(self):
+        self.passivate()
+
+    def deltext(self, e):
+        self.passivate()
+
+    def lambdaf(self):
+        self.pair.add((3, None))
+        self.ratio.add(0.5)
+
+
+def test_none_in_tuples_and_unknown_types(tmp_path):
+    path = tmp_path / "traza.vs8t"
+    model = _Emitter()
+    with PortTraceWriter(path) as writer:
+        writer.attach(model)
+        model.lambdaf()
+    with PortTrace(path) as trace:
+        assert trace.port_types == ["tuple", "object"]
+        assert [record.value for record in trace.records()] == [(3, None), "0.5"]
@@ -1,11 +1,410 @@
-from xdevs.models import Atomic, Coupled, Port
-from xdevs.sim import Coordinator
+import copy
+import mmap
+import os
+import pickle
+import random
+import zlib
+from array import array
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+from typing import Callable, Iterable, Iterator, Mapping, NamedTuple
 
+from xdevs import INFINITY
+from xdevs.models import Atomic, Component, Coupled, Coupling, Port
+from xdevs.sim import Coordinator, Simulator
 
+
+REGISTER_NAMES = ("AL", "BL", "CL", "DL")
+
+FLAG_Z = 0x01
+FLAG_C = 0x02
+FLAG_S = 0x04
+FLAG_O = 0x08
+
+OP_MOV = 0x00
+OP_ADD = 0x10
+OP_SUB = 0x20
+OP_CMP = 0x30
+OP_LOAD = 0x40
+OP_STORE = 0x44
+OP_JMP = 0x50
+OP_HLT = 0xFF
+
+ALU_OPERATIONS = {OP_ADD: "ADD", OP_SUB: "SUB", OP_CMP: "CMP"}
+
+JUMP_CONDITIONS = {
+    0x50: ("JMP", 0, 0),
+    0x51: ("JZ", FLAG_Z, FLAG_Z),
+    0x52: ("JNZ", FLAG_Z, 0),
+    0x53: ("JC", FLAG_C, FLAG_C),
+    0x54: ("JNC", FLAG_C, 0),
+    0x55: ("JS", FLAG_S, FLAG_S),
+    0x56: ("JNS", FLAG_S, 0),
+    0x57: ("JO", FLAG_O, FLAG_O),
+    0x58: ("JNO", FLAG_O, 0),
+}
+
+NEXT_DISPATCH = -1
+NEXT_HALT = -2
+
+DEFAULT_PROGRAM = (0x01, OP_HLT)
+
+
+def alu_compute(operation: str, a: int, b: int) -> tuple[int, int]:
+    """Calcula el resultado de 8 bits y los flags (Z, C, S, O) de una operación de la ALU."""
+    if operation == "ADD":
+        raw = a + b
+        result = raw & 0xFF
+        carry = raw > 0xFF
+        overflow = (~(a ^ b) & (a ^ result)) & 0x80
+    else:
+        raw = a - b
+        result = raw & 0xFF
+        carry = a < b
+        overflow = ((a ^ b) & (a ^ result)) & 0x80
+    
+    flags = 0x00
+    if result == 0:
+        flags |= FLAG_Z
+    if carry:
+        flags |= FLAG_C
+    if result & 0x80:
+        flags |= FLAG_S
+    if overflow:
+        flags |= FLAG_O
+    return result, flags
+
+
+def _build_instruction_set() -> dict[int, dict]:
+    """Construye la tabla de decodificación opcode → instrucción."""
+    instruction_set = {}
+    for base, mnemonic in ((OP_MOV, "MOV"), *ALU_OPERATIONS.items()):
+        for dst_index, dst in enumerate(REGISTER_NAMES):
+            for src_index, src in enumerate(REGISTER_NAMES):
+                opcode = base | (dst_index << 2) | src_index
+                instruction_set[opcode] = {"opcode": mnemonic, "dst": dst, "src": src, "size": 1}
+    for index, reg in enumerate(REGISTER_NAMES):
+        instruction_set[OP_LOAD + index] = {"opcode": "LOAD", "dst": reg, "src": "[addr]", "size": 2}
+        instruction_set[OP_STORE + index] = {"opcode": "STORE", "dst": "[addr]", "src": reg, "size": 2}
+    for opcode, (mnemonic, _, _) in JUMP_CONDITIONS.items():
+        instruction_set[opcode] = {"opcode": mnemonic, "dst": "addr", "src": "", "size": 2}
+    instruction_set[OP_HLT] = {"opcode": "HLT", "dst": "", "src": "", "size": 1}
+    return instruction_set
+
+
+INSTRUCTION_SET = _build_instruction_set()
+
+
+class MicroStep(NamedTuple):
+    """Micro-paso de la ROM de microcódigo de la UC."""
+    phase: str
+    label: str
+    signals: tuple[tuple[str, object], ...]
+    cycles: int
+    next_step: int
+    fetch: bool
+    cond_mask: int = 0
+    cond_value: int = 0
+
+
+FETCH_SEQUENCE = (
+    ("UC → IP (solicita dirección)", (("ip_read", True),), 1),
+    ("IP → MAR (transfiere dirección)", (), 1),
+    ("UC → MEM (mem_read); IP ← IP+1", (("mem_read", True), ("ip_inc", True)), 2),
+    ("MEM → MBR (instrucción leída)", (("mbr_enable", True),), 1),
+    ("MBR → IR (carga instrucción)", (("ir_enable", True),), 2),
+    ("IR → UC (recibe opcode)", (("ir_read", True),), 1),
+)
+
+OPERAND_SEQUENCE = (
+    ("UC → IP (dirección del operando)", (("ip_read", True),), 1),
+    ("UC → MEM (mem_read); IP ← IP+1", (("mem_read", True), ("ip_inc", True)), 2),
+    ("MEM → MBR (operando leído)", (("mbr_enable", True),), 1),
+)
+
+
+def _execute_sequence(opcode: int) -> tuple[tuple, bool, int, int]:
+    """Devuelve los micro-pasos EXECUTE de un opcode, si detiene la UC y su condición de salto."""
+    instruction = INSTRUCTION_SET.get(opcode)
+    if instruction is None:
+        return (("Sin operación (NOP)", (), 1),), False, 0, 0
+    
+    mnemonic, dst, src = instruction["opcode"], instruction["dst"], instruction["src"]
+    dst_id = REGISTER_NAMES.index(dst) if dst in REGISTER_NAMES else None
+    src_id = REGISTER_NAMES.index(src) if src in REGISTER_NAMES else None
+    if mnemonic == "MOV":
+        return (
+            (f"UC → REG_BANK.enable_out({src})", (("reg_enable_out", src_id),), 1),
+            (f"BUS ← {src} (dato disponible)", (), 2),
+            (f"UC → REG_BANK.enable_in({dst})", (("reg_enable_in", dst_id),), 1),
+            (f"{dst} ← BUS (captura completada)", (), 1),
+        ), False, 0, 0
+    
+    if mnemonic in ("ADD", "SUB", "CMP"):
+        if mnemonic == "CMP":
+            write_back = ("ALU → FLAGS (resultado descartado)", (), 1)
+            done = ("Comparación completada", (), 1)
+        else:
+            write_back = (f"UC → REG_BANK.enable_in({dst})", (("reg_enable_in", dst_id),), 1)
+            done = (f"{dst} ← ALU (captura completada)", (), 1)
+        return (
+            (f"UC → REG_BANK.enable_out({dst}); ALU.A ← BUS", (("reg_enable_out", dst_id), ("alu_op", "A")), 1),
+            (f"UC → REG_BANK.enable_out({src}); ALU.B ← BUS", (("reg_enable_out", src_id), ("alu_op", "B")), 1),
+            (f"UC → ALU ({mnemonic}); ALU → BUS, FLAGS", (("alu_op", mnemonic),), 2),
+            write_back,
+            done,
+        ), False, 0, 0
+    
+    if mnemonic == "LOAD":
+        return OPERAND_SEQUENCE + (
+            ("MBR → MAR (dirección del dato)", (("mar_load", True),), 1),
+            ("UC → MEM (mem_read)", (("mem_read", True), ("mem_data", True)), 2),
+            ("MEM → MBR (dato leído)", (("mbr_enable", True),), 1),
+            ("MBR → BUS (dato disponible)", (("mbr_out", True),), 1),
+            (f"UC → REG_BANK.enable_in({dst})", (("reg_enable_in", dst_id),), 1),
+        ), False, 0, 0
+    
+    if mnemonic == "STORE":
+        return OPERAND_SEQUENCE + (
+            ("MBR → MAR (dirección destino)", (("mar_load", True),), 1),
+            (f"UC → REG_BANK.enable_out({src}); MBR ← BUS", (("reg_enable_out", src_id), ("mbr_enable", True)), 1),
+            ("UC → MEM (mem_write); MEM ← MBR", (("mem_write", True), ("mem_data", True)), 1),
+            ("MEM[MAR] ← MBR (escritura completada)", (), 1),
+        ), False, 0, 0
+    
+    if opcode in JUMP_CONDITIONS:
+        _, cond_mask, cond_value = JUMP_CONDITIONS[opcode]
+        return OPERAND_SEQUENCE + (
+            ("MBR → IP (si se cumple la condición)", (("ip_load", True),), 1),
+        ), False, cond_mask, cond_value
+    
+    return (("UC detenida (HLT)", (), 1),), True, 0, 0
+
+
+def _build_microcode() -> tuple[tuple[MicroStep, ...], tuple[int, ...]]:
+    """Compila la ROM de microcódigo y la tabla de despacho indexada por opcode."""
+    rom: list[MicroStep] = []
+    for index, (label, signals, cycles) in enumerate(FETCH_SEQUENCE):
+        rom.append(MicroStep(f"FETCH{index + 1}", f"Paso {index + 1}/{len(FETCH_SEQUENCE)}: {label}",
+                             signals, cycles, index + 1, True))
+    rom.append(MicroStep("EXEC1", "Paso 1: Decodificación", (), 1, NEXT_DISPATCH, False))
+    
+    dispatch = []
+    nop_entry = None
+    for opcode in range(0x100):
+        if opcode not in INSTRUCTION_SET and nop_entry is not None:
+            dispatch.append(nop_entry)
+            continue
+        sequence, halts, cond_mask, cond_value = _execute_sequence(opcode)
+        entry = len(rom)
+        if opcode not in INSTRUCTION_SET:
+            nop_entry = entry
+        total = len(sequence) + 1
+        for index, (label, signals, cycles) in enumerate(sequence):
+            last = index == len(sequence) - 1
+            next_step = (NEXT_HALT if halts else 0) if last else entry + index + 1
+            step_cond = (cond_mask, cond_value) if last else (0, 0)
+            rom.append(MicroStep(f"EXEC{index + 2}", f"Paso {index + 2}/{total}: {label}",
+                                 signals, cycles, next_step, False, *step_cond))
+        dispatch.append(entry)
+    return tuple(rom), tuple(dispatch)
+
+
+MICROCODE_ROM, DISPATCH_TABLE = _build_microcode()
+STEP_DECODE = len(FETCH_SEQUENCE)
+MICROCODE_COSTS = tuple(step.cycles for step in MICROCODE_ROM)
+
+
+def microcode_costs(cycle_costs: Mapping[str, int] | None = None) -> tuple[int, ...]:
+    """Ciclos contabilizados por cada paso de la ROM, sustituyendo los de las fases indicadas.
+    
+    ``cycle_costs`` asocia fase → ciclos (p. ej. ``{"FETCH3": 4}``) y solo afecta a la contabilidad:
+    la temporización DEVS de los pasos sigue siendo la de la ROM.
+    """
+    if not cycle_costs:
+        return MICROCODE_COSTS
+    phases = {step.phase for step in MICROCODE_ROM}
+    for phase, cycles in cycle_costs.items():
+        if phase not in phases:
+            raise ValueError(f"Fase de microcódigo desconocida: {phase}")
+        if cycles < 0:
+            raise ValueError(f"Coste inválido para {phase}: {cycles}")
+    return tuple(cycle_costs.get(step.phase, step.cycles) for step in MICROCODE_ROM)
+
+
+TRACE_OFF = 0
+TRACE_INFO = 1
+TRACE_DEBUG = 2
+
+TRACE_DELTINT = 0
+TRACE_DELTEXT = 1
+TRACE_LAMBDA = 2
+TRACE_STEP = 3
+TRACE_DECODE = 4
+TRACE_HALT = 5
+TRACE_WAKE = 6
+
+TRACE_KIND_NAMES = ("δ_int", "δ_ext", "λ", "paso", "decodificación", "HLT", "IRQ")
+
+TRACE_COMPONENTS = ("IP", "MAR", "MEM", "MBR", "IR", "UC", "ALU", "AL", "BL", "CL", "DL")
+TRACE_ALL = -1
+
+
+def trace_mask(*names: str) -> int:
+    """Máscara de componentes a trazar a partir de sus nombres (ver ``TRACE_COMPONENTS``)."""
+    mask = 0
+    for name in names:
+        mask |= 1 << TRACE_COMPONENTS.index(name)
+    return mask
+
+
+def describe_instruction(opcode: int) -> str:
+    """Texto ensamblador de un opcode (p. ej. ``MOV AL,BL``)."""
+    decoded = INSTRUCTION_SET.get(opcode, {"opcode": "NOP", "dst": "", "src": ""})
+    operands = ",".join(operand for operand in (decoded["dst"], decoded["src"]) if operand)
+    return f"{decoded['opcode']} {operands}".strip()
+
+
+class TraceRecord(NamedTuple):
+    """Registro de traza: instante, componente, tipo de transición y valor."""
+    time: float
+    component: str
+    kind: int
+    value: int
+
+
+class Tracer:
+    """Traza estructurada de las transiciones DEVS sobre un buffer circular preasignado.
+    
+    Con la traza desactivada cada modelo solo evalúa ``self.trace is not None``: el nivel y la máscara
+    de componentes se resuelven al conectar el trazador (``attach``), nunca por evento. Los registros
+    se guardan en columnas ``array`` de capacidad fija; si se llena, se sobrescriben los más antiguos.
+    """
+    
+    def __init__(self, capacity: int = 4096, level: int = TRACE_DEBUG, mask: int = TRACE_ALL):
+        self.capacity = capacity
+        self.level = level
+        self.mask = mask
+        self.clock = None
+        self.components: list[str] = []
+        self.times = array("d", [0.0]) * capacity
+        self.sources = array("H", [0]) * capacity
+        self.kinds = array("B", [0]) * capacity
+        self.values = array("q", [0]) * capacity
+        self.position = 0
+        self.size = 0
+        self.dropped = 0
+        self._models: list[Atomic] = []
+    
+    def attach(self, model: Component, clock=None):
+        """Conecta el trazador a los modelos atómicos de ``model`` según nivel y máscara."""
+        self.clock = clock
+        if isinstance(model, Coupled):
+            for component in model.components:
+                self.attach(component, clock)
+            return
+        if not hasattr(model, "trace") or not self._enabled(model):
+            return
+        if model.name in self.components:
+            component_id = self.components.index(model.name)
+        else:
+            component_id = len(self.components)
+            self.components.append(model.name)
+        model.trace = self._recorder(component_id)
+        self._models.append(model)
+    
+    def detach(self):
+        """Desconecta el trazador: los modelos vuelven al camino sin traza."""
+        for model in self._models:
+            model.trace = None
+        self._models.clear()
+    
+    def _enabled(self, model: Atomic) -> bool:
+        if self.level == TRACE_OFF:
+            return False
+        if self.level == TRACE_INFO and not isinstance(model, ControlUnit):
+            return False
+        if self.mask == TRACE_ALL:
+            return True
+        if model.name not in TRACE_COMPONENTS:
+            return False
+        return bool(self.mask & (1 << TRACE_COMPONENTS.index(model.name)))
+    
+    def _recorder(self, component_id: int):
+        times, sources, kinds, values = self.times, self.sources, self.kinds, self.values
+        capacity = self.capacity
+        
+        def record(kind: int, value: int):
+            position = self.position
+            times[position] = self.clock.time if self.clock is not None else 0.0
+            sources[position] = component_id
+            kinds[position] = kind
+            values[position] = value
+            self.position = (position + 1) % capacity
+            if self.size < capacity:
+                self.size += 1
+            else:
+                self.dropped += 1
+        
+        return record
+    
+    def drain(self, sink: Callable[[TraceRecord], None] | None = None) -> list[TraceRecord]:
+        """Vacía el buffer en orden cronológico, entregando cada registro a ``sink`` si se indica."""
+        start = (self.position - self.size) % self.capacity
+        records = []
+        for offset in range(self.size):
+            index = (start + offset) % self.capacity
+            record = TraceRecord(self.times[index], self.components[self.sources[index]],
+                                 self.kinds[index], self.values[index])
+            if sink is not None:
+                sink(record)
+            records.append(record)
+        self.size = 0
+        return records
+    
+    def drain_to_file(self, target) -> int:
+        """Vacía el buffer a un fichero de texto (ruta o fichero abierto), un registro por línea."""
+        if isinstance(target, (str, os.PathLike)):
+            with open(target, "a", encoding="utf-8") as stream:
+                return len(self.drain(lambda record: stream.write(format_record(record) + "\n")))
+        return len(self.drain(lambda record: target.write(format_record(record) + "\n")))
+
+
+def format_record(record: TraceRecord) -> str:
+    """Representación legible de un registro de traza."""
+    prefix = f"t={record.time:>6g} [{record.component}]"
+    if record.kind == TRACE_STEP:
+        step = MICROCODE_ROM[record.value]
+        return f"{prefix} FASE {'FETCH' if step.fetch else 'EXECUTE'} - {step.label}"
+    if record.kind == TRACE_DECODE:
+        return f"{prefix} Instrucción decodificada: {describe_instruction(record.value)}"
+    if record.kind == TRACE_HALT:
+        return f"{prefix} UC detenida tras {record.value} instrucciones"
+    if record.kind == TRACE_WAKE:
+        return f"{prefix} UC despierta por interrupción tras {record.value} ciclos en espera"
+    return f"{prefix} {TRACE_KIND_NAMES[record.kind]}: valor={record.value:02X}"
+
+
+# Los modelos atómicos declaran __slots__ con sus atributos propios. Atomic y Component de xDEVS no los
+# declaran, así que cada modelo sigue teniendo un __dict__ con los atributos de xDEVS: los huecos solo
+# sacan de él los del modelo (unos 2.7 KiB por VonSim8System, métrica construction.slots_saved_kib).
 class SharedBus(Atomic):
-    """Modelo atómico para el bus compartido con arbitraje."""
+    """Modelo atómico para el bus compartido con arbitraje y entrega direccionada.
+    
+    Además de ``req``/``grant``/``release`` y del eco ``data_in`` → ``data_out``, el bus conoce a sus
+    ``targets``: ``select_read``/``select_write`` reciben el índice del destino en ``targets`` y solo se
+    activa el puerto ``read_<destino>``/``write_<destino>`` correspondiente. ``load`` fija el valor del
+    bus sin reemitirlo. Las selecciones pendientes se guardan como máscaras de bits.
+    """
     
-    def __init__(self, name: str = "BUS"):
+    __slots__ = ("current_value", "locked", "requester", "req", "grant", "data_in", "data_out", "release",
+                 "select_read", "select_write", "load", "read_ports", "write_ports", "read_targets",
+                 "write_targets", "pending_grant", "pending_data", "pending_reads", "pending_writes")
+    state_fields = ("current_value", "locked", "requester", "pending_grant", "pending_data", "pending_reads",
+                    "pending_writes")
+    
+    def __init__(self, name: str = "BUS", targets: tuple[str, ...] = ()):
         super().__init__(name)
         self.current_value: int = 0x00
         self.locked: bool = False
@@ -24,8 +423,27 @@ class SharedBus(Atomic):
         self.release = Port(bool, name="release")
         self.add_in_port(self.release)
         
+        self.select_read = Port(int, name="select_read")
+        self.add_in_port(self.select_read)
+        self.select_write = Port(int, name="select_write")
+        self.add_in_port(self.select_write)
+        self.load = Port(int, name="load")
+        self.add_in_port(self.load)
+        
+        self.read_ports: dict[str, Port] = {}
+        self.write_ports: dict[str, Port] = {}
+        for target in targets:
+            self.read_ports[target] = Port(bool, name=f"read_{target}")
+            self.add_out_port(self.read_ports[target])
+            self.write_ports[target] = Port(int, name=f"write_{target}")
+            self.add_out_port(self.write_ports[target])
+        self.read_targets = tuple(self.read_ports.values())
+        self.write_targets = tuple(self.write_ports.values())
+        
         self.pending_grant = False
         self.pending_data = False
+        self.pending_reads = 0
+        self.pending_writes = 0
     
     def initialize(self):
         self.passivate()
@@ -49,12 +467,27 @@ class SharedBus(Atomic):
             self.current_value = self.data_in.get() & 0xFF
             self.pending_data = True
             self.activate()
+        
+        if self.load:
+            self.current_value = self.load.get() & 0xFF
+        
+        if self.select_read:
+            for target in self.select_read.values:
+                self.pending_reads |= 1 << target
+            self.activate()
+        
+        if self.select_write:
+            for target in self.select_write.values:
+                self.pending_writes |= 1 << target
+            self.activate()
     
     def deltint(self):
         if self.pending_grant:
             self.pending_grant = False
         if self.pending_data:
             self.pending_data = False
+        self.pending_reads = 0
+        self.pending_writes = 0
         self.passivate()
     
     def lambdaf(self):
@@ -62,25 +495,44 @@ class SharedBus(Atomic):
             self.grant.add(True)
         if self.pending_data:
             self.data_out.add(self.current_value)
+        selected, target = self.pending_reads, 0
+        while selected:
+            if selected & 1:
+                self.read_targets[target].add(True)
+            selected >>= 1
+            target += 1
+        selected, target = self.pending_writes, 0
+        while selected:
+            if selected & 1:
+                self.write_targets[target].add(self.current_value)
+            selected >>= 1
+            target += 1
     
     def exit(self):
         pass
 
 
 class Register(Atomic):
-    """Modelo atómico para un registro de 8 bits con señales indexadas."""
+    """Modelo atómico para un registro de 8 bits direccionado por el bus interno del banco.
+    
+    El bus solo entrega ``data_in`` (escritura) o ``read_request`` (lectura) al registro seleccionado.
+    """
+    
+    __slots__ = ("trace", "stop", "value", "reg_name", "data_in", "read_request", "data_out", "pending_write",
+                 "pending_read", "pending_value")
+    state_fields = ("value", "pending_write", "pending_read", "pending_value")
     
     def __init__(self, name: str, initial_value: int = 0x00):
         super().__init__(name)
+        self.trace = None
+        self.stop = None
         self.value: int = initial_value
         self.reg_name: str = name
         
         self.data_in = Port(int, name="data_in")
         self.add_in_port(self.data_in)
-        self.enable_in = Port(str, name="enable_in")
-        self.add_in_port(self.enable_in)
-        self.enable_out = Port(str, name="enable_out")
-        self.add_in_port(self.enable_out)
+        self.read_request = Port(bool, name="read_request")
+        self.add_in_port(self.read_request)
         
         self.data_out = Port(int, name="data_out")
         self.add_out_port(self.data_out)
@@ -95,36 +547,34 @@ class Register(Atomic):
     def deltext(self, e: float):
         self.continuef(e)
         
-        if self.data_in and not self.data_in.empty():
+        if self.data_in:
             self.pending_value = self.data_in.get() & 0xFF
+            self.pending_write = True
+            self.activate()
         
-        if self.enable_in and not self.enable_in.empty():
-            target_reg = self.enable_in.get()
-            if target_reg == self.reg_name:
-                self.pending_write = True
-                self.activate()
-        
-        if self.enable_out and not self.enable_out.empty():
-            target_reg = self.enable_out.get()
-            if target_reg == self.reg_name:
-                self.pending_read = True
-                self.activate()
+        if self.read_request:
+            self.pending_read = True
+            self.activate()
     
     def deltint(self):
         if self.pending_write:
+            if self.stop is not None and self.pending_value != self.value:
+                self.stop.trigger(STOP_REGISTER, self.reg_name)
             self.value = self.pending_value
-            print(f"  [{self.name}] δ_int: Escritura completada. Valor={self.value:02X}")
             self.pending_write = False
         
         if self.pending_read:
-            print(f"  [{self.name}] δ_int: Lectura completada. Valor={self.value:02X}")
+            self.pending_value = self.value
             self.pending_read = False
         
+        if self.trace is not None:
+            self.trace(TRACE_DELTINT, self.value)
         self.passivate()
     
     def lambdaf(self):
         if self.pending_read:
-            print(f"  [{self.name}] λ: Emitiendo dato={self.value:02X} por data_out")
+            if self.trace is not None:
+                self.trace(TRACE_LAMBDA, self.value)
             self.data_out.add(self.value)
     
     def exit(self):
@@ -134,8 +584,13 @@ class Register(Atomic):
 class SimpleRegister(Atomic):
     """Modelo atómico para registros simples (MBR, IR) con señales booleanas."""
     
+    __slots__ = ("trace", "value", "data_in", "enable_in", "enable_out", "data_out", "pending_write", "pending_read",
+                 "pending_value", "write_enabled")
+    state_fields = ("value", "pending_write", "pending_read", "pending_value", "write_enabled")
+    
     def __init__(self, name: str, initial_value: int = 0x00):
         super().__init__(name)
+        self.trace = None
         self.value: int = initial_value
         
         self.data_in = Port(int, name="data_in")
@@ -151,46 +606,47 @@ class SimpleRegister(Atomic):
         self.pending_write = False
         self.pending_read = False
         self.pending_value = 0x00
+        self.write_enabled = False
     
     def initialize(self):
+        self.write_enabled = False
         self.passivate()
     
     def deltext(self, e: float):
         self.continuef(e)
         
         if self.enable_in and not self.enable_in.empty():
-            enabled = self.enable_in.get()
-            if enabled and self.data_in and not self.data_in.empty():
-                self.pending_value = self.data_in.get() & 0xFF
-                self.pending_write = True
-                self.activate()
+            if self.enable_in.get():
+                self.write_enabled = True
+        
+        if self.write_enabled and self.data_in and not self.data_in.empty():
+            self.pending_value = self.data_in.get() & 0xFF
+            self.pending_write = True
+            self.write_enabled = False
+            self.activate()
         
         if self.enable_out and not self.enable_out.empty():
             enabled = self.enable_out.get()
             if enabled:
                 self.pending_read = True
                 self.activate()
-        
-        if not self.enable_in and self.data_in and not self.data_in.empty():
-            self.pending_value = self.data_in.get() & 0xFF
-            self.pending_write = True
-            self.activate()
     
     def deltint(self):
         if self.pending_write:
             self.value = self.pending_value
-            print(f"  [{self.name}] δ_int: Escritura completada. Valor={self.value:02X}")
             self.pending_write = False
         
         if self.pending_read:
-            print(f"  [{self.name}] δ_int: Lectura completada. Valor={self.value:02X}")
             self.pending_read = False
         
+        if self.trace is not None:
+            self.trace(TRACE_DELTINT, self.value)
         self.passivate()
     
     def lambdaf(self):
         if self.pending_read:
-            print(f"  [{self.name}] λ: Emitiendo dato={self.value:02X} por data_out")
+            if self.trace is not None:
+                self.trace(TRACE_LAMBDA, self.value)
             self.data_out.add(self.value)
     
     def exit(self):
@@ -200,9 +656,15 @@ class SimpleRegister(Atomic):
 class InstructionPointer(Atomic):
     """Modelo atómico para el registro IP (Instruction Pointer)."""
     
-    def __init__(self, name: str = "IP"):
+    __slots__ = ("trace", "value", "address_mask", "addr_out", "ip_write", "read_request", "data_in", "enable_in",
+                 "pending_output", "pending_increment", "load_enabled", "pending_load")
+    state_fields = ("value", "pending_output", "pending_increment", "load_enabled", "pending_load")
+    
+    def __init__(self, name: str = "IP", address_mask: int = 0xFF):
         super().__init__(name)
+        self.trace = None
         self.value: int = 0x00
+        self.address_mask = address_mask
         
         self.addr_out = Port(int, name="addr_out")
         self.add_out_port(self.addr_out)
@@ -210,11 +672,18 @@ class InstructionPointer(Atomic):
         self.add_in_port(self.ip_write)
         self.read_request = Port(bool, name="read_request")
         self.add_in_port(self.read_request)
+        self.data_in = Port(int, name="data_in")
+        self.add_in_port(self.data_in)
+        self.enable_in = Port(bool, name="enable_in")
+        self.add_in_port(self.enable_in)
         
         self.pending_output = False
         self.pending_increment = False
+        self.load_enabled = False
+        self.pending_load = None
     
     def initialize(self):
+        self.load_enabled = False
         self.passivate()
     
     def deltext(self, e: float):
@@ -229,14 +698,27 @@ class InstructionPointer(Atomic):
             if increment:
                 self.pending_increment = True
                 self.activate()
+        
+        if self.enable_in and self.enable_in.get():
+            self.load_enabled = True
+        
+        if self.load_enabled and self.data_in:
+            self.pending_load = self.data_in.get() & 0xFF
+            self.load_enabled = False
+            self.activate()
     
     def deltint(self):
         if self.pending_increment:
-            old_val = self.value
-            self.value = (self.value + 1) & 0xFF
-            print(f"  [IP] δ_int: Incremento IP. {old_val:02X} → {self.value:02X}")
+            self.value = (self.value + 1) & self.address_mask
             self.pending_increment = False
         
+        if self.pending_load is not None:
+            self.value = self.pending_load
+            self.pending_load = None
+        
+        if self.trace is not None:
+            self.trace(TRACE_DELTINT, self.value)
+        
         if self.pending_output:
             self.pending_output = False
         
@@ -244,7 +726,8 @@ class InstructionPointer(Atomic):
     
     def lambdaf(self):
         if self.pending_output:
-            print(f"  [IP] λ: Emitiendo dirección IP={self.value:02X} por addr_out")
+            if self.trace is not None:
+                self.trace(TRACE_LAMBDA, self.value)
             self.addr_out.add(self.value)
     
     def exit(self):
@@ -254,345 +737,978 @@ class InstructionPointer(Atomic):
 class MemoryAddressRegister(Atomic):
     """Modelo atómico para el registro MAR (Memory Address Register)."""
     
-    def __init__(self, name: str = "MAR"):
+    __slots__ = ("trace", "address", "address_mask", "addr_in", "addr_out", "data_in", "enable_in", "pending_addr",
+                 "load_enabled")
+    state_fields = ("address", "pending_addr", "load_enabled")
+    
+    def __init__(self, name: str = "MAR", address_mask: int = 0xFF):
         super().__init__(name)
+        self.trace = None
         self.address: int = 0x00
+        self.address_mask = address_mask
         
         self.addr_in = Port(int, name="addr_in")
         self.add_in_port(self.addr_in)
         self.addr_out = Port(int, name="addr_out")
         self.add_out_port(self.addr_out)
+        self.data_in = Port(int, name="data_in")
+        self.add_in_port(self.data_in)
+        self.enable_in = Port(bool, name="enable_in")
+        self.add_in_port(self.enable_in)
         
         self.pending_addr = None
+        self.load_enabled = False
     
     def initialize(self):
+        self.load_enabled = False
         self.passivate()
     
     def deltext(self, e: float):
         self.continuef(e)
         if self.addr_in:
-            self.pending_addr = self.addr_in.get() & 0xFF
+            self.pending_addr = self.addr_in.get() & self.address_mask
+            self.activate()
+        
+        if self.enable_in and self.enable_in.get():
+            self.load_enabled = True
+        
+        if self.load_enabled and self.data_in:
+            self.pending_addr = self.data_in.get() & self.address_mask
+            self.load_enabled = False
             self.activate()
     
     def deltint(self):
         if self.pending_addr is not None:
             self.address = self.pending_addr
-            print(f"  [MAR] δ_int: Dirección almacenada. MAR={self.address:02X}")
+            if self.trace is not None:
+                self.trace(TRACE_DELTINT, self.address)
             self.pending_addr = None
         self.passivate()
     
     def lambdaf(self):
         if self.pending_addr is not None:
-            print(f"  [MAR] λ: Emitiendo dirección MAR={self.pending_addr:02X} hacia MEM")
+            if self.trace is not None:
+                self.trace(TRACE_LAMBDA, self.pending_addr)
             self.addr_out.add(self.pending_addr)
     
     def exit(self):
         pass
 
 
+def parse_intel_hex(lines) -> Iterator[tuple[int, bytes]]:
+    """Decodifica registros Intel HEX (tipos 00, 01, 02 y 04) en pares (dirección, datos)."""
+    base = 0
+    for number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if isinstance(line, bytes):
+            line = line.decode("ascii")
+        if not line:
+            continue
+        if not line.startswith(":"):
+            raise ValueError(f"Intel HEX línea {number}: falta ':' inicial")
+        record = bytes.fromhex(line[1:])
+        if len(record) < 5 or len(record) != record[0] + 5:
+            raise ValueError(f"Intel HEX línea {number}: longitud inválida")
+        if sum(record) & 0xFF:
+            raise ValueError(f"Intel HEX línea {number}: checksum inválido")
+        length, record_type = record[0], record[3]
+        offset = (record[1] << 8) | record[2]
+        data = record[4:4 + length]
+        if record_type == 0x00:
+            yield base + offset, data
+        elif record_type == 0x01:
+            return
+        elif record_type == 0x02:
+            base = int.from_bytes(data, "big") << 4
+        elif record_type == 0x04:
+            base = int.from_bytes(data, "big") << 16
+
+
+SNAPSHOT_PAGE_SIZE = 256
+
+MEM_IDLE, MEM_READ, MEM_WRITE, MEM_IO_READ, MEM_DATA = range(5)
+
+
 class Memory(Atomic):
-    """Modelo atómico para la memoria unificada."""
+    """Modelo atómico para la memoria unificada, respaldada por un ``bytearray`` contiguo.
+    
+    Los rangos asignados con ``map_device`` no se leen ni escriben en ``storage``: el acceso se envía al
+    periférico como ``(offset, valor)`` (``valor=None`` en lecturas) y su respuesta llega por
+    ``io_response`` en tiempo cero, de modo que una lectura de E/S tarda lo mismo que una de memoria.
+    
+    ``watch(dirección, valor)``, si se asigna, se llama en cada escritura que cambia un byte de ``storage``.
+    
+    Con ``address_bits > 8`` el programa solo alcanza ``0x00``–``0xFF`` con LOAD/STORE/Jcc, cuyos operandos
+    siguen siendo de un byte; el resto de la memoria solo se ejecuta de forma secuencial.
+    """
     
-    def __init__(self, name: str = "MEM"):
+    __slots__ = ("trace", "stop", "watch", "address_bits", "size", "address_mask", "storage", "image_loaded",
+                 "pending_addr", "pending_read", "pending_write", "addr", "rw", "wr", "data_in", "data_out",
+                 "io_response", "operation", "operation_addr", "operation_value", "io_map")
+    state_fields = ("image_loaded", "pending_addr", "pending_read", "pending_write", "operation", "operation_addr",
+                    "operation_value")
+    
+    def __init__(self, name: str = "MEM", address_bits: int = 8):
         super().__init__(name)
-        self.storage: dict[int, int] = {}
+        self.trace = None
+        self.stop = None
+        self.watch = None
+        self.address_bits = address_bits
+        self.size = 1 << address_bits
+        self.address_mask = self.size - 1
+        self.storage = bytearray(self.size)
+        self.image_loaded = False
         self.pending_addr: int | None = None
         self.pending_read: bool = False
+        self.pending_write: bool = False
         
         self.addr = Port(int, name="addr")
         self.add_in_port(self.addr)
         self.rw = Port(bool, name="rw")
         self.add_in_port(self.rw)
+        self.wr = Port(bool, name="wr")
+        self.add_in_port(self.wr)
         self.data_in = Port(int, name="data_in")
         self.add_in_port(self.data_in)
         
         self.data_out = Port(int, name="data_out")
         self.add_out_port(self.data_out)
+        self.io_response = Port(int, name="io_response")
+        self.add_in_port(self.io_response)
         
-        self.pending_operation = None
+        self.operation = MEM_IDLE
+        self.operation_addr = 0
+        self.operation_value = 0
+        self.io_map: list[tuple[Port, int] | None] | None = None
+    
+    def map_device(self, name: str, base: int, size: int) -> Port:
+        """Reserva ``[base, base + size)`` para un periférico y devuelve el puerto de peticiones hacia él."""
+        if base < 0 or base + size > self.size:
+            raise ValueError(f"El rango de {name} (0x{base:X}, {size} bytes) no cabe en {self.size} bytes de memoria")
+        if self.io_map is None:
+            self.io_map = [None] * self.size
+        if any(self.io_map[base:base + size]):
+            raise ValueError(f"El rango de {name} (0x{base:X}, {size} bytes) se solapa con otro periférico")
+        port = Port(tuple, name=f"io_{name}")
+        self.add_out_port(port)
+        for offset in range(size):
+            self.io_map[base + offset] = (port, offset)
+        return port
     
     def initialize(self):
-        self.storage[0x00] = 0x01
+        if not self.image_loaded and self.storage.count(0) == self.size:
+            self.storage[:len(DEFAULT_PROGRAM)] = bytes(DEFAULT_PROGRAM)
         self.passivate()
     
+    def read(self, address: int) -> int:
+        return self.storage[address & self.address_mask]
+    
+    def write(self, address: int, value: int):
+        self.storage[address & self.address_mask] = value & 0xFF
+    
+    def load_image(self, image, offset: int = 0):
+        """Copia en bloque una imagen binaria (bytes, bytearray, memoryview, mmap) a partir de ``offset``."""
+        image = memoryview(image).cast("B")
+        if offset < 0 or offset + len(image) > self.size:
+            raise ValueError(f"La imagen ({len(image)} bytes en 0x{offset:X}) no cabe en {self.size} bytes de memoria")
+        self.storage[offset:offset + len(image)] = image
+        self.image_loaded = True
+    
+    def dump(self, start: int = 0, length: int | None = None) -> bytes:
+        """Copia del contenido de la memoria desde ``start`` (por defecto, completa)."""
+        end = self.size if length is None else start + length
+        return bytes(self.storage[start:end])
+    
+    def snapshot_pages(self, base: tuple[bytes, ...] | None = None) -> tuple[bytes, ...]:
+        """Contenido en páginas de ``SNAPSHOT_PAGE_SIZE`` bytes.
+        
+        Las páginas que no cambiaron respecto a ``base`` reutilizan el mismo objeto ``bytes``, así que
+        una instantánea frecuente solo copia las páginas modificadas.
+        """
+        pages = []
+        with memoryview(self.storage) as view:
+            for index, start in enumerate(range(0, self.size, SNAPSHOT_PAGE_SIZE)):
+                page = view[start:start + SNAPSHOT_PAGE_SIZE]
+                if base is not None and base[index] == page:
+                    pages.append(base[index])
+                else:
+                    pages.append(page.tobytes())
+        return tuple(pages)
+    
+    def restore_pages(self, pages: tuple[bytes, ...]):
+        self.storage[:] = b"".join(pages)
+    
+    def load_file(self, path: str | os.PathLike, file_format: str | None = None, offset: int = 0):
+        """Carga una imagen de programa ``raw`` o ``ihex`` (deducido de la extensión si no se indica).
+        
+        Una imagen raw del tamaño exacto de la memoria se proyecta con ``mmap`` en modo copy-on-write
+        y pasa a ser el almacenamiento sin copiarla; las escrituras no modifican el fichero.
+        """
+        if file_format is None:
+            file_format = "ihex" if str(path).lower().endswith((".hex", ".ihex")) else "raw"
+        
+        with open(path, "rb") as stream:
+            file_size = os.fstat(stream.fileno()).st_size
+            if file_size == 0:
+                self.image_loaded = True
+                return
+            mapping = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_COPY)
+        
+        if file_format == "raw":
+            if offset == 0 and file_size == self.size:
+                self.storage = mapping
+                self.image_loaded = True
+                return
+            with mapping:
+                self.load_image(mapping, offset)
+        elif file_format == "ihex":
+            with mapping:
+                for address, data in parse_intel_hex(iter(mapping.readline, b"")):
+                    self.load_image(data, offset + address)
+            self.image_loaded = True
+        else:
+            mapping.close()
+            raise ValueError(f"Formato de imagen desconocido: {file_format}")
+    
     def deltext(self, e: float):
         self.continuef(e)
         
         if self.addr and not self.addr.empty():
-            self.pending_addr = self.addr.get() & 0xFF
+            self.pending_addr = self.addr.get() & self.address_mask
         
         if self.rw and not self.rw.empty():
             self.pending_read = self.rw.get()
         
+        if self.wr and not self.wr.empty():
+            self.pending_write = self.wr.get()
+        
         if self.pending_addr is not None and self.pending_read:
-            self.pending_operation = ("read", self.pending_addr)
-            print(f"  [MEM] δ_ext: Solicitud de lectura en dirección {self.pending_addr:02X}")
-            self.hold_in("READING", 1)
+            if self.trace is not None:
+                self.trace(TRACE_DELTEXT, self.pending_addr)
+            self.operation_addr = self.pending_addr
+            if self.io_map is not None and self.io_map[self.pending_addr] is not None:
+                self.operation = MEM_IO_READ
+                self.activate("IO_REQUEST")
+            else:
+                self.operation = MEM_READ
+                self.hold_in("READING", 1)
             self.pending_addr = None
             self.pending_read = False
+        
+        if self.io_response:
+            self.operation = MEM_DATA
+            self.operation_value = self.io_response.get() & 0xFF
+            self.hold_in("READING", 1)
+        
+        if self.pending_addr is not None and self.pending_write and self.data_in:
+            self.operation = MEM_WRITE
+            self.operation_addr = self.pending_addr
+            self.operation_value = self.data_in.get() & 0xFF
+            if self.trace is not None:
+                self.trace(TRACE_DELTEXT, self.pending_addr)
+            self.hold_in("WRITING", 1)
+            self.pending_addr = None
+            self.pending_write = False
     
     def deltint(self):
-        if self.pending_operation:
-            op_type, addr_val = self.pending_operation
-            data = self.storage.get(addr_val, 0x00)
-            print(f"  [MEM] δ_int: Lectura completada. MEM[{addr_val:02X}]={data:02X}")
-        self.pending_operation = None
+        operation = self.operation
+        self.operation = MEM_IDLE
+        if operation != MEM_IDLE:
+            if operation == MEM_IO_READ:
+                self.passivate("IO_WAIT")
+                return
+            addr_val = self.operation_addr
+            if operation == MEM_WRITE:
+                data = self.operation_value
+                if self.stop is not None and self.stop.memory_watch[addr_val] and self.storage[addr_val] != data:
+                    self.stop.trigger(STOP_MEMORY, addr_val)
+                if self.io_map is None or self.io_map[addr_val] is None:
+                    if self.watch is not None and self.storage[addr_val] != data:
+                        self.watch(addr_val, data)
+                    self.storage[addr_val] = data
+            elif operation == MEM_READ:
+                data = self.storage[addr_val]
+            else:
+                data = self.operation_value
+            if self.trace is not None:
+                self.trace(TRACE_DELTINT, data)
         self.passivate()
     
     def lambdaf(self):
-        if self.pending_operation and self.pending_operation[0] == "read":
-            addr_val = self.pending_operation[1]
-            data = self.storage.get(addr_val, 0x00)
-            print(f"  [MEM] λ: Emitiendo dato={data:02X} por data_out")
+        operation = self.operation
+        if operation == MEM_IDLE:
+            return
+        if operation == MEM_READ or operation == MEM_DATA:
+            data = self.storage[self.operation_addr] if operation == MEM_READ else self.operation_value
+            if self.trace is not None:
+                self.trace(TRACE_LAMBDA, data)
             self.data_out.add(data)
+        elif operation == MEM_IO_READ:
+            port, offset = self.io_map[self.operation_addr]
+            port.add((offset, None))
+        elif self.io_map is not None and self.io_map[self.operation_addr] is not None:
+            port, offset = self.io_map[self.operation_addr]
+            port.add((offset, self.operation_value))
+    
+    def exit(self):
+        pass
+
+
+CACHE_POLICIES = ("lru", "fifo", "random")
+MISS_COMPULSORY = "compulsory"
+MISS_CAPACITY = "capacity"
+MISS_CONFLICT = "conflict"
+
+
+class CacheConfig(NamedTuple):
+    """Geometría y latencias de una caché (tamaños en bytes, latencias en ciclos)."""
+    size: int = 64
+    line_size: int = 4
+    associativity: int = 2
+    policy: str = "lru"
+    hit_latency: int = 1
+    miss_latency: int = 10
+    writeback_latency: int = 0
+    seed: int = 0
+
+
+class CacheModel:
+    """Directorio de etiquetas de una caché write-back con write-allocate.
+    
+    Solo decide aciertos, fallos y latencias: los datos siguen en ``Memory.storage``. Los fallos se
+    clasifican con las tres C: obligatorio (primera referencia a la línea), de capacidad (también
+    fallaría en una caché totalmente asociativa LRU del mismo tamaño) o de conflicto (el resto).
+    """
+    
+    def __init__(self, config: CacheConfig = CacheConfig()):
+        size, line_size, ways = config.size, config.line_size, config.associativity
+        for field, value in (("size", size), ("line_size", line_size), ("associativity", ways)):
+            if value <= 0 or value & (value - 1):
+                raise ValueError(f"{field} de la caché debe ser una potencia de dos: {value}")
+        if size < line_size * ways:
+            raise ValueError(f"Caché de {size} bytes demasiado pequeña para {ways} vías de {line_size} bytes")
+        if config.policy not in CACHE_POLICIES:
+            raise ValueError(f"Política de reemplazo desconocida: {config.policy} (opciones: {', '.join(CACHE_POLICIES)})")
+        if config.hit_latency < 1 or config.miss_latency < config.hit_latency or config.writeback_latency < 0:
+            raise ValueError(f"Latencias de caché inválidas: acierto {config.hit_latency}, fallo {config.miss_latency}")
+        self.config = config
+        self.lines = size // line_size
+        self.num_sets = self.lines // ways
+        self.line_shift = line_size.bit_length() - 1
+        self.reset()
+    
+    def reset(self):
+        self.sets: list[OrderedDict[int, bool]] = [OrderedDict() for _ in range(self.num_sets)]
+        self.seen: set[int] = set()
+        self.shadow: OrderedDict[int, None] = OrderedDict()
+        self.random = random.Random(self.config.seed)
+        self.reads = 0
+        self.writes = 0
+        self.hits = 0
+        self.misses = {MISS_COMPULSORY: 0, MISS_CAPACITY: 0, MISS_CONFLICT: 0}
+        self.writebacks = 0
+        self.cycles = 0
+    
+    def state(self) -> tuple:
+        return (tuple(tuple(ways.items()) for ways in self.sets), frozenset(self.seen), tuple(self.shadow),
+                self.random.getstate(), self.reads, self.writes, self.hits, tuple(self.misses.values()),
+                self.writebacks, self.cycles)
+    
+    def restore(self, state: tuple):
+        sets, seen, shadow, random_state, self.reads, self.writes, self.hits, misses, self.writebacks, \
+            self.cycles = state
+        self.sets = [OrderedDict(ways) for ways in sets]
+        self.seen = set(seen)
+        self.shadow = OrderedDict.fromkeys(shadow)
+        self.random.setstate(random_state)
+        self.misses = dict(zip(self.misses, misses))
+    
+    def access(self, address: int, write: bool = False) -> int:
+        """Registra un acceso y devuelve su latencia en ciclos."""
+        config = self.config
+        line = address >> self.line_shift
+        ways = self.sets[line % self.num_sets]
+        tag = line // self.num_sets
+        
+        shadow = self.shadow
+        in_shadow = line in shadow
+        if in_shadow:
+            shadow.move_to_end(line)
+        else:
+            shadow[line] = None
+            if len(shadow) > self.lines:
+                shadow.popitem(last=False)
+        
+        if write:
+            self.writes += 1
+        else:
+            self.reads += 1
+        if tag in ways:
+            self.hits += 1
+            if config.policy == "lru":
+                ways.move_to_end(tag)
+            if write:
+                ways[tag] = True
+            latency = config.hit_latency
+        else:
+            if line not in self.seen:
+                self.seen.add(line)
+                self.misses[MISS_COMPULSORY] += 1
+            elif not in_shadow:
+                self.misses[MISS_CAPACITY] += 1
+            else:
+                self.misses[MISS_CONFLICT] += 1
+            latency = config.miss_latency
+            if len(ways) == config.associativity:
+                if config.policy == "random":
+                    victim = self.random.choice(tuple(ways))
+                    dirty = ways.pop(victim)
+                else:
+                    dirty = ways.popitem(last=False)[1]
+                if dirty:
+                    self.writebacks += 1
+                    latency += config.writeback_latency
+            ways[tag] = write
+        self.cycles += latency
+        return latency
+    
+    @property
+    def accesses(self) -> int:
+        return self.reads + self.writes
+    
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.accesses if self.accesses else 0.0
+    
+    @property
+    def amat(self) -> float:
+        """Tiempo medio de acceso a memoria en ciclos."""
+        return self.cycles / self.accesses if self.accesses else 0.0
+    
+    def report(self) -> list[str]:
+        config = self.config
+        return [f"{config.size} B, líneas de {config.line_size} B, {config.associativity} vías, {config.policy}",
+                f"Aciertos: {self.hit_rate:.1%} ({self.hits}/{self.accesses}; {self.reads} lecturas, "
+                f"{self.writes} escrituras)",
+                "Fallos: " + ", ".join(f"{kind} {count}" for kind, count in self.misses.items())
+                + f" ({self.writebacks} write-backs)",
+                f"AMAT: {self.amat:.2f} ciclos"]
+
+
+class Cache(Atomic):
+    """Modelo atómico de caché entre MAR/MBR y ``Memory``.
+    
+    Reenvía cada acceso a la memoria en tiempo cero y retiene la respuesta hasta completar la latencia
+    del ``CacheModel``; los ciclos por encima del primero se avisan a la UC por ``wait`` para que alargue
+    el micro-paso en curso (estados de espera). Con ``dcache`` las lecturas y escrituras de datos
+    (señal ``data_access`` de la UC) van a una caché separada; los rangos de E/S no se cachean.
+    """
+    
+    __slots__ = ("memory", "configs", "icache", "dcache", "pending_addr", "pending_read", "pending_write",
+                 "pending_data_access", "operation", "operation_addr", "operation_value", "delay", "addr", "rw", "wr",
+                 "data_in", "data_access", "mem_data", "mem_addr", "mem_rw", "mem_wr", "mem_data_out", "data_out",
+                 "wait")
+    state_fields = ("pending_addr", "pending_read", "pending_write", "pending_data_access", "operation",
+                    "operation_addr", "operation_value", "delay", "model_state")
+    
+    def __init__(self, name: str = "CACHE", memory: Memory | None = None, icache: CacheConfig | None = None,
+                 dcache: CacheConfig | None = None):
+        super().__init__(name)
+        self.memory = memory
+        self.configs = (icache, dcache)
+        self.icache = CacheModel(icache) if icache is not None else None
+        self.dcache = CacheModel(dcache) if dcache is not None else self.icache
+        self.pending_addr: int | None = None
+        self.pending_read = False
+        self.pending_write = False
+        self.pending_data_access = False
+        self.operation = MEM_IDLE
+        self.operation_addr = 0
+        self.operation_value = 0
+        self.delay = 0
+        
+        self.addr = Port(int, name="addr")
+        self.add_in_port(self.addr)
+        self.rw = Port(bool, name="rw")
+        self.add_in_port(self.rw)
+        self.wr = Port(bool, name="wr")
+        self.add_in_port(self.wr)
+        self.data_in = Port(int, name="data_in")
+        self.add_in_port(self.data_in)
+        self.data_access = Port(bool, name="data_access")
+        self.add_in_port(self.data_access)
+        self.mem_data = Port(int, name="mem_data")
+        self.add_in_port(self.mem_data)
+        
+        self.mem_addr = Port(int, name="mem_addr")
+        self.add_out_port(self.mem_addr)
+        self.mem_rw = Port(bool, name="mem_rw")
+        self.add_out_port(self.mem_rw)
+        self.mem_wr = Port(bool, name="mem_wr")
+        self.add_out_port(self.mem_wr)
+        self.mem_data_out = Port(int, name="mem_data_out")
+        self.add_out_port(self.mem_data_out)
+        self.data_out = Port(int, name="data_out")
+        self.add_out_port(self.data_out)
+        self.wait = Port(int, name="wait")
+        self.add_out_port(self.wait)
+    
+    @property
+    def models(self) -> tuple[CacheModel, ...]:
+        if self.dcache is self.icache:
+            return (self.icache,)
+        return tuple(model for model in (self.icache, self.dcache) if model is not None)
+    
+    @property
+    def model_state(self) -> tuple:
+        return tuple(model.state() for model in self.models)
+    
+    @model_state.setter
+    def model_state(self, state: tuple):
+        for model, values in zip(self.models, state):
+            model.restore(values)
+    
+    def initialize(self):
+        for model in self.models:
+            model.reset()
+        self.operation = MEM_IDLE
+        self.passivate()
+    
+    def deltext(self, e: float):
+        self.continuef(e)
+        
+        if self.addr:
+            self.pending_addr = self.addr.get() & self.memory.address_mask
+        if self.rw:
+            self.pending_read = self.rw.get()
+        if self.wr:
+            self.pending_write = self.wr.get()
+        if self.data_access:
+            self.pending_data_access = self.data_access.get()
+        
+        if self.mem_data:
+            self.operation = MEM_DATA
+            self.operation_value = self.mem_data.get()
+            self.hold_in("DELAY", self.delay)
+            return
+        
+        if self.pending_addr is None or not (self.pending_read or (self.pending_write and self.data_in)):
+            return
+        address = self.pending_addr
+        write = not self.pending_read
+        model = self.dcache if self.pending_data_access else self.icache
+        io_map = self.memory.io_map
+        if model is None or (io_map is not None and io_map[address] is not None):
+            latency = 1
+        else:
+            latency = model.access(address, write)
+        self.delay = latency - 1
+        self.operation = MEM_WRITE if write else MEM_READ
+        self.operation_addr = address
+        if write:
+            self.operation_value = self.data_in.get()
+        self.pending_addr = None
+        self.pending_read = False
+        self.pending_write = False
+        self.pending_data_access = False
+        self.activate("FORWARD")
+    
+    def deltint(self):
+        self.operation = MEM_IDLE
+        self.passivate()
+    
+    def lambdaf(self):
+        operation = self.operation
+        if operation == MEM_DATA:
+            self.data_out.add(self.operation_value)
+            return
+        self.mem_addr.add(self.operation_addr)
+        if operation == MEM_READ:
+            self.mem_rw.add(True)
+        else:
+            self.mem_wr.add(True)
+            self.mem_data_out.add(self.operation_value)
+        if self.delay:
+            self.wait.add(self.delay)
+    
+    def exit(self):
+        pass
+
+
+class ALU(Atomic):
+    """Modelo atómico para la Unidad Aritmético-Lógica con registro de flags."""
+    
+    __slots__ = ("trace", "operand_a", "operand_b", "result", "flags", "data_in", "op", "data_out", "flags_out",
+                 "latch_target", "pending_result", "pending_flags")
+    state_fields = ("operand_a", "operand_b", "result", "flags", "latch_target", "pending_result", "pending_flags")
+    
+    def __init__(self, name: str = "ALU"):
+        super().__init__(name)
+        self.trace = None
+        self.operand_a: int = 0x00
+        self.operand_b: int = 0x00
+        self.result: int = 0x00
+        self.flags: int = 0x00
+        
+        self.data_in = Port(int, name="data_in")
+        self.add_in_port(self.data_in)
+        self.op = Port(str, name="op")
+        self.add_in_port(self.op)
+        
+        self.data_out = Port(int, name="data_out")
+        self.add_out_port(self.data_out)
+        self.flags_out = Port(int, name="flags_out")
+        self.add_out_port(self.flags_out)
+        
+        self.latch_target = ""
+        self.pending_result = False
+        self.pending_flags = False
+    
+    def initialize(self):
+        self.latch_target = ""
+        self.passivate()
+    
+    def deltext(self, e: float):
+        self.continuef(e)
+        
+        if self.op and not self.op.empty():
+            operation = self.op.get()
+            if operation in ("A", "B"):
+                self.latch_target = operation
+            else:
+                self.result, self.flags = alu_compute(operation, self.operand_a, self.operand_b)
+                if self.trace is not None:
+                    self.trace(TRACE_DELTEXT, self.result)
+                self.pending_result = operation != "CMP"
+                self.pending_flags = True
+                self.activate()
+        
+        if self.latch_target and self.data_in and not self.data_in.empty():
+            if self.latch_target == "A":
+                self.operand_a = self.data_in.get() & 0xFF
+            else:
+                self.operand_b = self.data_in.get() & 0xFF
+            self.latch_target = ""
+    
+    def deltint(self):
+        self.pending_result = False
+        self.pending_flags = False
+        self.passivate()
+    
+    def lambdaf(self):
+        if self.pending_result:
+            self.data_out.add(self.result)
+        if self.pending_flags:
+            self.flags_out.add(self.flags)
     
     def exit(self):
         pass
 
 
 class ControlUnit(Atomic):
-    """Modelo atómico para la Unidad de Control (UC)."""
+    """Modelo atómico para la Unidad de Control (UC) microprogramada.
     
-    def __init__(self, name: str = "UC"):
+    Las señales de cada paso de la ROM se guardan como (índice del puerto de salida, valor) en una
+    tabla compartida por todas las UC con los mismos puertos.
+    """
+    
+    __slots__ = ("trace", "ir_in", "flags_in", "intr", "mem_wait", "ip_read", "ip_inc", "ip_load", "mem_read",
+                 "mem_write", "mem_data", "mar_load", "mbr_enable", "mbr_out", "ir_enable", "ir_read", "alu_op",
+                 "reg_enable_out", "reg_enable_in", "instruction_code", "micro_step", "flags", "halted",
+                 "instruction_count", "total_cycles", "fetch_cycles", "execute_cycles", "interrupt_line",
+                 "idle_cycles", "wake_on_interrupt", "fetch_wait", "execute_wait", "instruction_set", "rom",
+                 "dispatch", "step_costs", "pipeline", "rom_signals")
+    signal_tables: dict[tuple[str, ...], tuple] = {}
+    state_fields = ("instruction_code", "micro_step", "flags", "halted", "instruction_count", "total_cycles",
+                    "fetch_cycles", "execute_cycles", "interrupt_line", "idle_cycles", "fetch_wait", "execute_wait",
+                    "pipeline_state")
+    
+    def __init__(self, name: str = "UC", cycle_costs: Mapping[str, int] | None = None, pipelined: bool = False):
         super().__init__(name)
+        self.trace = None
         
         self.ir_in = Port(int, name="ir_in")
         self.add_in_port(self.ir_in)
+        self.flags_in = Port(int, name="flags_in")
+        self.add_in_port(self.flags_in)
+        self.intr = Port(bool, name="intr")
+        self.add_in_port(self.intr)
+        self.mem_wait = Port(int, name="mem_wait")
+        self.add_in_port(self.mem_wait)
         
         self.ip_read = Port(bool, name="ip_read")
         self.add_out_port(self.ip_read)
         self.ip_inc = Port(bool, name="ip_inc")
         self.add_out_port(self.ip_inc)
+        self.ip_load = Port(bool, name="ip_load")
+        self.add_out_port(self.ip_load)
         self.mem_read = Port(bool, name="mem_read")
         self.add_out_port(self.mem_read)
+        self.mem_write = Port(bool, name="mem_write")
+        self.add_out_port(self.mem_write)
+        self.mem_data = Port(bool, name="mem_data")
+        self.add_out_port(self.mem_data)
+        self.mar_load = Port(bool, name="mar_load")
+        self.add_out_port(self.mar_load)
         self.mbr_enable = Port(bool, name="mbr_enable")
         self.add_out_port(self.mbr_enable)
+        self.mbr_out = Port(bool, name="mbr_out")
+        self.add_out_port(self.mbr_out)
         self.ir_enable = Port(bool, name="ir_enable")
         self.add_out_port(self.ir_enable)
         self.ir_read = Port(bool, name="ir_read")
         self.add_out_port(self.ir_read)
+        self.alu_op = Port(str, name="alu_op")
+        self.add_out_port(self.alu_op)
         
-        self.reg_enable_out = Port(str, name="reg_enable_out")
+        self.reg_enable_out = Port(int, name="reg_enable_out")
         self.add_out_port(self.reg_enable_out)
-        self.reg_enable_in = Port(str, name="reg_enable_in")
+        self.reg_enable_in = Port(int, name="reg_enable_in")
         self.add_out_port(self.reg_enable_in)
         
         self.phase = "IDLE"
         self.instruction_code = 0x00
         self.micro_step = 0
+        self.flags = 0x00
+        self.halted = False
+        self.instruction_count = 0
         
         self.total_cycles = 0
         self.fetch_cycles = 0
         self.execute_cycles = 0
-        
-        self.instruction_set = {
-            0x01: {"opcode": "MOV", "dst": "AL", "src": "BL"}
-        }
+        self.interrupt_line = False
+        self.idle_cycles = 0
+        self.wake_on_interrupt = False
+        self.fetch_wait = 0
+        self.execute_wait = 0
+        
+        self.instruction_set = INSTRUCTION_SET
+        self.rom = MICROCODE_ROM
+        self.dispatch = DISPATCH_TABLE
+        self.step_costs = microcode_costs(cycle_costs)
+        self.pipeline = PipelineModel(self.step_costs) if pipelined else None
+        port_names = tuple(self.output)
+        self.rom_signals = self.signal_tables.get(port_names)
+        if self.rom_signals is None:
+            index = {port_name: position for position, port_name in enumerate(port_names)}
+            self.rom_signals = self.signal_tables[port_names] = tuple(
+                tuple((index[port_name], value) for port_name, value in step.signals)
+                for step in self.rom
+            )
     
     def initialize(self):
-        self.phase = "FETCH1"
-        self.micro_step = 0
-        self.total_cycles = 1
-        self.fetch_cycles = 1
-        self.hold_in(self.phase, 1)
+        self.flags = 0x00
+        self.halted = False
+        self.instruction_count = 0
+        self.total_cycles = 0
+        self.fetch_cycles = 0
+        self.execute_cycles = 0
+        self.interrupt_line = False
+        self.idle_cycles = 0
+        self.fetch_wait = 0
+        self.execute_wait = 0
+        if self.pipeline is not None:
+            self.pipeline.reset()
+        self._enter_step(0)
+    
+    @property
+    def pipeline_state(self) -> tuple | None:
+        return self.pipeline.state() if self.pipeline is not None else None
+    
+    @pipeline_state.setter
+    def pipeline_state(self, state: tuple | None):
+        if self.pipeline is not None and state is not None:
+            self.pipeline.restore(state)
+    
+    def _enter_step(self, index: int):
+        step = self.rom[index]
+        self.micro_step = index
+        self.hold_in(step.phase, step.cycles)
     
     def deltint(self):
-        if self.phase == "FETCH1":
-            print(f"\n{'═'*78}")
-            print(f"  FASE FETCH - Paso 1/6: UC → IP (solicita dirección)")
-            print(f"{'─'*78}")
-            self.phase = "FETCH2"
-            cycles = 1
-            self.hold_in(self.phase, cycles)
-        
-        elif self.phase == "FETCH2":
-            print(f"\n{'─'*78}")
-            print(f"  FASE FETCH - Paso 2/6: IP → MAR (transfiere dirección)")
-            print(f"{'─'*78}")
-            self.phase = "FETCH3"
-            cycles = 1
-            self.fetch_cycles += cycles
-            self.total_cycles += cycles
-            self.hold_in(self.phase, cycles)
-        
-        elif self.phase == "FETCH3":
-            print(f"\n{'─'*78}")
-            print(f"  FASE FETCH - Paso 3/6: UC → MEM (mem_read); IP ← IP+1")
-            print(f"{'─'*78}")
-            self.phase = "FETCH4"
-            cycles = 2
-            self.fetch_cycles += cycles
-            self.total_cycles += cycles
-            self.hold_in(self.phase, cycles)
-        
-        elif self.phase == "FETCH4":
-            print(f"\n{'─'*78}")
-            print(f"  FASE FETCH - Paso 4/6: MEM → MBR (instrucción leída)")
-            print(f"{'─'*78}")
-            self.phase = "FETCH5"
-            cycles = 1
-            self.fetch_cycles += cycles
-            self.total_cycles += cycles
-            self.hold_in(self.phase, cycles)
-        
-        elif self.phase == "FETCH5":
-            print(f"\n{'─'*78}")
-            print(f"  FASE FETCH - Paso 5/6: MBR → IR (carga instrucción)")
-            print(f"{'─'*78}")
-            self.phase = "FETCH6"
-            cycles = 2
-            self.fetch_cycles += cycles
-            self.total_cycles += cycles
-            self.hold_in(self.phase, cycles)
-        
-        elif self.phase == "FETCH6":
-            print(f"\n{'─'*78}")
-            print(f"  FASE FETCH - Paso 6/6: IR → UC (recibe opcode)")
-            print(f"{'─'*78}")
-            self.phase = "EXEC1"
-            cycles = 1
-            self.fetch_cycles += cycles
-            self.total_cycles += cycles
-            self.hold_in(self.phase, cycles)
-        
-        elif self.phase == "EXEC1":
-            print(f"\n{'═'*78}")
-            print(f"  FASE EXECUTE - Paso 1/5: Decodificación")
-            print(f"{'─'*78}")
-            decoded = self.instruction_set.get(self.instruction_code, {"opcode": "NOP", "dst": "", "src": ""})
-            print(f"  [UC] Instrucción decodificada: {decoded['opcode']} {decoded['dst']},{decoded['src']}")
-            print(f"  [UC] Microoperaciones planificadas: BL → BUS → AL")
-            self.phase = "EXEC2"
-            cycles = 1
-            self.execute_cycles += cycles
-            self.total_cycles += cycles
-            self.hold_in(self.phase, cycles)
-        
-        elif self.phase == "EXEC2":
-            print(f"\n{'─'*78}")
-            print(f"  FASE EXECUTE - Paso 2/5: UC → REG_BANK.enable_out(BL)")
-            print(f"{'─'*78}")
-            self.phase = "EXEC3"
-            cycles = 1
-            self.execute_cycles += cycles
-            self.total_cycles += cycles
-            self.hold_in(self.phase, cycles)
-        
-        elif self.phase == "EXEC3":
-            print(f"\n{'─'*78}")
-            print(f"  FASE EXECUTE - Paso 3/5: BUS ← BL (dato disponible)")
-            print(f"{'─'*78}")
-            self.phase = "EXEC4"
-            cycles = 2
-            self.execute_cycles += cycles
-            self.total_cycles += cycles
-            self.hold_in(self.phase, cycles)
-        
-        elif self.phase == "EXEC4":
-            print(f"\n{'─'*78}")
-            print(f"  FASE EXECUTE - Paso 4/5: UC → REG_BANK.enable_in(AL)")
-            print(f"{'─'*78}")
-            self.phase = "EXEC5"
-            cycles = 1
-            self.execute_cycles += cycles
-            self.total_cycles += cycles
-            self.hold_in(self.phase, cycles)
+        step = self.rom[self.micro_step]
+        if self.trace is not None:
+            self.trace(TRACE_STEP, self.micro_step)
         
-        elif self.phase == "EXEC5":
-            print(f"\n{'─'*78}")
-            print(f"  FASE EXECUTE - Paso 5/5: AL ← BUS (captura completada)")
-            print(f"{'─'*78}")
-            cycles = 1
+        cycles = self.step_costs[self.micro_step]
+        if step.fetch:
+            self.fetch_cycles += cycles
+        else:
             self.execute_cycles += cycles
+        if self.pipeline is None:
             self.total_cycles += cycles
-            self.phase = "DONE"
-            print(f"\n{'═'*78}")
-            print(f"  ✓ Ciclo de instrucción MOV AL, BL completado")
-            print(f"{'═'*78}")
-            self.hold_in(self.phase, cycles)
         
-        elif self.phase == "DONE":
-            self.passivate()
-        
-        else:
-            self.passivate()
+        next_step = step.next_step
+        if next_step == NEXT_DISPATCH:
+            self.instruction_count += 1
+            if self.trace is not None:
+                self.trace(TRACE_DECODE, self.instruction_code)
+            next_step = self.dispatch[self.instruction_code]
+        elif self.pipeline is not None and next_step in (0, NEXT_HALT):
+            taken = (self.flags & step.cond_mask) == step.cond_value
+            self.total_cycles = self.pipeline.issue(self.instruction_code, taken, self.fetch_wait, self.execute_wait)
+            self.fetch_wait = 0
+            self.execute_wait = 0
+        
+        if next_step == NEXT_HALT:
+            if self.interrupt_line:
+                next_step = 0
+            else:
+                self.halted = True
+                if self.trace is not None:
+                    self.trace(TRACE_HALT, self.instruction_count)
+                self.passivate("HALTED")
+                return
+        
+        self._enter_step(next_step)
     
     def deltext(self, e: float):
         self.continuef(e)
         if self.ir_in:
             self.instruction_code = self.ir_in.get() & 0xFF
+        if self.flags_in:
+            self.flags = self.flags_in.get() & 0xFF
+        if self.intr:
+            self.interrupt_line = self.intr.get()
+        if self.mem_wait:
+            self._wait(self.mem_wait.get())
+        if self.halted:
+            self.idle_cycles += int(e)
+            if self.interrupt_line:
+                self.halted = False
+                if self.trace is not None:
+                    self.trace(TRACE_WAKE, self.idle_cycles)
+                self._enter_step(0)
+    
+    def _wait(self, cycles: int):
+        """Alarga el micro-paso en curso con ``cycles`` estados de espera pedidos por la caché."""
+        self.sigma += cycles
+        fetch = self.rom[self.micro_step].fetch
+        if fetch:
+            self.fetch_cycles += cycles
+        else:
+            self.execute_cycles += cycles
+        if self.pipeline is None:
+            self.total_cycles += cycles
+        elif fetch:
+            self.fetch_wait += cycles
+        else:
+            self.execute_wait += cycles
     
     def lambdaf(self):
-        if self.phase == "FETCH1":
-            self.ip_read.add(True)
-        elif self.phase == "FETCH3":
-            self.mem_read.add(True)
-            self.ip_inc.add(True)
-        elif self.phase == "FETCH4":
-            self.mbr_enable.add(True)
-        elif self.phase == "FETCH5":
-            self.ir_enable.add(True)
-        elif self.phase == "FETCH6":
-            self.ir_read.add(True)
-        elif self.phase == "EXEC2":
-            self.reg_enable_out.add("BL")
-        elif self.phase == "EXEC4":
-            self.reg_enable_in.add("AL")
+        step = self.rom[self.micro_step]
+        if (self.flags & step.cond_mask) == step.cond_value:
+            ports = self.out_ports
+            for index, value in self.rom_signals[self.micro_step]:
+                ports[index].add(value)
     
     def exit(self):
         pass
 
 
+REGISTER_INITIAL_VALUES = {"AL": 0x01, "BL": 0x0A}
+
+
 class RegisterBank(Coupled):
-    """Modelo acoplado para el banco de registros AL, BL, CL, DL."""
+    """Modelo acoplado para el banco de registros (AL, BL, CL, DL por defecto) con bus interno.
+    
+    Los registros solo se acoplan al ``SharedBus`` interno, que entrega cada habilitación al registro
+    seleccionado (``reg_enable_in``/``reg_enable_out`` llevan su índice en ``names``): el número de
+    acoplamientos crece linealmente y cada transferencia genera un número constante de mensajes, sea
+    cual sea el tamaño del banco.
+    """
     
-    def __init__(self, name: str = "REG_BANK"):
+    def __init__(self, name: str = "REG_BANK", names: tuple[str, ...] = REGISTER_NAMES):
         super().__init__(name)
         
-        self.al = Register("AL", 0x01)
-        self.bl = Register("BL", 0x0A)
-        self.cl = Register("CL", 0x00)
-        self.dl = Register("DL", 0x00)
-        
-        self.add_component(self.al)
-        self.add_component(self.bl)
-        self.add_component(self.cl)
-        self.add_component(self.dl)
-        
-        self.reg_enable_in = Port(str, name="reg_enable_in")
+        self.names = names
+        self.bus = SharedBus("BUS", names)
+        self.add_component(self.bus)
+        self.registers: dict[str, Register] = {}
+        for reg_name in names:
+            register = Register(reg_name, REGISTER_INITIAL_VALUES.get(reg_name, 0x00))
+            self.registers[reg_name] = register
+            setattr(self, reg_name.lower(), register)
+            self.add_component(register)
+        
+        self.reg_enable_in = Port(int, name="reg_enable_in")
         self.add_in_port(self.reg_enable_in)
-        self.reg_enable_out = Port(str, name="reg_enable_out")
+        self.reg_enable_out = Port(int, name="reg_enable_out")
         self.add_in_port(self.reg_enable_out)
+        self.data_in = Port(int, name="data_in")
+        self.add_in_port(self.data_in)
+        self.data_out = Port(int, name="data_out")
+        self.add_out_port(self.data_out)
         
-        self.add_coupling(self.reg_enable_in, self.al.enable_in)
-        self.add_coupling(self.reg_enable_in, self.bl.enable_in)
-        self.add_coupling(self.reg_enable_in, self.cl.enable_in)
-        self.add_coupling(self.reg_enable_in, self.dl.enable_in)
-        
-        self.add_coupling(self.reg_enable_out, self.al.enable_out)
-        self.add_coupling(self.reg_enable_out, self.bl.enable_out)
-        self.add_coupling(self.reg_enable_out, self.cl.enable_out)
-        self.add_coupling(self.reg_enable_out, self.dl.enable_out)
+        self.add_coupling(self.reg_enable_in, self.bus.select_write)
+        self.add_coupling(self.reg_enable_out, self.bus.select_read)
+        self.add_coupling(self.data_in, self.bus.load)
+        self.add_coupling(self.bus.data_out, self.data_out)
         
-        for src_reg in [self.al, self.bl, self.cl, self.dl]:
-            for dst_reg in [self.al, self.bl, self.cl, self.dl]:
-                if src_reg != dst_reg:
-                    self.add_coupling(src_reg.data_out, dst_reg.data_in)
+        for reg_name, register in self.registers.items():
+            self.add_coupling(self.bus.read_ports[reg_name], register.read_request)
+            self.add_coupling(self.bus.write_ports[reg_name], register.data_in)
+            self.add_coupling(register.data_out, self.bus.data_in)
+
+
+def _couple_datapath(system: Coupled, addr: Port, rw: Port, wr: Port, data_in: Port, data_out: Port):
+    """Acopla IP, MAR, MBR, IR, UC, ALU y banco de registros de ``system`` entre sí y con el lado de
+    memoria dado por sus puertos ``addr``/``rw``/``wr``/``data_in`` (destinos) y ``data_out`` (origen)."""
+    system.add_coupling(system.uc.ip_read, system.ip.read_request)
+    system.add_coupling(system.ip.addr_out, system.mar.addr_in)
+    system.add_coupling(system.mar.addr_out, addr)
+    system.add_coupling(system.uc.mem_read, rw)
+    system.add_coupling(system.uc.ip_inc, system.ip.ip_write)
+    system.add_coupling(data_out, system.mbr.data_in)
+    system.add_coupling(system.uc.mbr_enable, system.mbr.enable_in)
+    system.add_coupling(system.mbr.data_out, system.ir.data_in)
+    system.add_coupling(system.uc.ir_enable, system.mbr.enable_out)
+    system.add_coupling(system.uc.ir_enable, system.ir.enable_in)
+    system.add_coupling(system.uc.ir_read, system.ir.enable_out)
+    system.add_coupling(system.ir.data_out, system.uc.ir_in)
+    system.add_coupling(system.uc.reg_enable_out, system.reg_bank.reg_enable_out)
+    system.add_coupling(system.uc.reg_enable_in, system.reg_bank.reg_enable_in)
+    
+    system.add_coupling(system.uc.ip_load, system.mbr.enable_out)
+    system.add_coupling(system.uc.ip_load, system.ip.enable_in)
+    system.add_coupling(system.uc.mar_load, system.mbr.enable_out)
+    system.add_coupling(system.uc.mar_load, system.mar.enable_in)
+    system.add_coupling(system.uc.mbr_out, system.mbr.enable_out)
+    system.add_coupling(system.uc.mem_write, system.mbr.enable_out)
+    system.add_coupling(system.uc.mem_write, wr)
+    system.add_coupling(system.mbr.data_out, system.ip.data_in)
+    system.add_coupling(system.mbr.data_out, system.mar.data_in)
+    system.add_coupling(system.mbr.data_out, data_in)
+    system.add_coupling(system.mbr.data_out, system.reg_bank.data_in)
+    system.add_coupling(system.reg_bank.data_out, system.mbr.data_in)
+    
+    system.add_coupling(system.uc.alu_op, system.alu.op)
+    system.add_coupling(system.reg_bank.data_out, system.alu.data_in)
+    system.add_coupling(system.alu.data_out, system.reg_bank.data_in)
+    system.add_coupling(system.alu.flags_out, system.uc.flags_in)
 
 
 class VonSim8System(Coupled):
-    """Modelo acoplado que integra todos los componentes del simulador VonSim8."""
+    """Modelo acoplado que integra todos los componentes del simulador VonSim8.
     
-    def __init__(self, name: str = "VonSim8"):
+    Con ``cache`` (unificada, o de instrucciones si también se da ``dcache``) se intercala un modelo
+    ``Cache`` en el camino MAR → MEM → MBR.
+    """
+    
+    def __init__(self, name: str = "VonSim8", address_bits: int = 8,
+                 cycle_costs: Mapping[str, int] | None = None, pipelined: bool = False,
+                 cache: CacheConfig | None = None, dcache: CacheConfig | None = None):
         super().__init__(name)
         
-        self.ip = InstructionPointer("IP")
-        self.mar = MemoryAddressRegister("MAR")
-        self.mem = Memory("MEM")
+        self.mem = Memory("MEM", address_bits)
+        self.ip = InstructionPointer("IP", self.mem.address_mask)
+        self.mar = MemoryAddressRegister("MAR", self.mem.address_mask)
         self.mbr = SimpleRegister("MBR", 0x00)
         self.ir = SimpleRegister("IR", 0x00)
-        self.uc = ControlUnit("UC")
+        self.uc = ControlUnit("UC", cycle_costs, pipelined)
+        self.alu = ALU("ALU")
         self.reg_bank = RegisterBank("REG_BANK")
+        self.cache = Cache("CACHE", self.mem, cache, dcache) if cache is not None or dcache is not None else None
         
         self.devs_events = 0
         
@@ -602,82 +1718,1481 @@ class VonSim8System(Coupled):
         self.add_component(self.mbr)
         self.add_component(self.ir)
         self.add_component(self.uc)
+        self.add_component(self.alu)
         self.add_component(self.reg_bank)
+        if self.cache is not None:
+            self.add_component(self.cache)
+        
+        memory_in = self.mem if self.cache is None else self.cache
+        _couple_datapath(self, memory_in.addr, memory_in.rw, memory_in.wr, memory_in.data_in,
+                         memory_in.data_out)
+        
+        if self.cache is not None:
+            self.add_coupling(self.uc.mem_data, self.cache.data_access)
+            self.add_coupling(self.cache.wait, self.uc.mem_wait)
+            self.add_coupling(self.cache.mem_addr, self.mem.addr)
+            self.add_coupling(self.cache.mem_rw, self.mem.rw)
+            self.add_coupling(self.cache.mem_wr, self.mem.wr)
+            self.add_coupling(self.cache.mem_data_out, self.mem.data_in)
+            self.add_coupling(self.mem.data_out, self.cache.mem_data)
+    
+    def map_device(self, device: Atomic, base: int):
+        """Añade un periférico y le asigna ``[base, base + device.size)`` del espacio de direcciones.
+        
+        El periférico recibe por ``device.request`` las peticiones ``(offset, valor)`` de la memoria y
+        contesta las lecturas por ``device.response``. Debe hacerse antes de crear el coordinador.
+        """
+        port = self.mem.map_device(device.name, base, device.size)
+        self.add_component(device)
+        self.add_coupling(port, device.request)
+        self.add_coupling(device.response, self.mem.io_response)
+    
+    def connect_interrupt(self, port: Port):
+        """Acopla una línea de interrupción (bool, por nivel) a la UC: con ella activa, HLT no detiene la
+        UC y una UC detenida se despierta y continúa en la instrucción siguiente."""
+        self.add_coupling(port, self.uc.intr)
+        self.uc.wake_on_interrupt = True
+    
+    def snapshot(self, coordinator: Coordinator | None = None,
+                 base: "SystemSnapshot | None" = None) -> "SystemSnapshot":
+        """Instantánea del estado de todos los modelos atómicos, de la memoria y, si se indica, del coordinador.
+        
+        Con ``base`` las páginas de memoria sin cambios se comparten con esa instantánea anterior.
+        """
+        models = tuple((model.phase, model.sigma, tuple(getattr(model, field) for field in model.state_fields))
+                       for model in _atomic_models(self))
+        times = ()
+        clock = 0.0
+        if coordinator is not None:
+            times = tuple((processor.time_last, processor.time_next) for processor in _processors(coordinator))
+            clock = coordinator.clock.time
+        pages = self.mem.snapshot_pages(base.pages if base is not None else None)
+        return SystemSnapshot(self.mem.address_bits, models, clock, times, pages)
+    
+    def restore(self, snapshot: "SystemSnapshot", coordinator: Coordinator | None = None):
+        """Restaura una instantánea en este sistema (y en ``coordinator`` ya inicializado, si se indica)."""
+        if snapshot.address_bits != self.mem.address_bits:
+            raise ValueError(f"Instantánea de {snapshot.address_bits} bits, memoria de {self.mem.address_bits} bits")
+        for model, (phase, sigma, values) in zip(_atomic_models(self), snapshot.models, strict=True):
+            model.phase = phase
+            model.sigma = sigma
+            for field, value in zip(model.state_fields, values):
+                setattr(model, field, value)
+        self.mem.restore_pages(snapshot.pages)
+        if coordinator is not None:
+            for processor, (time_last, time_next) in zip(_processors(coordinator), snapshot.times, strict=True):
+                processor.time_last = time_last
+                processor.time_next = time_next
+            coordinator.clock.time = snapshot.clock
+
+
+class CPUCore(Coupled):
+    """Procesador VonSim8 sin memoria (IP, MAR, MBR, IR, UC, ALU y banco de registros) para sistemas
+    multinúcleo.
+    
+    El lado de memoria sale por ``mem_addr``/``mem_rw``/``mem_wr``/``mem_data_out`` y entra por
+    ``mem_data_in``; ``mem_wait`` lleva a la UC los estados de espera del bus compartido.
+    """
+    
+    def __init__(self, name: str = "CORE", address_mask: int = 0xFF,
+                 cycle_costs: Mapping[str, int] | None = None, pipelined: bool = False):
+        super().__init__(name)
         
-        self.add_coupling(self.uc.ip_read, self.ip.read_request)
-        self.add_coupling(self.ip.addr_out, self.mar.addr_in)
-        self.add_coupling(self.mar.addr_out, self.mem.addr)
-        self.add_coupling(self.uc.mem_read, self.mem.rw)
-        self.add_coupling(self.uc.ip_inc, self.ip.ip_write)
-        self.add_coupling(self.mem.data_out, self.mbr.data_in)
-        self.add_coupling(self.uc.mbr_enable, self.mbr.enable_in)
-        self.add_coupling(self.mbr.data_out, self.ir.data_in)
-        self.add_coupling(self.uc.ir_enable, self.mbr.enable_out)
-        self.add_coupling(self.uc.ir_enable, self.ir.enable_in)
-        self.add_coupling(self.uc.ir_read, self.ir.enable_out)
-        self.add_coupling(self.ir.data_out, self.uc.ir_in)
-        self.add_coupling(self.uc.reg_enable_out, self.reg_bank.reg_enable_out)
-        self.add_coupling(self.uc.reg_enable_in, self.reg_bank.reg_enable_in)
+        self.ip = InstructionPointer("IP", address_mask)
+        self.mar = MemoryAddressRegister("MAR", address_mask)
+        self.mbr = SimpleRegister("MBR", 0x00)
+        self.ir = SimpleRegister("IR", 0x00)
+        self.uc = ControlUnit("UC", cycle_costs, pipelined)
+        self.alu = ALU("ALU")
+        self.reg_bank = RegisterBank("REG_BANK")
+        for component in (self.ip, self.mar, self.mbr, self.ir, self.uc, self.alu, self.reg_bank):
+            self.add_component(component)
+        
+        self.mem_addr = Port(int, name="mem_addr")
+        self.add_out_port(self.mem_addr)
+        self.mem_rw = Port(bool, name="mem_rw")
+        self.add_out_port(self.mem_rw)
+        self.mem_wr = Port(bool, name="mem_wr")
+        self.add_out_port(self.mem_wr)
+        self.mem_data_out = Port(int, name="mem_data_out")
+        self.add_out_port(self.mem_data_out)
+        self.mem_data_in = Port(int, name="mem_data_in")
+        self.add_in_port(self.mem_data_in)
+        self.mem_wait = Port(int, name="mem_wait")
+        self.add_in_port(self.mem_wait)
+        
+        _couple_datapath(self, self.mem_addr, self.mem_rw, self.mem_wr, self.mem_data_out, self.mem_data_in)
+        self.add_coupling(self.mem_wait, self.uc.mem_wait)
+
+
+def _atomic_models(model: Component) -> Iterator[Atomic]:
+    if isinstance(model, Coupled):
+        for component in model.components:
+            yield from _atomic_models(component)
+    else:
+        yield model
+
+
+def _processors(coordinator: Coordinator) -> Iterator:
+    yield coordinator
+    for processor in coordinator.processors:
+        if isinstance(processor, Coordinator):
+            yield from _processors(processor)
+        else:
+            yield processor
+
+
+class SystemSnapshot(NamedTuple):
+    """Estado completo de un ``VonSim8System``: modelos atómicos, tiempos del coordinador y páginas de memoria."""
+    address_bits: int
+    models: tuple
+    clock: float
+    times: tuple
+    pages: tuple[bytes, ...]
+    
+    def to_bytes(self) -> bytes:
+        """Forma binaria compacta (pickle comprimido) para guardar en disco."""
+        return zlib.compress(pickle.dumps(tuple(self), protocol=pickle.HIGHEST_PROTOCOL), 1)
+    
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "SystemSnapshot":
+        """Reconstruye una instantánea de ``to_bytes`` (solo de ficheros de confianza: usa pickle)."""
+        return cls(*pickle.loads(zlib.decompress(data)))
 
 
 class CPUSystem(Coupled):
     """Wrapper para compatibilidad."""
-    def __init__(self, name: str = "CPUEnvironment"):
+    def __init__(self, name: str = "CPUEnvironment", address_bits: int = 8,
+                 cycle_costs: Mapping[str, int] | None = None, pipelined: bool = False,
+                 cache: CacheConfig | None = None, dcache: CacheConfig | None = None):
         super().__init__(name)
-        self.vonsim8 = VonSim8System("VonSim8")
+        self.vonsim8 = VonSim8System("VonSim8", address_bits, cycle_costs, pipelined, cache, dcache)
         self.add_component(self.vonsim8)
 
 
-if __name__ == "__main__":
-    import time
+CLONE_REF, CLONE_CONTAINER, CLONE_COPY, CLONE_RESET = range(4)
+_PORT_ATTRIBUTES = frozenset(("input", "output", "in_ports", "out_ports", "ic", "eic", "eoc"))
+
+
+class _Ref(int):
+    """Posición de un modelo o puerto en la tabla de objetos de una ``SystemTemplate``."""
+    __slots__ = ()
+
+
+def _slot_names(cls: type) -> tuple[str, ...]:
+    return tuple(name for klass in cls.__mro__ for name in getattr(klass, "__slots__", ()))
+
+
+def _recipe(value, index: dict[int, int]):
+    """Copia de ``value`` con los modelos y puertos sustituidos por su ``_Ref``; ``None`` si no contiene ninguno."""
+    position = index.get(id(value))
+    if position is not None:
+        return _Ref(position)
+    if isinstance(value, (dict, list, tuple)) and not hasattr(value, "_fields"):
+        items = list(value.items()) if isinstance(value, dict) else list(enumerate(value))
+        recipes = [_recipe(item, index) for _, item in items]
+        if all(recipe is None for recipe in recipes):
+            return None
+        rebuilt = [(key, item if recipe is None else recipe) for (key, item), recipe in zip(items, recipes)]
+        if isinstance(value, dict):
+            return dict(rebuilt)
+        return type(value)(item for _, item in rebuilt)
+    return None
+
+
+def _rebuild(recipe, objects: list):
+    if type(recipe) is _Ref:
+        return objects[recipe]
+    if isinstance(recipe, dict):
+        return {key: _rebuild(item, objects) for key, item in recipe.items()}
+    if isinstance(recipe, (list, tuple)):
+        return type(recipe)(_rebuild(item, objects) for item in recipe)
+    return recipe
+
+
+class SystemTemplate:
+    """Prototipo de ``VonSim8System`` construido y validado una vez y clonado para cada ejecución.
     
-    class EventCountingCoordinator(Coordinator):
-        def __init__(self, model):
-            super().__init__(model)
-            self.event_count = 0
-            
-        def _inject_event_counter(self, model):
-            """Inyecta contador en deltint y deltext de todos los modelos atómicos."""
-            if hasattr(model, 'deltint'):
-                original_deltint = model.deltint
-                def counted_deltint():
-                    self.event_count += 1
-                    return original_deltint()
-                model.deltint = counted_deltint
+    Al crear la plantilla el prototipo se aplana (los modelos de REG_BANK pasan al nivel superior y su
+    coordinador desaparece) y sus acoplamientos se guardan en ``routes`` como pares de índices de puerto
+    origen → destino. ``instantiate`` crea los modelos sin ejecutar sus ``__init__``, con puertos nuevos y
+    los acoplamientos rellenados desde esa tabla sin repetir las comprobaciones de ``add_coupling``.
+    Los valores inmutables y las tablas sin puertos se comparten; la memoria se copia y los objetos con
+    ``reset`` (cachés, cauce) se copian reiniciados. Las instantáneas solo son compatibles entre sistemas
+    de la misma plantilla.
+    """
+    
+    def __init__(self, address_bits: int = 8, cycle_costs: Mapping[str, int] | None = None,
+                 pipelined: bool = False, cache: CacheConfig | None = None, dcache: CacheConfig | None = None):
+        prototype = VonSim8System("VonSim8", address_bits, cycle_costs, pipelined, cache, dcache)
+        prototype.flatten()
+        self.prototype = prototype
+        components = (prototype,) + tuple(value for value in vars(prototype).values() if isinstance(value, Coupled))
+        components += tuple(prototype.components)
+        ports = tuple(port for component in components for port in component.in_ports + component.out_ports)
+        index = {id(value): position for position, value in enumerate(components + ports)}
+        self.routes = tuple((index[id(coupling.port_from)], index[id(coupling.port_to)])
+                            for couplings in prototype.ic.values() for coupling in couplings.values())
+        self.specs = tuple(self._spec(component, index) for component in components)
+    
+    @staticmethod
+    def _spec(component: Component, index: dict[int, int]) -> tuple:
+        slots = _slot_names(type(component))
+        values = [(name, value, False) for name, value in vars(component).items()]
+        values += [(name, getattr(component, name), True) for name in slots if hasattr(component, name)]
+        shared, slot_values, special = {}, [], []
+        for name, value, slot in values:
+            if name in _PORT_ATTRIBUTES:
+                continue
+            recipe = _recipe(value, index)
+            if recipe is not None:
+                kind = CLONE_REF if type(recipe) is _Ref else CLONE_CONTAINER
+                special.append((name, kind, recipe))
+            elif isinstance(value, bytearray):
+                special.append((name, CLONE_COPY, value))
+            elif not isinstance(value, type) and callable(getattr(value, "reset", None)):
+                special.append((name, CLONE_RESET, value))
+            elif slot:
+                slot_values.append((name, value))
+            else:
+                shared[name] = value
+        ports = tuple((port.name, port.p_type, port.serve) for port in component.in_ports)
+        ports = (ports, tuple((port.name, port.p_type, port.serve) for port in component.out_ports))
+        return type(component), shared, tuple(slot_values), tuple(special), ports, isinstance(component, Coupled)
+    
+    def instantiate(self, name: str = "VonSim8") -> VonSim8System:
+        """Devuelve un ``VonSim8System`` nuevo, equivalente a construirlo y aplanarlo."""
+        new = object.__new__
+        objects = [new(spec[0]) for spec in self.specs]
+        for clone, (_, shared, _, _, (in_specs, out_specs), coupled) in zip(objects, self.specs):
+            attributes = clone.__dict__
+            attributes.update(shared)
+            for specs, ports_name, index_name in ((in_specs, "in_ports", "input"), (out_specs, "out_ports", "output")):
+                ports = []
+                for port_name, p_type, serve in specs:
+                    port = new(Port)
+                    port.name = port_name
+                    port.p_type = p_type
+                    port.serve = serve
+                    port.parent = clone
+                    port._values = deque()
+                    port._bag = []
+                    ports.append(port)
+                attributes[ports_name] = ports
+                attributes[index_name] = {port.name: port for port in ports}
+                objects += ports
+            if coupled:
+                attributes["ic"], attributes["eic"], attributes["eoc"] = {}, {}, {}
+        
+        fresh: dict[int, object] = {}
+        for clone, (_, _, slot_values, special, _, _) in zip(objects, self.specs):
+            for attribute, value in slot_values:
+                setattr(clone, attribute, value)
+            for attribute, kind, value in special:
+                if kind == CLONE_REF:
+                    value = objects[value]
+                elif kind == CLONE_CONTAINER:
+                    value = _rebuild(value, objects)
+                elif kind == CLONE_COPY:
+                    value = bytearray(value)
+                else:
+                    copied = fresh.get(id(value))
+                    if copied is None:
+                        copied = fresh[id(value)] = copy.copy(value)
+                        copied.reset()
+                    value = copied
+                setattr(clone, attribute, value)
+        
+        system = objects[0]
+        system.name = name
+        ic = system.ic
+        for source, target in self.routes:
+            port_from, port_to = objects[source], objects[target]
+            coupling = new(Coupling)
+            coupling.port_from = port_from
+            coupling.port_to = port_to
+            coupling.host = None
+            targets = ic.get(port_from)
+            if targets is None:
+                targets = ic[port_from] = {}
+            targets[port_to] = coupling
+        return system
+
+
+ENGINES = ("devs", "iss", "bbt", "check")
+
+ISS_MOV, ISS_ALU, ISS_LOAD, ISS_STORE, ISS_JUMP, ISS_HLT, ISS_NOP = range(7)
+
+
+def _instruction_costs(step_costs: tuple[int, ...] = MICROCODE_COSTS) -> tuple[int, tuple[int, ...]]:
+    """Precalcula, recorriendo la ROM, los ciclos FETCH comunes y los ciclos EXECUTE de cada opcode."""
+    fetch = sum(step_costs[:STEP_DECODE])
+    execute = []
+    for opcode in range(0x100):
+        cycles = step_costs[STEP_DECODE]
+        index = DISPATCH_TABLE[opcode]
+        while True:
+            step = MICROCODE_ROM[index]
+            cycles += step_costs[index]
+            if step.next_step in (0, NEXT_HALT):
+                break
+            index = step.next_step
+        execute.append(cycles)
+    return fetch, tuple(execute)
+
+
+def _build_iss_decoder() -> tuple[tuple, ...]:
+    """Tabla de decodificación del ISS: opcode → (tipo, dst, src, operación, máscara, valor)."""
+    decoder = []
+    for opcode in range(0x100):
+        instruction = INSTRUCTION_SET.get(opcode)
+        if instruction is None:
+            decoder.append((ISS_NOP, 0, 0, "", 0, 0))
+            continue
+        mnemonic = instruction["opcode"]
+        dst = (opcode >> 2) & 0x03
+        src = opcode & 0x03
+        if mnemonic == "MOV":
+            decoder.append((ISS_MOV, dst, src, "", 0, 0))
+        elif mnemonic in ("ADD", "SUB", "CMP"):
+            decoder.append((ISS_ALU, dst, src, mnemonic, 0, 0))
+        elif mnemonic == "LOAD":
+            decoder.append((ISS_LOAD, opcode - OP_LOAD, 0, "", 0, 0))
+        elif mnemonic == "STORE":
+            decoder.append((ISS_STORE, 0, opcode - OP_STORE, "", 0, 0))
+        elif opcode in JUMP_CONDITIONS:
+            _, cond_mask, cond_value = JUMP_CONDITIONS[opcode]
+            decoder.append((ISS_JUMP, 0, 0, "", cond_mask, cond_value))
+        else:
+            decoder.append((ISS_HLT, 0, 0, "", 0, 0))
+    return tuple(decoder)
+
+
+FETCH_COST, EXECUTE_COSTS = _instruction_costs()
+ISS_DECODER = _build_iss_decoder()
+
+PIPELINE_STAGES = ("IF", "ID", "EX")
+STALL_DATA = "data"
+STALL_CONTROL = "control"
+STALL_STRUCTURAL = "structural"
+JUMP_NONE, JUMP_ALWAYS, JUMP_CONDITIONAL = range(3)
+
+
+class StageTiming(NamedTuple):
+    """Ciclos de un opcode en cada etapa del cauce y los recursos que usa."""
+    fetch: int
+    decode: int
+    execute: int
+    reads: int
+    writes: int
+    memory: bool
+    jump: int
+
+
+def _pipeline_timings(step_costs: tuple[int, ...] = MICROCODE_COSTS) -> tuple[StageTiming, ...]:
+    """Reparte los micro-pasos de cada opcode entre IF (FETCH y lectura del operando), ID (decodificación)
+    y EX (el resto), con los registros que lee y escribe."""
+    fetch = sum(step_costs[:STEP_DECODE])
+    decode = step_costs[STEP_DECODE]
+    timings = []
+    for opcode in range(0x100):
+        steps = []
+        index = DISPATCH_TABLE[opcode]
+        while True:
+            steps.append(index)
+            if MICROCODE_ROM[index].next_step in (0, NEXT_HALT):
+                break
+            index = MICROCODE_ROM[index].next_step
+        kind, dst, src, operation, cond_mask, _ = ISS_DECODER[opcode]
+        operand = len(OPERAND_SEQUENCE) if kind in (ISS_LOAD, ISS_STORE, ISS_JUMP) else 0
+        reads = writes = 0
+        if kind == ISS_MOV:
+            reads, writes = 1 << src, 1 << dst
+        elif kind == ISS_ALU:
+            reads = 1 << dst | 1 << src
+            writes = 0 if operation == "CMP" else 1 << dst
+        elif kind == ISS_LOAD:
+            writes = 1 << dst
+        elif kind == ISS_STORE:
+            reads = 1 << src
+        jump = JUMP_NONE if kind != ISS_JUMP else JUMP_CONDITIONAL if cond_mask else JUMP_ALWAYS
+        timings.append(StageTiming(fetch + sum(step_costs[i] for i in steps[:operand]), decode,
+                                   sum(step_costs[i] for i in steps[operand:]), reads, writes,
+                                   kind in (ISS_LOAD, ISS_STORE), jump))
+    return tuple(timings)
+
+
+class PipelineModel:
+    """Temporización de un cauce IF/ID/EX en orden, sin adelantamiento, sobre los costes de la ROM.
+    
+    La UC sigue recorriendo los micro-pasos uno tras otro (el camino de datos no cambia); este modelo
+    solo calcula cuándo terminaría cada instrucción si la búsqueda de la siguiente se solapara con la
+    ejecución de la actual. Riesgos modelados:
+    
+    - datos: ID espera a que EX escriba un registro que la instrucción lee;
+    - control: los saltos se predicen no tomados; JMP redirige IF al final de ID y un salto
+      condicional tomado al final de EX, descartando lo buscado;
+    - estructural: LOAD/STORE ocupan la memoria en EX y IF no puede solaparse con ellos.
+    """
+    
+    def __init__(self, step_costs: tuple[int, ...] = MICROCODE_COSTS):
+        self.timings = _pipeline_timings(step_costs)
+        self.reset()
+    
+    def reset(self):
+        self.instructions = 0
+        self.cycles = 0
+        self.flushes = 0
+        self.stalls = {STALL_DATA: 0, STALL_CONTROL: 0, STALL_STRUCTURAL: 0}
+        self.busy = [0, 0, 0]
+        self.fetch_free = 0
+        self.decode_free = 0
+        self.execute_free = 0
+        self.last_writes = 0
+        self.redirect: int | None = None
+        self.memory_windows: tuple[tuple[int, int], ...] = ()
+    
+    def state(self) -> tuple:
+        return (self.instructions, self.cycles, self.flushes, tuple(self.stalls.values()), tuple(self.busy),
+                self.fetch_free, self.decode_free, self.execute_free, self.last_writes, self.redirect,
+                self.memory_windows)
+    
+    def restore(self, state: tuple):
+        (self.instructions, self.cycles, self.flushes, stalls, busy, self.fetch_free, self.decode_free,
+         self.execute_free, self.last_writes, self.redirect, self.memory_windows) = state
+        self.stalls = dict(zip(self.stalls, stalls))
+        self.busy = list(busy)
+    
+    def issue(self, opcode: int, taken: bool, fetch_wait: int = 0, execute_wait: int = 0) -> int:
+        """Incorpora la siguiente instrucción (``taken``: si el salto se tomó) y devuelve el ciclo en que termina.
+        
+        ``fetch_wait`` y ``execute_wait`` son estados de espera de la caché que alargan IF y EX.
+        """
+        timing = self.timings[opcode]
+        stalls = self.stalls
+        fetch = timing.fetch + fetch_wait
+        execute = timing.execute + execute_wait
+        
+        start_if = self.fetch_free
+        if self.redirect is not None and self.redirect > start_if:
+            stalls[STALL_CONTROL] += self.redirect - start_if
+            self.flushes += 1
+            start_if = self.redirect
+        for begin, end in self.memory_windows:
+            if start_if < end and start_if + fetch > begin:
+                stalls[STALL_STRUCTURAL] += end - start_if
+                start_if = end
+        end_if = start_if + fetch
+        
+        start_id = max(end_if, self.decode_free)
+        if timing.reads & self.last_writes and self.execute_free > start_id:
+            stalls[STALL_DATA] += self.execute_free - start_id
+            start_id = self.execute_free
+        end_id = start_id + timing.decode
+        start_ex = max(end_id, self.execute_free)
+        end_ex = start_ex + execute
+        
+        if timing.memory:
+            self.memory_windows = self.memory_windows[-1:] + ((start_ex, end_ex),)
+        if timing.jump == JUMP_ALWAYS:
+            self.redirect = end_id
+        elif timing.jump == JUMP_CONDITIONAL and taken:
+            self.redirect = end_ex
+        else:
+            self.redirect = None
+        self.fetch_free = start_id
+        self.decode_free = start_ex
+        self.execute_free = end_ex
+        self.last_writes = timing.writes
+        self.busy[0] += fetch
+        self.busy[1] += timing.decode
+        self.busy[2] += execute
+        self.instructions += 1
+        self.cycles = end_ex
+        return end_ex
+    
+    @property
+    def cpi(self) -> float:
+        return self.cycles / self.instructions if self.instructions else 0.0
+    
+    @property
+    def occupancy(self) -> dict[str, float]:
+        """Fracción de ciclos en que cada etapa está ocupada."""
+        return {stage: busy / self.cycles if self.cycles else 0.0 for stage, busy in zip(PIPELINE_STAGES, self.busy)}
+    
+    def report(self) -> list[str]:
+        lines = [f"CPI efectivo: {self.cpi:.2f} ({self.cycles} ciclos, {self.instructions} instrucciones)",
+                 "Ciclos de parada: " + ", ".join(f"{cause} {cycles}" for cause, cycles in self.stalls.items())
+                 + f" ({self.flushes} vaciados)",
+                 "Ocupación: " + ", ".join(f"{stage} {fraction:.0%}" for stage, fraction in self.occupancy.items())]
+        return lines
+
+
+STOP_HALT = "halt"
+STOP_BREAKPOINT = "breakpoint"
+STOP_MEMORY = "watch_memory"
+STOP_REGISTER = "watch_register"
+STOP_CYCLES = "cycles"
+STOP_WALL_TIME = "wall_time"
+STOP_INSTRUCTIONS = "instructions"
+STOP_DIVERGENCE = "divergence"
+
+WALL_TIME_CHECK_INTERVAL = 1024
+
+
+class StopConditions:
+    """Condiciones de parada (breakpoints de IP, watchpoints, presupuestos de ciclos y de tiempo).
+    
+    ``compile`` las convierte en tablas indexadas por dirección y arma solo los modelos vigilados, de
+    modo que cada comprobación es una consulta O(1) y los modelos sin vigilancia solo evalúan
+    ``self.stop is not None``. Los watchpoints saltan cuando una escritura cambia el valor; los
+    breakpoints detienen la ejecución antes de la instrucción (salvo la primera al reanudar).
+    """
+    
+    def __init__(self, breakpoints: Iterable[int] = (), memory_watch: Iterable[int] = (),
+                 register_watch: Iterable[str] = (), max_cycles: int | None = None,
+                 max_wall_time: float | None = None):
+        self.breakpoint_addresses = tuple(breakpoints)
+        self.memory_addresses = tuple(memory_watch)
+        self.register_names = tuple(name.upper() for name in register_watch)
+        self.max_cycles = max_cycles
+        self.max_wall_time = max_wall_time
+        self.breakpoints = bytearray()
+        self.memory_watch = bytearray()
+        self.register_watch = (False,) * len(REGISTER_NAMES)
+        self.deadline: float | None = None
+        self.reason: str | None = None
+        self.detail: object = None
+        self._armed: list[Atomic] = []
+    
+    def compile(self, system: "VonSim8System"):
+        """Precalcula las tablas para ``system``, arma sus modelos y pone en marcha el reloj de pared."""
+        self.disarm()
+        size = system.mem.size
+        self.breakpoints = bytearray(size)
+        for address in self.breakpoint_addresses:
+            self.breakpoints[address & system.mem.address_mask] = 1
+        self.memory_watch = bytearray(size)
+        for address in self.memory_addresses:
+            self.memory_watch[address & system.mem.address_mask] = 1
+        for name in self.register_names:
+            if name not in REGISTER_NAMES:
+                raise ValueError(f"Registro desconocido: {name}")
+        self.register_watch = tuple(name in self.register_names for name in REGISTER_NAMES)
+        
+        if self.memory_addresses:
+            self._armed.append(system.mem)
+        self._armed.extend(getattr(system.reg_bank, name.lower()) for name in self.register_names)
+        for model in self._armed:
+            model.stop = self
+        
+        self.reason = None
+        self.detail = None
+        self.deadline = perf_counter() + self.max_wall_time if self.max_wall_time is not None else None
+    
+    def disarm(self):
+        for model in self._armed:
+            model.stop = None
+        self._armed.clear()
+    
+    def trigger(self, reason: str, detail: object = None):
+        if self.reason is None:
+            self.reason = reason
+            self.detail = detail
+    
+    def budget_exceeded(self, total_cycles: int) -> bool:
+        """Comprueba los presupuestos de ciclos y de tiempo; registra el motivo si se agotó alguno."""
+        if self.max_cycles is not None and total_cycles >= self.max_cycles:
+            self.trigger(STOP_CYCLES, total_cycles)
+        elif self.deadline is not None and perf_counter() >= self.deadline:
+            self.trigger(STOP_WALL_TIME, self.max_wall_time)
+        return self.reason is not None
+    
+    def safe_instructions(self, total_cycles: int, max_instruction_cycles: int) -> int:
+        """Instrucciones que pueden ejecutarse sin comprobar presupuestos sin saltarse ninguno."""
+        count = WALL_TIME_CHECK_INTERVAL if self.deadline is not None else 1 << 62
+        if self.max_cycles is not None:
+            count = min(count, max(1, (self.max_cycles - total_cycles) // max_instruction_cycles))
+        return count
+
+
+class FunctionalSimulator:
+    """Simulador funcional (ISS) que ejecuta instrucción a instrucción sobre el estado de VonSim8System.
+    
+    No pasa por el coordinador DEVS: lee y escribe directamente IP, ``Memory.storage``, los registros
+    del banco y los flags de la ALU, y acumula los mismos contadores de ciclos que ``ControlUnit``.
+    """
+    
+    def __init__(self, system: VonSim8System):
+        self.system = system
+        self.registers = [getattr(system.reg_bank, name.lower()) for name in REGISTER_NAMES]
+        if system.uc.step_costs is MICROCODE_COSTS:
+            self.fetch_cost, self.execute_costs = FETCH_COST, EXECUTE_COSTS
+        else:
+            self.fetch_cost, self.execute_costs = _instruction_costs(system.uc.step_costs)
+        self.max_instruction_cycles = self.fetch_cost + max(self.execute_costs)
+        self.no_breakpoints = bytearray(system.mem.size)
+        cache = system.cache
+        self.icache = cache.icache if cache is not None else None
+        self.dcache = cache.dcache if cache is not None else None
+        if cache is not None:
+            # Peor caso: búsqueda del opcode, del operando y acceso al dato fallan y expulsan una línea sucia.
+            self.max_instruction_cycles += 3 * max(config.miss_latency + config.writeback_latency - 1
+                                                   for config in cache.configs if config is not None)
+    
+    def initialize(self):
+        uc = self.system.uc
+        if uc.pipeline is not None:
+            uc.pipeline.reset()
+        if self.system.cache is not None:
+            for model in self.system.cache.models:
+                model.reset()
+        self.system.mem.initialize()
+        uc.flags = self.system.alu.flags
+        uc.halted = False
+        uc.instruction_count = 0
+        uc.total_cycles = 0
+        uc.fetch_cycles = 0
+        uc.execute_cycles = 0
+    
+    @property
+    def halted(self) -> bool:
+        return self.system.uc.halted
+    
+    def step(self) -> bool:
+        """Ejecuta una instrucción. Devuelve False si la UC ya estaba detenida."""
+        return self.run(1) == 1
+    
+    def run(self, max_instructions: int | None = 100_000, stop: StopConditions | None = None) -> int:
+        """Ejecuta hasta HLT, ``max_instructions`` instrucciones o una condición de ``stop`` (ya compilada).
+        
+        Devuelve cuántas instrucciones se ejecutaron.
+        """
+        system = self.system
+        uc = system.uc
+        if uc.halted:
+            return 0
+        if max_instructions is None:
+            max_instructions = 1 << 62
+        
+        storage = system.mem.storage
+        address_mask = system.mem.address_mask
+        registers = self.registers
+        regs = [reg.value for reg in registers]
+        ip = system.ip.value
+        flags = system.alu.flags
+        opcode = uc.instruction_code
+        decoder = ISS_DECODER
+        execute_costs = self.execute_costs
+        fetch_cost = self.fetch_cost
+        execute_cycles = 0
+        halted = False
+        executed = 0
+        pipeline = uc.pipeline
+        taken = False
+        icache, dcache = self.icache, self.dcache
+        cached = self.system.cache is not None
+        fetch_wait = execute_wait = fetch_waits = 0
+        if stop is None:
+            breakpoints, memory_watch, register_watch = self.no_breakpoints, None, None
+        else:
+            breakpoints = stop.breakpoints
+            memory_watch = stop.memory_watch if stop.memory_addresses else None
+            register_watch = stop.register_watch if stop.register_names else None
+        
+        while True:
+            limit = max_instructions
+            if stop is not None:
+                cycles = self._cycles(executed, execute_cycles, fetch_waits)
+                limit = min(limit, executed + stop.safe_instructions(cycles, self.max_instruction_cycles))
             
-            if hasattr(model, 'deltext'):
-                original_deltext = model.deltext
-                def counted_deltext(e):
-                    self.event_count += 1
-                    return original_deltext(e)
-                model.deltext = counted_deltext
+            while executed < limit:
+                if breakpoints[ip] and executed:
+                    stop.trigger(STOP_BREAKPOINT, ip)
+                    break
+                opcode = storage[ip]
+                if icache is not None:
+                    fetch_wait = icache.access(ip) - 1
+                    fetch_waits += fetch_wait
+                ip = (ip + 1) & address_mask
+                execute_cycles += execute_costs[opcode]
+                executed += 1
+                kind, dst, src, operation, cond_mask, cond_value = decoder[opcode]
+                if cached and ISS_LOAD <= kind <= ISS_JUMP:
+                    execute_wait = icache.access(ip) - 1 if icache is not None else 0
+                    if kind != ISS_JUMP and dcache is not None:
+                        execute_wait += dcache.access(storage[ip], kind == ISS_STORE) - 1
+                    execute_cycles += execute_wait
+                
+                if kind == ISS_MOV:
+                    value = regs[src]
+                    if register_watch is not None and register_watch[dst] and regs[dst] != value:
+                        stop.trigger(STOP_REGISTER, REGISTER_NAMES[dst])
+                    regs[dst] = value
+                elif kind == ISS_ALU:
+                    result, flags = alu_compute(operation, regs[dst], regs[src])
+                    if operation != "CMP":
+                        if register_watch is not None and register_watch[dst] and regs[dst] != result:
+                            stop.trigger(STOP_REGISTER, REGISTER_NAMES[dst])
+                        regs[dst] = result
+                elif kind == ISS_LOAD:
+                    addr_val = storage[ip]
+                    ip = (ip + 1) & address_mask
+                    value = storage[addr_val]
+                    if register_watch is not None and register_watch[dst] and regs[dst] != value:
+                        stop.trigger(STOP_REGISTER, REGISTER_NAMES[dst])
+                    regs[dst] = value
+                elif kind == ISS_STORE:
+                    addr_val = storage[ip]
+                    ip = (ip + 1) & address_mask
+                    if memory_watch is not None and memory_watch[addr_val] and storage[addr_val] != regs[src]:
+                        stop.trigger(STOP_MEMORY, addr_val)
+                    storage[addr_val] = regs[src]
+                elif kind == ISS_JUMP:
+                    addr_val = storage[ip]
+                    ip = (ip + 1) & address_mask
+                    taken = (flags & cond_mask) == cond_value
+                    if taken:
+                        ip = addr_val
+                elif kind == ISS_HLT:
+                    halted = True
+                if pipeline is not None:
+                    pipeline.issue(opcode, taken, fetch_wait, execute_wait)
+                    execute_wait = 0
+                if halted:
+                    break
+                if stop is not None and stop.reason is not None:
+                    break
             
-            if hasattr(model, 'components'):
-                for comp in model.components:
-                    self._inject_event_counter(comp)
+            if halted or executed >= max_instructions or stop is None or stop.reason is not None:
+                break
+            if stop.budget_exceeded(self._cycles(executed, execute_cycles, fetch_waits)):
+                break
         
-        def initialize(self):
-            """Override para inyectar contadores antes de inicializar."""
-            self._inject_event_counter(self.model)
-            super().initialize()
+        self._commit(regs, ip, opcode, flags, halted, executed, execute_cycles, fetch_waits)
+        return executed
+    
+    def _cycles(self, executed: int, execute_cycles: int, fetch_waits: int = 0) -> int:
+        """Ciclos totales de la UC con ``executed`` instrucciones de ``run`` aún sin volcar."""
+        uc = self.system.uc
+        if uc.pipeline is not None:
+            return uc.pipeline.cycles
+        return uc.total_cycles + self.fetch_cost * executed + fetch_waits + execute_cycles
+    
+    def _commit(self, regs: list[int], ip: int, opcode: int, flags: int, halted: bool, executed: int,
+                execute_cycles: int, fetch_waits: int = 0):
+        """Vuelca el estado local de ``run`` en los modelos y acumula los contadores de la UC."""
+        system = self.system
+        uc = system.uc
+        for reg, value in zip(self.registers, regs):
+            reg.value = value
+        system.ip.value = ip
+        system.ir.value = opcode
+        system.alu.flags = flags
+        uc.flags = flags
+        uc.instruction_code = opcode
+        uc.halted = halted
+        uc.instruction_count += executed
+        uc.fetch_cycles += self.fetch_cost * executed + fetch_waits
+        uc.execute_cycles += execute_cycles
+        uc.total_cycles = self._cycles(executed, execute_cycles, fetch_waits)
+
+
+BLOCK_CACHE_SIZE = 256
+BLOCK_MAX_INSTRUCTIONS = 64
+
+
+class TranslatedBlock(NamedTuple):
+    """Bloque básico traducido a una función Python.
+    
+    ``function(r, m, f)`` recibe registros, memoria y flags y devuelve ``(ip, n, flags, halted)``, con
+    ``n`` las instrucciones ejecutadas; ``execute_prefix[n]`` son sus ciclos EXECUTE y ``starts[:n]``
+    sus direcciones.
+    """
+    start: int
+    starts: tuple[int, ...]
+    addresses: tuple[int, ...]
+    span: frozenset[int]
+    code: bytes
+    opcodes: tuple[int, ...]
+    execute_prefix: tuple[int, ...]
+    function: Callable
+
+
+class BlockTranslator(FunctionalSimulator):
+    """ISS que traduce bloques básicos a funciones Python compiladas, cacheadas por dirección de inicio.
+    
+    Un bloque termina en un salto, en HLT o tras ``BLOCK_MAX_INSTRUCTIONS`` instrucciones. La caché es
+    LRU de ``cache_size`` bloques y ``cover[addr]`` cuenta los bloques que incluyen cada byte: un STORE
+    sobre código traducido invalida esos bloques y cierra el bloque en curso tras esa instrucción. Los
+    ciclos son los mismos que en ``FunctionalSimulator``. Con ``stop``, con la UC segmentada, con caché,
+    con ``max_instructions=1`` o cuando un bloque no cabe en el límite de instrucciones, se ejecuta
+    instrucción a instrucción sin traducir.
+    """
+    
+    def __init__(self, system: VonSim8System, cache_size: int = BLOCK_CACHE_SIZE):
+        super().__init__(system)
+        self.cache_size = cache_size
+        self.blocks: OrderedDict[int, TranslatedBlock] = OrderedDict()
+        self.cover = [0] * system.mem.size
+        self.namespace = {"cover": self.cover, "invalidate": self.invalidate}
+        self.translations = 0
+        self.invalidations = 0
+        self.evictions = 0
+    
+    def translate(self, start: int) -> TranslatedBlock:
+        """Traduce el bloque que empieza en ``start`` y lo inserta en la caché."""
+        storage = self.system.mem.storage
+        address_mask = self.system.mem.address_mask
+        lines = ["def block(r, m, f):"]
+        starts = []
+        addresses = []
+        opcodes = []
+        execute_prefix = [0]
+        ip = start
+        while True:
+            opcode = storage[ip]
+            starts.append(ip)
+            addresses.append(ip)
+            ip = (ip + 1) & address_mask
+            opcodes.append(opcode)
+            execute_prefix.append(execute_prefix[-1] + self.execute_costs[opcode])
+            count = len(opcodes)
+            kind, dst, src, operation, cond_mask, cond_value = ISS_DECODER[opcode]
+            if kind in (ISS_LOAD, ISS_STORE, ISS_JUMP):
+                operand = storage[ip]
+                addresses.append(ip)
+                ip = (ip + 1) & address_mask
+            
+            if kind == ISS_MOV:
+                lines.append(f"    r[{dst}] = r[{src}]")
+            elif kind == ISS_ALU:
+                lines.append(f"    a = r[{dst}]; b = r[{src}]")
+                if operation == "ADD":
+                    lines.append("    t = a + b; v = t & 0xFF; o = ~(a ^ b) & (a ^ v) & 0x80")
+                else:
+                    lines.append("    t = a - b; v = t & 0xFF; o = (a ^ b) & (a ^ v) & 0x80")
+                lines.append(f"    f = (v == 0) * {FLAG_Z} | (t != v) * {FLAG_C} | (v & 0x80 != 0) * {FLAG_S}"
+                             f" | (o != 0) * {FLAG_O}")
+                if operation != "CMP":
+                    lines.append(f"    r[{dst}] = v")
+            elif kind == ISS_LOAD:
+                lines.append(f"    r[{dst}] = m[{operand}]")
+            elif kind == ISS_STORE:
+                lines.append(f"    m[{operand}] = r[{src}]")
+                lines.append(f"    if cover[{operand}]:")
+                lines.append(f"        invalidate({operand})")
+                lines.append(f"        return {ip}, {count}, f, False")
+            elif kind == ISS_JUMP:
+                if cond_mask:
+                    lines.append(f"    if (f & {cond_mask}) == {cond_value}:")
+                    lines.append(f"        return {operand}, {count}, f, False")
+                    lines.append(f"    return {ip}, {count}, f, False")
+                else:
+                    lines.append(f"    return {operand}, {count}, f, False")
+                break
+            elif kind == ISS_HLT:
+                lines.append(f"    return {ip}, {count}, f, True")
+                break
+            if count == BLOCK_MAX_INSTRUCTIONS:
+                lines.append(f"    return {ip}, {count}, f, False")
+                break
+        
+        namespace = dict(self.namespace)
+        exec(compile("\n".join(lines), f"<bloque 0x{start:02X}>", "exec"), namespace)
+        block = TranslatedBlock(start, tuple(starts), tuple(addresses), frozenset(addresses),
+                                bytes(storage[address] for address in addresses), tuple(opcodes),
+                                tuple(execute_prefix), namespace["block"])
+        
+        if len(self.blocks) >= self.cache_size:
+            self._drop(next(iter(self.blocks)))
+            self.evictions += 1
+        self.blocks[start] = block
+        for address in block.span:
+            self.cover[address] += 1
+        self.translations += 1
+        return block
+    
+    def _drop(self, start: int):
+        for address in self.blocks.pop(start).span:
+            self.cover[address] -= 1
+    
+    def invalidate(self, address: int):
+        """Descarta los bloques que incluyen ``address`` (código auto-modificable)."""
+        for start in [start for start, block in self.blocks.items() if address in block.span]:
+            self._drop(start)
+        self.invalidations += 1
+    
+    def revalidate(self):
+        """Descarta los bloques cuyo código cambió fuera del traductor (motor DEVS, ``load_image``...)."""
+        storage = self.system.mem.storage
+        stale = [start for start, block in self.blocks.items()
+                 if bytes(storage[address] for address in block.addresses) != block.code]
+        for start in stale:
+            self._drop(start)
+    
+    @property
+    def translates(self) -> bool:
+        """Si ``run_blocks`` puede ejecutar bloques (sin UC segmentada ni caché)."""
+        return self.system.uc.pipeline is None and self.system.cache is None
+    
+    def run(self, max_instructions: int | None = 100_000, stop: StopConditions | None = None) -> int:
+        if stop is not None or not self.translates or max_instructions == 1:
+            return super().run(max_instructions, stop)
+        if self.system.uc.halted:
+            return 0
+        limit = max_instructions if max_instructions is not None else 1 << 62
+        executed = self.run_blocks(limit)
+        if not self.system.uc.halted and executed < limit:
+            executed += super().run(limit - executed)
+        return executed
+    
+    def run_blocks(self, limit: int, profiler=None) -> int:
+        """Ejecuta bloques completos mientras quepan en ``limit`` instrucciones y hasta HLT.
+        
+        El resto (un bloque que no cabe) queda para quien llama. Con ``profiler`` (un ``GuestProfiler``)
+        cada bloque se le entrega entero con ``record_block``.
+        """
+        system = self.system
+        uc = system.uc
+        if uc.halted:
+            return 0
+        self.revalidate()
+        
+        storage = system.mem.storage
+        blocks = self.blocks
+        regs = [reg.value for reg in self.registers]
+        ip = system.ip.value
+        flags = system.alu.flags
+        opcode = uc.instruction_code
+        execute_cycles = 0
+        executed = 0
+        halted = False
+        while executed < limit:
+            block = blocks.get(ip)
+            if block is None:
+                block = self.translate(ip)
+            else:
+                blocks.move_to_end(ip)
+            if len(block.opcodes) > limit - executed:
+                break
+            ip, count, flags, halted = block.function(regs, storage, flags)
+            executed += count
+            execute_cycles += block.execute_prefix[count]
+            opcode = block.opcodes[count - 1]
+            if profiler is not None:
+                profiler.record_block(block, count, self.fetch_cost, ip)
+            if halted:
+                break
+        
+        self._commit(regs, ip, opcode, flags, halted, executed, execute_cycles)
+        return executed
+
+
+class Divergence(NamedTuple):
+    """Primera diferencia encontrada al ejecutar DEVS e ISS en paralelo."""
+    instruction: int
+    address: int
+    field: str
+    devs: object
+    iss: object
+
+
+class RunSummary(NamedTuple):
+    """Resultado de una ejecución con cualquiera de los motores."""
+    engine: str
+    instructions: int
+    total_cycles: int
+    fetch_cycles: int
+    execute_cycles: int
+    coordinator: Coordinator | None = None
+    divergence: Divergence | None = None
+    stop_reason: str | None = None
+
+
+def architectural_state(system: VonSim8System) -> dict[str, object]:
+    """Estado arquitectónico comparable entre motores (registros, memoria y contadores de ciclos)."""
+    uc = system.uc
+    state = {"IP": system.ip.value, "FLAGS": system.alu.flags}
+    for name in REGISTER_NAMES:
+        state[name] = getattr(system.reg_bank, name.lower()).value
+    state["MEM"] = system.mem.dump()
+    state["halted"] = uc.halted
+    state["total_cycles"] = uc.total_cycles
+    state["fetch_cycles"] = uc.fetch_cycles
+    state["execute_cycles"] = uc.execute_cycles
+    return state
+
+
+def copy_architectural_state(source: VonSim8System, target: VonSim8System):
+    """Copia IP, registros, flags y memoria de un sistema a otro."""
+    target.ip.value = source.ip.value
+    target.alu.flags = source.alu.flags
+    for name in REGISTER_NAMES:
+        getattr(target.reg_bank, name.lower()).value = getattr(source.reg_bank, name.lower()).value
+    target.mem.load_image(source.mem.dump())
+
+
+def step_devs_instruction(coord: Coordinator, uc: ControlUnit) -> bool:
+    """Avanza el coordinador hasta completar una instrucción y asentar sus eventos de tiempo cero.
+    
+    Si la UC espera una interrupción en HLT, cada iteración del coordinador salta directamente al
+    siguiente evento programado de los periféricos, sin pasar por los ciclos intermedios.
+    """
+    if uc.halted and uc.wake_on_interrupt:
+        while uc.halted and coord.time_next != INFINITY:
+            coord.simulate(num_iters=1)
+    if uc.halted or coord.time_next == INFINITY:
+        return False
+    started = uc.instruction_count
+    while True:
+        coord.simulate(num_iters=1)
+        if uc.halted or (uc.instruction_count > started and uc.micro_step == 0):
+            break
+    while coord.time_next == coord.time_last:
+        coord.simulate(num_iters=1)
+    return True
+
+
+HISTOGRAM_BUCKETS = 48
+
+
+class ComponentStats:
+    """Contadores de un modelo atómico: transiciones, λ, mensajes por puerto y tiempo de reloj.
+    
+    ``histogram[i]`` cuenta las transiciones cuya duración en ns tiene ``i`` bits (cubetas log2).
+    """
+    
+    def __init__(self, name: str, histograms: bool = False):
+        self.name = name
+        self.deltint = 0
+        self.deltext = 0
+        self.deltcon = 0
+        self.lambdas = 0
+        self.messages: dict[str, int] = {}
+        self.wall_time = 0.0
+        self.histogram = array("Q", [0]) * HISTOGRAM_BUCKETS if histograms else None
+    
+    @property
+    def transitions(self) -> int:
+        """δ_int + δ_ext; una transición confluente cuenta en ambos, como en xDEVS (deltint + deltext(0))."""
+        return self.deltint + self.deltext
+
+
+class PhaseStats:
+    """Transiciones internas y tiempo de reloj de la UC en una fase del microcódigo."""
+    
+    def __init__(self):
+        self.transitions = 0
+        self.cycles = 0
+        self.wall_time = 0.0
+
+
+class Instrumentation:
+    """Contadores por componente recogidos por ``InstrumentedCoordinator``.
+    
+    Se elige al construir el coordinador: con ``Coordinator`` no hay ningún coste por transición.
+    ``histograms`` añade histogramas de tiempo de reloj por componente y ``phases`` el desglose por
+    fase de la ``ControlUnit``.
+    """
+    
+    def __init__(self, histograms: bool = False, phases: bool = True):
+        self.histograms = histograms
+        self.phases = phases
+        self.components: dict[str, ComponentStats] = {}
+        self.uc_phases: dict[str, PhaseStats] = {}
+    
+    def component(self, name: str) -> ComponentStats:
+        stats = self.components.get(name)
+        if stats is None:
+            stats = self.components[name] = ComponentStats(name, self.histograms)
+        return stats
+    
+    @property
+    def transitions(self) -> int:
+        return sum(stats.transitions for stats in self.components.values())
+    
+    @property
+    def messages(self) -> int:
+        return sum(sum(stats.messages.values()) for stats in self.components.values())
+    
+    def report(self) -> list[str]:
+        """Tabla de texto con los contadores por componente y, si procede, por fase de la UC."""
+        lines = [f"{'Componente':<10} {'δ_int':>8} {'δ_ext':>8} {'δ_con':>8} {'λ':>8} {'mensajes':>9} {'µs':>10}"]
+        for stats in self.components.values():
+            lines.append(f"{stats.name:<10} {stats.deltint:>8} {stats.deltext:>8} {stats.deltcon:>8} "
+                         f"{stats.lambdas:>8} {sum(stats.messages.values()):>9} {stats.wall_time * 1e6:>10.1f}")
+        if self.uc_phases:
+            lines.append("")
+            lines.append(f"{'Fase UC':<10} {'δ_int':>8} {'ciclos':>8} {'µs':>10}")
+            for phase, stats in self.uc_phases.items():
+                lines.append(f"{phase:<10} {stats.transitions:>8} {stats.cycles:>8} {stats.wall_time * 1e6:>10.1f}")
+        return lines
+
+
+class InstrumentedSimulator(Simulator):
+    """``Simulator`` de xDEVS que actualiza un ``ComponentStats`` en cada δ y λ."""
+    
+    def __init__(self, model: Atomic, clock, instrumentation: Instrumentation, **mappings):
+        super().__init__(model, clock, **mappings)
+        self.stats = instrumentation.component(model.name)
+        self.uc_phases = instrumentation.uc_phases if instrumentation.phases and isinstance(model, ControlUnit) else None
+    
+    def deltfcn(self):
+        model = self.model
+        stats = self.stats
+        internal = self.clock.time == self.time_next
+        if not model.in_empty():
+            if internal:
+                stats.deltcon += 1
+                stats.deltint += 1
+            stats.deltext += 1
+        elif internal:
+            stats.deltint += 1
+        else:
+            return None
+        
+        step = model.micro_step if self.uc_phases is not None else 0
+        start = perf_counter()
+        result = super().deltfcn()
+        elapsed = perf_counter() - start
+        stats.wall_time += elapsed
+        if stats.histogram is not None:
+            stats.histogram[min(int(elapsed * 1e9).bit_length(), HISTOGRAM_BUCKETS - 1)] += 1
+        if self.uc_phases is not None and internal:
+            phase = model.rom[step].phase
+            phase_stats = self.uc_phases.get(phase)
+            if phase_stats is None:
+                phase_stats = self.uc_phases[phase] = PhaseStats()
+            phase_stats.transitions += 1
+            phase_stats.cycles += model.step_costs[step]
+            phase_stats.wall_time += elapsed
+        return result
+    
+    def lambdaf(self):
+        if self.clock.time == self.time_next:
+            self.model.lambdaf()
+            stats = self.stats
+            stats.lambdas += 1
+            messages = stats.messages
+            for port in self.model.used_out_ports:
+                messages[port.name] = messages.get(port.name, 0) + len(port)
+
+
+class InstrumentedCoordinator(Coordinator):
+    """Coordinador que sustituye los simuladores de los modelos atómicos por ``InstrumentedSimulator``."""
+    
+    def __init__(self, model: Coupled, clock=None, instrumentation: Instrumentation | None = None, **kwargs):
+        super().__init__(model, clock, **kwargs)
+        self.instrumentation = instrumentation if instrumentation is not None else Instrumentation()
+    
+    def _build_hierarchy(self):
+        super()._build_hierarchy()
+        mappings = {"event_transducers_mapping": self.event_transducers_mapping,
+                    "state_transducers_mapping": self.state_transducers_mapping}
+        self.coordinators = [InstrumentedCoordinator(coord.model, self.clock, self.instrumentation, **mappings)
+                             for coord in self.coordinators]
+        self.simulators = [InstrumentedSimulator(sim.model, self.clock, self.instrumentation, **mappings)
+                           for sim in self.simulators]
+
+
+def _shares_hooks(simulator: Simulator) -> bool:
+    model = simulator.model
+    return (getattr(model, "trace", None) is not None or getattr(model, "stop", None) is not None
+            or getattr(model, "watch", None) is not None or "lambdaf" in getattr(model, "__dict__", ()) or simulator.state_transducers is not None)
+
+
+def _run_partition(function: Callable, processors: list):
+    for processor in processors:
+        function(processor)
+
+
+class ParallelCoordinator(Coordinator):
+    """Coordinador que ejecuta en un pool de hilos las λ y δ de los modelos atómicos inminentes a la vez.
+    
+    Los simuladores inminentes de cada iteración se reparten en ``workers`` particiones contiguas. Cada
+    modelo atómico solo lee y escribe su estado y sus puertos, y la propagación por los acoplamientos se
+    hace después y en el orden de ``Coordinator``, así que los resultados coinciden exactamente con los
+    secuenciales. Con menos de ``min_parallel`` inminentes la iteración es secuencial. Los modelos que
+    comparten objetos (``trace``/``stop`` armados, λ envuelta por ``PortTraceWriter`` o transductores,
+    según estén al inicializar) y los coordinadores anidados se ejecutan siempre en el hilo del
+    coordinador, en su orden. ``executor`` permite compartir un pool entre coordinadores.
+    """
+    
+    def __init__(self, model: Coupled, clock=None, workers: int = 4, min_parallel: int = 8, executor=None,
+                 **kwargs):
+        super().__init__(model, clock, **kwargs)
+        self.workers = workers
+        self.min_parallel = min_parallel
+        self.owns_executor = executor is None
+        self.executor = executor if executor is not None else ThreadPoolExecutor(workers)
+        self.free: frozenset = frozenset()
+        self.parallel_steps = 0
+    
+    def _build_hierarchy(self):
+        super()._build_hierarchy()
+        mappings = {"event_transducers_mapping": self.event_transducers_mapping,
+                    "state_transducers_mapping": self.state_transducers_mapping}
+        self.coordinators = [ParallelCoordinator(coord.model, self.clock, self.workers, self.min_parallel,
+                                                 self.executor, **mappings)
+                             for coord in self.coordinators]
+    
+    def initialize(self):
+        super().initialize()
+        self.free = frozenset(simulator for simulator in self.simulators if not _shares_hooks(simulator))
+    
+    def _parallel(self, function: Callable, processors: list) -> list:
+        """Ejecuta ``function`` sobre los simuladores libres de ``processors`` en el pool y devuelve el resto."""
+        free = [processor for processor in processors if processor in self.free]
+        if len(free) < self.min_parallel:
+            return processors
+        size = -(-len(free) // self.workers)
+        futures = [self.executor.submit(_run_partition, function, free[start:start + size])
+                   for start in range(0, len(free), size)]
+        for future in futures:
+            future.result()
+        self.parallel_steps += 1
+        return [processor for processor in processors if processor not in self.free]
+    
+    def lambdaf(self):
+        now = self.clock.time
+        imminent = [processor for processor in self.processors if processor.time_next == now]
+        for processor in self._parallel(Simulator.lambdaf, imminent):
+            processor.lambdaf()
+        for processor in imminent:
+            self.propagate_output(processor.model)
+    
+    def deltfcn(self):
+        self.propagate_input()
+        for processor in self._parallel(Simulator.deltfcn, list(self.imminent_processors)):
+            processor.deltfcn()
+        self.trigger_event_transducers()
+        self.time_last = self.clock.time
+        self.time_next = self.time_last + self.ta()
+    
+    def exit(self):
+        super().exit()
+        if self.owns_executor:
+            self.executor.shutdown()
+
+
+def _vonsim8(env: Coupled) -> VonSim8System:
+    return env.vonsim8 if isinstance(env, CPUSystem) else env
+
+
+def _devs_should_stop(system: VonSim8System, stop: StopConditions | None, executed: int) -> bool:
+    """Comprueba ``stop`` antes de cada instrucción. Tras un HLT (salvo si la UC espera una interrupción)
+    no se comprueba nada más, así que el motivo de parada queda en ``halt`` sin ``detail``."""
+    if stop is None:
+        return False
+    if system.uc.halted and not system.uc.wake_on_interrupt:
+        return True
+    if stop.reason is not None or stop.budget_exceeded(system.uc.total_cycles):
+        return True
+    if executed and stop.breakpoints[system.ip.value]:
+        stop.trigger(STOP_BREAKPOINT, system.ip.value)
+        return True
+    return False
+
+
+def run_simulation(env: Coupled, engine: str = "devs", max_instructions: int | None = 100_000,
+                   coordinator_class: type[Coordinator] = Coordinator,
+                   tracer: Tracer | None = None,
+                   instrumentation: Instrumentation | None = None,
+                   stop: StopConditions | None = None,
+                   port_trace=None,
+                   profiler=None) -> RunSummary:
+    """Ejecuta ``env`` (CPUSystem o VonSim8System) hasta HLT con el motor elegido.
+    
+    - ``devs``: coordinador DEVS completo.
+    - ``iss``: simulador funcional, sin coordinador.
+    - ``bbt``: simulador funcional con traducción de bloques básicos (``BlockTranslator``).
+    - ``check``: ambos en lockstep, instrucción a instrucción, deteniéndose en la primera divergencia.
+    
+    ``tracer`` se conecta a los modelos del lado DEVS (el ISS no produce transiciones). Con
+    ``instrumentation`` el lado DEVS usa ``InstrumentedCoordinator`` en lugar de ``coordinator_class``.
+    ``port_trace`` (p. ej. un ``PortTraceWriter`` de ``vonsim8_trace``) se conecta igual que ``tracer``
+    para anotar cada mensaje de puerto; quien lo crea se encarga de cerrarlo. ``profiler`` (un
+    ``GuestProfiler`` de ``vonsim8_profile``) recibe la dirección de cada instrucción ejecutada; con él
+    ``iss`` avanza instrucción a instrucción y ``bbt`` le entrega cada bloque traducido entero.
+    
+    ``max_instructions=None`` ejecuta sin límite de instrucciones; ``stop`` añade breakpoints,
+    watchpoints y presupuestos de ciclos o de tiempo, y ``RunSummary.stop_reason`` indica cuál detuvo
+    la ejecución. Los breakpoints no se aplican a la primera instrucción, para poder reanudar.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Motor desconocido: {engine} (opciones: {', '.join(ENGINES)})")
+    system = _vonsim8(env)
+    if engine != "devs" and system.mem.io_map is not None:
+        raise ValueError(f"El motor {engine} no simula periféricos; usa el motor devs")
+    coord = None
+    divergence = None
+    limit = max_instructions if max_instructions is not None else 1 << 62
+    if stop is not None:
+        stop.compile(system)
+    
+    if engine in ("iss", "bbt"):
+        iss = BlockTranslator(system) if engine == "bbt" else FunctionalSimulator(system)
+        iss.initialize()
+        if profiler is None:
+            iss.run(max_instructions, stop)
+        else:
+            profiler.attach(system)
+            executed = 0
+            if engine == "bbt" and stop is None and iss.translates:
+                executed = iss.run_blocks(limit, profiler)
+            while executed < limit and not _devs_should_stop(system, stop, executed):
+                address = system.ip.value
+                if not iss.run(1, stop):
+                    break
+                profiler.record(address)
+                executed += 1
+    else:
+        if instrumentation is not None:
+            coord = InstrumentedCoordinator(env, instrumentation=instrumentation)
+        else:
+            coord = coordinator_class(env)
+        if tracer is not None:
+            tracer.attach(env, coord.clock)
+        if port_trace is not None:
+            port_trace.attach(env, coord.clock)
+        coord.initialize()
+        if profiler is not None:
+            profiler.attach(system)
+        if engine == "devs":
+            executed = 0
+            if profiler is None:
+                while (executed < limit and not _devs_should_stop(system, stop, executed)
+                       and step_devs_instruction(coord, system.uc)):
+                    executed += 1
+            else:
+                while executed < limit and not _devs_should_stop(system, stop, executed):
+                    address = system.ip.value
+                    if not step_devs_instruction(coord, system.uc):
+                        break
+                    profiler.record(address)
+                    executed += 1
+        else:
+            configs = system.cache.configs if system.cache is not None else (None, None)
+            reference = VonSim8System(system.name, system.mem.address_bits, pipelined=system.uc.pipeline is not None,
+                                      cache=configs[0], dcache=configs[1])
+            reference.uc.step_costs = system.uc.step_costs
+            if reference.uc.pipeline is not None:
+                reference.uc.pipeline = PipelineModel(system.uc.step_costs)
+            copy_architectural_state(system, reference)
+            iss = FunctionalSimulator(reference)
+            iss.initialize()
+            index = 0
+            while index < limit and not _devs_should_stop(system, stop, index):
+                address = system.ip.value
+                if not step_devs_instruction(coord, system.uc):
+                    break
+                if profiler is not None:
+                    profiler.record(address)
+                iss.step()
+                devs_state = architectural_state(system)
+                iss_state = architectural_state(reference)
+                for field, value in devs_state.items():
+                    if iss_state[field] != value:
+                        divergence = Divergence(index, address, field, value, iss_state[field])
+                        break
+                if divergence is not None:
+                    break
+                index += 1
+    
+    uc = system.uc
+    if stop is not None:
+        stop.disarm()
+    if uc.halted and (stop is None or stop.reason is None):
+        stop_reason = STOP_HALT
+    elif divergence is not None:
+        stop_reason = STOP_DIVERGENCE
+    elif stop is not None and stop.reason is not None:
+        stop_reason = stop.reason
+    else:
+        stop_reason = STOP_INSTRUCTIONS
+    return RunSummary(engine, uc.instruction_count, uc.total_cycles, uc.fetch_cycles, uc.execute_cycles,
+                      coord, divergence, stop_reason)
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+    
+    parser = argparse.ArgumentParser(description="Simulador DEVS VonSim8")
+    parser.add_argument("--engine", choices=ENGINES, default="devs",
+                        help="devs: coordinador DEVS; iss: simulador funcional; bbt: ISS con traducción de bloques; "
+                             "check: DEVS e ISS en lockstep")
+    parser.add_argument("--trace", choices=("off", "info", "debug"), default="debug",
+                        help="nivel de traza: off, info (micro-pasos de la UC) o debug (todas las transiciones)")
+    parser.add_argument("--trace-file", default=None, help="vuelca la traza a un fichero en lugar de la consola")
+    parser.add_argument("--port-trace", default=None, metavar="FICHERO",
+                        help="guarda cada mensaje de puerto en una traza binaria (ver vonsim8_trace.py)")
+    parser.add_argument("--profile", action="store_true",
+                        help="muestra los contadores por componente, por fase de la UC e histogramas de tiempo")
+    parser.add_argument("--break", dest="breakpoints", action="append", default=[], type=lambda v: int(v, 0),
+                        metavar="ADDR", help="detiene la ejecución al llegar a esta dirección (repetible)")
+    parser.add_argument("--watch-mem", action="append", default=[], type=lambda v: int(v, 0), metavar="ADDR",
+                        help="detiene la ejecución cuando cambia esta posición de memoria (repetible)")
+    parser.add_argument("--watch-reg", action="append", default=[], choices=REGISTER_NAMES, metavar="REG",
+                        help="detiene la ejecución cuando cambia este registro (repetible)")
+    parser.add_argument("--max-cycles", type=int, default=None, help="presupuesto de ciclos simulados")
+    parser.add_argument("--max-time", type=float, default=None, help="presupuesto de tiempo de reloj en segundos")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="UC segmentada: solapa FETCH y EXECUTE y muestra CPI, paradas y ocupación del cauce")
+    parser.add_argument("--cache", default=None, metavar="TAM:LÍNEA:VÍAS",
+                        help="intercala una caché unificada (p. ej. 64:4:2) entre MAR/MBR y la memoria")
+    parser.add_argument("--cache-policy", choices=CACHE_POLICIES, default="lru", help="política de reemplazo")
+    parser.add_argument("--cache-latency", default="1:10", metavar="ACIERTO:FALLO",
+                        help="latencias en ciclos de acierto y de fallo")
+    args = parser.parse_args()
     
     print("\n" + "═" * 80)
     print("║" + " " * 15 + "SIMULACIÓN DEVS - VONSIM8 (Von Neumann 8-bit)" + " " * 20 + "║")
     print("═" * 80)
-    print("  Instrucción: MOV AL, BL (opcode 0x01)")
+    print("  Programa:    MOV AL, BL (0x01) ; HLT (0xFF)")
     print("  Formalismo:  DEVS (Discrete Event System Specification)")
+    print(f"  Motor:       {args.engine}")
     print("═" * 80 + "\n")
     
     print("⏳ Ejecutando simulación...\n")
     
-    env = CPUSystem("VonSim8Environment")
-    coord = EventCountingCoordinator(env)
-    coord.initialize()
+    cache = None
+    if args.cache is not None:
+        size, line_size, ways = (int(value) for value in args.cache.split(":"))
+        hit_latency, miss_latency = (int(value) for value in args.cache_latency.split(":"))
+        cache = CacheConfig(size, line_size, ways, args.cache_policy, hit_latency, miss_latency)
+    env = CPUSystem("VonSim8Environment", pipelined=args.pipeline, cache=cache)
+    trace_level = {"off": TRACE_OFF, "info": TRACE_INFO, "debug": TRACE_DEBUG}[args.trace]
+    tracer = Tracer(level=trace_level) if trace_level != TRACE_OFF else None
+    instrumentation = Instrumentation(histograms=True, phases=True) if args.profile else None
+    
+    stop = None
+    if args.breakpoints or args.watch_mem or args.watch_reg or args.max_cycles is not None or args.max_time is not None:
+        stop = StopConditions(args.breakpoints, args.watch_mem, args.watch_reg, args.max_cycles, args.max_time)
+    
+    port_trace = None
+    if args.port_trace:
+        from vonsim8_trace import PortTraceWriter
+        port_trace = PortTraceWriter(args.port_trace)
     
     start_time = time.time()
-    coord.simulate(num_iters=30)
+    summary = run_simulation(env, args.engine, None, tracer=tracer, instrumentation=instrumentation, stop=stop,
+                             port_trace=port_trace)
+    coord = summary.coordinator
     simulation_time = time.time() - start_time
-    coord.exit()
+    if coord is not None:
+        coord.exit()
+    if port_trace is not None:
+        port_trace.close()
+        print(f"  Traza de puertos: {len(port_trace)} mensajes → {args.port_trace}\n")
+    
+    if tracer is not None:
+        if args.trace_file:
+            print(f"  Traza: {tracer.drain_to_file(args.trace_file)} registros → {args.trace_file}\n")
+        else:
+            tracer.drain(lambda record: print("  " + format_record(record)))
+            print()
     
     vonsim8 = env.vonsim8
     
@@ -686,7 +3201,7 @@ if __name__ == "__main__":
     print("═" * 60)
     
     print(f"\n  Registros:")
-    print(f"    IP:  0x00 → 0x{vonsim8.ip.value:02X}  ✓")
+    print(f"    IP:  0x00 → 0x{vonsim8.ip.value:02X}  {'✓ Detenida (HLT)' if vonsim8.uc.halted else '✗ Sin HLT'}")
     print(f"    AL:  0x01 → 0x{vonsim8.reg_bank.al.value:02X}  {'✓ Transferido' if vonsim8.reg_bank.al.value == 0x0A else '✗ Error'}")
     print(f"    BL:  0x0A → 0x{vonsim8.reg_bank.bl.value:02X}  ✓")
     
@@ -697,11 +3212,37 @@ if __name__ == "__main__":
         print("  ❌ ERROR en la transferencia")
     
     print(f"\n  Métricas:")
-    print(f"    • CPI:         {vonsim8.uc.total_cycles} ciclos (FETCH: {vonsim8.uc.fetch_cycles} + EXECUTE: {vonsim8.uc.execute_cycles})")
+    print(f"    • Ciclos:      {vonsim8.uc.total_cycles} (FETCH: {vonsim8.uc.fetch_cycles} + EXECUTE: {vonsim8.uc.execute_cycles})")
+    print(f"    • CPI:         {vonsim8.uc.total_cycles / max(vonsim8.uc.instruction_count, 1):.2f} ({vonsim8.uc.instruction_count} instrucciones)")
     print(f"    • Tiempo real: {simulation_time*1000:.2f} ms")
-    print(f"    • Eventos:     {coord.event_count} transiciones DEVS")
+    if coord is not None and instrumentation is not None:
+        print(f"    • Eventos:     {instrumentation.transitions} transiciones DEVS, {instrumentation.messages} mensajes")
+    if stop is not None and stop.reason is not None:
+        print(f"    • Parada:      {stop.reason} ({stop.detail})")
+    if vonsim8.uc.pipeline is not None:
+        print("    • Cauce:       " + "\n                   ".join(vonsim8.uc.pipeline.report()))
+    if vonsim8.cache is not None:
+        for model in vonsim8.cache.models:
+            print("    • Caché:       " + "\n                   ".join(model.report()))
+    if summary.engine == "check":
+        if summary.divergence is None:
+            print("    • Lockstep:    DEVS e ISS coinciden en todas las instrucciones  ✓")
+        else:
+            d = summary.divergence
+            print(f"    • Lockstep:    ✗ divergencia en instrucción #{d.instruction} (IP=0x{d.address:02X}), "
+                  f"{d.field}: DEVS={d.devs!r} ISS={d.iss!r}")
     print()
     
+    if coord is not None and instrumentation is not None:
+        print("  Instrumentación:")
+        for line in instrumentation.report():
+            print("    " + line)
+        print("\n  Histograma de δ por componente (cubetas log2 de ns):")
+        for stats in instrumentation.components.values():
+            buckets = " ".join(f"2^{bucket}:{count}" for bucket, count in enumerate(stats.histogram) if count)
+            print(f"    {stats.name:<10} {buckets}")
+        print()
+    
     print("═" * 80)
     print("  ✅ Simulación completada | Arquitectura Von Neumann validada")
     print("═" * 80 + "\n")
\ No newline at end of file
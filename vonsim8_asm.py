@@ -0,0 +1,430 @@
+"""Ensamblador de la ISA VonSim8 y cargador de programas en ``Memory``.
+
+Lee el fuente línea a línea (sin cargarlo entero), resuelve las referencias adelantadas con una tabla
+de parches al final y produce una imagen binaria más la tabla de símbolos. Las imágenes se guardan en
+una caché indexada por el hash del fuente.
+
+Sintaxis::
+
+    ; comentario
+    N       EQU 10              ; constante
+            .code               ; sección de código (por defecto, desde 0x00)
+    inicio: LOAD AL, [contador]
+            ADD AL, BL
+            STORE [contador], AL
+            CMP AL, CL
+            JNZ inicio
+            HLT
+            .data               ; sección de datos (a continuación del código salvo ORG)
+    contador: DB 0
+    tabla:    DB 1, 2, 0x03, 'A', "texto"
+    buffer:   DS N              ; reserva N bytes a cero
+
+``ORG dirección`` fija el contador de posiciones de la sección actual. Los números admiten decimal,
+``0x``/``h`` hexadecimal, ``0b`` binario y caracteres entre comillas simples; los operandos aceptan
+``símbolo ± constante``.
+"""
+import hashlib
+import os
+import re
+from collections import OrderedDict
+from typing import Iterable, NamedTuple
+
+from vonsim8 import INSTRUCTION_SET, REGISTER_NAMES, Memory
+
+ASSEMBLY_CACHE_SIZE = 128
+SECTIONS = (".code", ".data")
+
+ENCODINGS = {(entry["opcode"], entry["dst"], entry["src"]): (opcode, entry["size"])
+             for opcode, entry in INSTRUCTION_SET.items()}
+MNEMONICS = {entry["opcode"] for entry in INSTRUCTION_SET.values()}
+
+_LABEL = re.compile(r"^\s*([A-Za-z_.$][\w.$]*)\s*:")
+_EQU = re.compile(r"^\s*([A-Za-z_.$][\w.$]*)\s+EQU\s+(.+)$", re.IGNORECASE)
+_SYMBOL = re.compile(r"^[A-Za-z_.$][\w.$]*$")
+_TERM = re.compile(r"\s*([+-]?)\s*('(?:\\.|[^'])'|[^+\-\s]+)")
+
+
+class AssemblerError(ValueError):
+    """Error de ensamblado con el número de línea del fuente."""
+
+    def __init__(self, line_number: int, message: str):
+        super().__init__(f"línea {line_number}: {message}")
+        self.line_number = line_number
+
+
+class AssembledProgram(NamedTuple):
+    """Imagen binaria desde ``origin`` y tabla de símbolos (etiquetas y constantes)."""
+    image: bytes
+    origin: int
+    symbols: dict[str, int]
+    source_hash: str
+
+    def load(self, memory: Memory):
+        """Copia la imagen directamente en ``memory``."""
+        memory.load_image(self.image, self.origin)
+
+
+def _split_operands(text: str) -> list[str]:
+    operands, current, quote = [], [], ""
+    for char in text:
+        if quote:
+            current.append(char)
+            if char == quote:
+                quote = ""
+        elif char in "'\"":
+            quote = char
+            current.append(char)
+        elif char == ",":
+            operands.append("".join(current).strip())
+            current = []
+        else:
+            current.append(char)
+    if current or operands:
+        operands.append("".join(current).strip())
+    return operands
+
+
+def _strip_comment(line: str) -> str:
+    quote = ""
+    for index, char in enumerate(line):
+        if quote:
+            if char == quote:
+                quote = ""
+        elif char in "'\"":
+            quote = char
+        elif char == ";":
+            return line[:index]
+    return line
+
+
+def _unescape(text: str) -> bytes:
+    """Bytes de un literal de texto con escapes de Python; cada carácter debe ocupar un byte (Latin-1)."""
+    try:
+        raw = text.encode("latin-1")
+    except UnicodeEncodeError as error:
+        raise ValueError(f"carácter fuera de Latin-1 en {text!r}") from error
+    try:
+        return raw.decode("unicode_escape").encode("latin-1")
+    except UnicodeDecodeError as error:
+        raise ValueError(f"secuencia de escape no válida en {text!r}") from error
+    except UnicodeEncodeError as error:
+        raise ValueError(f"escape fuera de Latin-1 en {text!r}") from error
+
+
+def _parse_number(token: str) -> int | None:
+    lowered = token.lower()
+    try:
+        if lowered.startswith("0x"):
+            return int(lowered[2:], 16)
+        if lowered.startswith("0b"):
+            return int(lowered[2:], 2)
+        if lowered.endswith("h") and lowered[0].isdigit():
+            return int(lowered[:-1], 16)
+        if lowered.isdigit():
+            return int(lowered)
+    except ValueError:
+        return None
+    if len(token) >= 3 and token[0] == token[-1] == "'":
+        text = _unescape(token[1:-1])
+        if len(text) == 1:
+            return text[0]
+    return None
+
+
+class Assembler:
+    """Ensamblador de una pasada con parches para referencias adelantadas."""
+
+    def __init__(self, address_bits: int = 8):
+        self.size = 1 << address_bits
+        self.memory = bytearray(self.size)
+        self.used = bytearray(self.size)
+        self.symbols: dict[str, tuple[str | None, int]] = {}
+        self.counters = {section: 0 for section in SECTIONS}
+        self.origins: dict[str, int | None] = {".code": 0, ".data": None}
+        self.section = ".code"
+        self.emitted: dict[str, list[tuple[int, int]]] = {section: [] for section in SECTIONS}
+        self.fixups: list[tuple[str, int, str, int, int]] = []
+        self.line_number = 0
+
+    def error(self, message: str) -> AssemblerError:
+        return AssemblerError(self.line_number, message)
+
+    def feed(self, line: str):
+        """Procesa una línea del fuente."""
+        self.line_number += 1
+        line = _strip_comment(line).strip()
+        if not line:
+            return
+
+        equ = _EQU.match(line)
+        if equ:
+            self.define(equ.group(1), None, self.constant(equ.group(2)))
+            return
+
+        while (label := _LABEL.match(line)) is not None:
+            self.define(label.group(1), self.section, self.counters[self.section])
+            line = line[label.end():].strip()
+        if not line:
+            return
+
+        head, _, rest = line.replace("\t", " ").partition(" ")
+        keyword = head.upper()
+        operands = _split_operands(rest.strip())
+        if head.lower() in SECTIONS:
+            self.section = head.lower()
+        elif keyword == "ORG":
+            self.org(operands)
+        elif keyword == "DB":
+            self.data(operands)
+        elif keyword == "DS":
+            self.reserve(operands)
+        elif keyword in MNEMONICS:
+            self.instruction(keyword, operands)
+        else:
+            raise self.error(f"instrucción o directiva desconocida: {head}")
+
+    def define(self, name: str, section: str | None, value: int):
+        if name.upper() in REGISTER_NAMES or name.upper() in MNEMONICS:
+            raise self.error(f"nombre reservado: {name}")
+        if name in self.symbols:
+            raise self.error(f"símbolo duplicado: {name}")
+        self.symbols[name] = (section, value)
+
+    def constant(self, text: str) -> int:
+        """Expresión que debe poder evaluarse ya (EQU, ORG, DS)."""
+        symbol, addend = self.expression(text)
+        if symbol is None:
+            return addend
+        section, value = self.symbols.get(symbol, (None, None))
+        if value is None:
+            raise self.error(f"símbolo no definido todavía: {symbol}")
+        if section is not None:
+            raise self.error(f"se esperaba una constante y {symbol} es una etiqueta")
+        return value + addend
+
+    def expression(self, text: str) -> tuple[str | None, int]:
+        """``símbolo ± constantes`` → (símbolo o None, desplazamiento)."""
+        symbol, addend, position = None, 0, 0
+        text = text.strip()
+        if not text:
+            raise self.error("falta un operando")
+        while position < len(text):
+            term = _TERM.match(text, position)
+            if term is None:
+                raise self.error(f"expresión no válida: {text}")
+            sign, token = term.groups()
+            position = term.end()
+            try:
+                number = _parse_number(token)
+            except ValueError as error:
+                raise self.error(str(error)) from None
+            if number is not None:
+                addend += -number if sign == "-" else number
+            elif _SYMBOL.match(token) and symbol is None and sign != "-":
+                defined = self.symbols.get(token)
+                if defined is not None and defined[0] is None:
+                    addend += defined[1]
+                else:
+                    symbol = token
+            else:
+                raise self.error(f"expresión no válida: {text}")
+        return symbol, addend
+
+    def emit(self, value: int):
+        offset = self.counters[self.section]
+        self.emitted[self.section].append((offset, value & 0xFF))
+        self.counters[self.section] = offset + 1
+
+    def emit_operand(self, text: str):
+        symbol, addend = self.expression(text)
+        if symbol is None:
+            self.check_byte(addend, text)
+            self.emit(addend)
+        else:
+            self.fixups.append((self.section, self.counters[self.section], symbol, addend, self.line_number))
+            self.emit(0)
+
+    def check_byte(self, value: int, text: str):
+        if not -0x80 <= value <= 0xFF:
+            raise self.error(f"valor fuera de rango para un byte: {text} = {value}")
+
+    def org(self, operands: list[str]):
+        if len(operands) != 1:
+            raise self.error("ORG espera una dirección")
+        address = self.constant(operands[0])
+        if self.origins[self.section] is None or not self.emitted[self.section]:
+            self.origins[self.section] = address
+            self.counters[self.section] = 0
+        else:
+            self.counters[self.section] = address - self.origins[self.section]
+            if self.counters[self.section] < 0:
+                raise self.error(f"ORG 0x{address:X} anterior al origen de la sección")
+
+    def data(self, operands: list[str]):
+        if not operands:
+            raise self.error("DB espera al menos un valor")
+        for operand in operands:
+            if len(operand) >= 2 and operand[0] == operand[-1] == '"':
+                try:
+                    text = _unescape(operand[1:-1])
+                except ValueError as error:
+                    raise self.error(str(error)) from None
+                for byte in text:
+                    self.emit(byte)
+            else:
+                self.emit_operand(operand)
+
+    def reserve(self, operands: list[str]):
+        if len(operands) != 1:
+            raise self.error("DS espera un número de bytes")
+        count = self.constant(operands[0])
+        if count < 0:
+            raise self.error(f"DS espera un número de bytes no negativo: {operands[0]} = {count}")
+        for _ in range(count):
+            self.emit(0)
+
+    def instruction(self, mnemonic: str, operands: list[str]):
+        kinds, addresses = [], []
+        for operand in operands:
+            if operand.upper() in REGISTER_NAMES:
+                kinds.append(operand.upper())
+            elif operand.startswith("[") and operand.endswith("]"):
+                kinds.append("[addr]")
+                addresses.append(operand[1:-1])
+            else:
+                kinds.append("addr")
+                addresses.append(operand)
+        kinds += [""] * (2 - len(kinds))
+        encoding = ENCODINGS.get((mnemonic, kinds[0], kinds[1])) if len(operands) <= 2 else None
+        if encoding is None:
+            raise self.error(f"operandos no válidos para {mnemonic}: {', '.join(operands) or '(ninguno)'}")
+        opcode, size = encoding
+        self.emit(opcode)
+        for address in addresses[:size - 1]:
+            self.emit_operand(address)
+
+    def finish(self, source_hash: str = "") -> AssembledProgram:
+        """Coloca las secciones, aplica los parches y devuelve la imagen."""
+        code_origin = self.origins[".code"]
+        data_origin = self.origins[".data"]
+        if data_origin is None:
+            data_origin = code_origin + self.counters[".code"]
+        bases = {".code": code_origin, ".data": data_origin}
+
+        symbols = {name: value if section is None else bases[section] + value
+                   for name, (section, value) in self.symbols.items()}
+        lowest, highest = self.size, -1
+        for section, emitted in self.emitted.items():
+            for offset, value in emitted:
+                address = bases[section] + offset
+                if not 0 <= address < self.size:
+                    raise AssemblerError(self.line_number, f"la sección {section} se sale de la memoria (0x{address:X})")
+                if self.used[address]:
+                    raise AssemblerError(self.line_number, f"solapamiento en la dirección 0x{address:X}")
+                self.used[address] = 1
+                self.memory[address] = value
+                lowest, highest = min(lowest, address), max(highest, address)
+
+        for section, offset, symbol, addend, line_number in self.fixups:
+            if symbol not in symbols:
+                raise AssemblerError(line_number, f"símbolo no definido: {symbol}")
+            value = symbols[symbol] + addend
+            if not -0x80 <= value <= 0xFF:
+                raise AssemblerError(line_number, f"{symbol} = 0x{value:X} no cabe en un operando de 8 bits")
+            self.memory[bases[section] + offset] = value & 0xFF
+
+        if highest < 0:
+            return AssembledProgram(b"", 0, symbols, source_hash)
+        return AssembledProgram(bytes(self.memory[lowest:highest + 1]), lowest, symbols, source_hash)
+
+
+_cache: "OrderedDict[tuple[str, int], AssembledProgram]" = OrderedDict()
+
+
+def _cached(key: tuple[str, int]) -> AssembledProgram | None:
+    """Programa guardado para ``key``, con su propia copia de ``symbols`` (el de la caché no se comparte)."""
+    program = _cache.get(key)
+    if program is None:
+        return None
+    _cache.move_to_end(key)
+    return program._replace(symbols=dict(program.symbols))
+
+
+def _remember(key: tuple[str, int], program: AssembledProgram) -> AssembledProgram:
+    _cache[key] = program
+    if len(_cache) > ASSEMBLY_CACHE_SIZE:
+        _cache.popitem(last=False)
+    return program._replace(symbols=dict(program.symbols))
+
+
+def assemble_lines(lines: Iterable[str], address_bits: int = 8) -> AssembledProgram:
+    """Ensambla un iterable de líneas sin pasar por la caché."""
+    assembler = Assembler(address_bits)
+    for line in lines:
+        assembler.feed(line)
+    return assembler.finish()
+
+
+def assemble(source: str, address_bits: int = 8) -> AssembledProgram:
+    """Ensambla un fuente en memoria, reutilizando la imagen si el mismo fuente ya se ensambló."""
+    source_hash = hashlib.sha256(source.encode()).hexdigest()
+    key = (source_hash, address_bits)
+    program = _cached(key)
+    if program is None:
+        assembler = Assembler(address_bits)
+        for line in source.splitlines():
+            assembler.feed(line)
+        program = _remember(key, assembler.finish(source_hash))
+    return program
+
+
+def assemble_file(path: str | os.PathLike, address_bits: int = 8) -> AssembledProgram:
+    """Ensambla un fichero línea a línea; el hash se calcula por bloques antes de ensamblar."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as stream:
+        for block in iter(lambda: stream.read(1 << 16), b""):
+            digest.update(block)
+    key = (digest.hexdigest(), address_bits)
+    program = _cached(key)
+    if program is None:
+        assembler = Assembler(address_bits)
+        with open(path, encoding="utf-8") as stream:
+            for line in stream:
+                assembler.feed(line)
+        program = _remember(key, assembler.finish(key[0]))
+    return program
+
+
+def load_program(memory: Memory, source: str | os.PathLike) -> AssembledProgram:
+    """Ensambla ``source`` (ruta a un fichero ``.asm`` o texto fuente) y lo carga en ``memory``."""
+    if isinstance(source, os.PathLike) or (isinstance(source, str) and "\n" not in source
+                                           and os.path.isfile(source)):
+        program = assemble_file(source, memory.address_bits)
+    else:
+        program = assemble(source, memory.address_bits)
+    program.load(memory)
+    return program
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Ensamblador VonSim8")
+    parser.add_argument("source", help="fichero fuente .asm")
+    parser.add_argument("-o", "--output", default=None, help="imagen binaria de salida (raw, desde el origen)")
+    parser.add_argument("--address-bits", type=int, default=8, help="ancho de direcciones de la memoria destino")
+    parser.add_argument("--symbols", action="store_true", help="muestra la tabla de símbolos")
+    args = parser.parse_args()
+
+    try:
+        program = assemble_file(args.source, args.address_bits)
+    except AssemblerError as error:
+        parser.exit(1, f"{args.source}: {error}\n")
+    print(f"{args.source}: {len(program.image)} bytes desde 0x{program.origin:02X}")
+    if args.output:
+        with open(args.output, "wb") as stream:
+            stream.write(program.image)
+    if args.symbols:
+        for name, value in sorted(program.symbols.items(), key=lambda item: item[1]):
+            print(f"  0x{value:04X}  {name}")
@@ -0,0 +1,256 @@
+"""API asyncio para conducir la simulación DEVS en vivo desde un front-end interactivo.
+
+``AsyncSimulator`` ejecuta instrucción a instrucción sobre un ``Coordinator`` propio y cede el bucle de
+eventos entre instrucciones, así que una interfaz puede avanzar (``step``), ejecutar hasta una condición
+(``run_until``), pausar y reanudar sin hilos ni sondeo. Cada cambio de estado arquitectónico se publica
+en un flujo asíncrono acotado (``events``); si el consumidor se retrasa se descartan los eventos más
+antiguos y ``dropped`` los cuenta. El ritmo se fija con ``Pacing``: sin límite, N ciclos por segundo o
+una fracción del reloj nominal.
+
+Uso::
+
+    python vonsim8_async.py --hz 50 --instructions 20
+"""
+import asyncio
+import time
+from typing import AsyncIterator, Callable, NamedTuple
+
+from xdevs import INFINITY
+from xdevs.models import Coupled
+from xdevs.sim import Coordinator
+
+from vonsim8 import CPUSystem, REGISTER_NAMES, VonSim8System, step_devs_instruction
+
+PACING_MAX = "max"
+PACING_CYCLES = "cycles"
+
+EVENT_STEP = "step"
+EVENT_HALT = "halt"
+EVENT_STOP = "stop"
+EVENT_PAUSE = "pause"
+EVENT_RESUME = "resume"
+
+
+class Pacing(NamedTuple):
+    """Ritmo de la simulación: ``rate`` ciclos simulados por segundo de reloj (``PACING_MAX``: sin límite)."""
+    mode: str = PACING_MAX
+    rate: float = 0.0
+
+    @classmethod
+    def max_speed(cls) -> "Pacing":
+        return cls(PACING_MAX, 0.0)
+
+    @classmethod
+    def cycles_per_second(cls, cycles: float) -> "Pacing":
+        if cycles <= 0:
+            raise ValueError("El ritmo debe ser positivo")
+        return cls(PACING_CYCLES, float(cycles))
+
+    @classmethod
+    def wall_clock(cls, ratio: float = 1.0, clock_hz: float = 1_000_000) -> "Pacing":
+        """``ratio`` veces el tiempo real de una CPU a ``clock_hz`` (0.5: a mitad de velocidad)."""
+        return cls.cycles_per_second(ratio * clock_hz)
+
+
+class StateEvent(NamedTuple):
+    """Cambio de estado publicado por ``AsyncSimulator``.
+
+    ``changes`` lleva los registros, ``IP`` y ``FLAGS`` que cambiaron y ``memory`` las posiciones que
+    cambiaron al escribirse, ambos con su valor nuevo; los eventos de control (pausa, reanudación) los llevan vacíos.
+    """
+    kind: str
+    instruction: int
+    cycles: int
+    changes: dict[str, int]
+    memory: dict[int, int]
+
+
+def _registers(system: VonSim8System) -> dict[str, int]:
+    state = {"IP": system.ip.value, "FLAGS": system.alu.flags}
+    for name in REGISTER_NAMES:
+        state[name] = getattr(system.reg_bank, name.lower()).value
+    return state
+
+
+class AsyncSimulator:
+    """Conduce ``env`` (``CPUSystem`` o ``VonSim8System``) desde asyncio.
+
+    ``step`` ejecuta una instrucción aunque la simulación esté en pausa (paso a paso); ``run_until``
+    ejecuta hasta HLT, ``max_instructions``, ``max_cycles`` o hasta que ``condition(simulador)`` sea
+    cierta, esperando mientras esté en pausa. Cada instrucción se ejecuta con ``lock`` tomado, así que
+    nunca avanzan dos a la vez; ``run_until`` lo suelta entre instrucciones y mientras espera en pausa,
+    de modo que ``step`` avanza aunque haya un ``run_until`` pausado. Las escrituras en memoria se
+    recogen con ``Memory.watch`` a medida que ocurren, así que publicar un evento no depende del tamaño
+    de la memoria.
+    """
+
+    def __init__(self, env: Coupled, pacing: Pacing = Pacing(), max_events: int = 256,
+                 coordinator_class: type[Coordinator] = Coordinator):
+        self.env = env
+        self.system = env.vonsim8 if isinstance(env, CPUSystem) else env
+        self.pacing = pacing
+        self.coord = coordinator_class(env)
+        self.coord.initialize()
+        self.queue: asyncio.Queue[StateEvent | None] = asyncio.Queue(max_events)
+        self.dropped = 0
+        self.closed = False
+        self.running = asyncio.Event()
+        self.running.set()
+        self.lock = asyncio.Lock()
+        self.registers = _registers(self.system)
+        self.written: dict[int, int] = {}
+        self.system.mem.watch = self._watch
+        self._restart_pacing()
+
+    @property
+    def uc(self):
+        return self.system.uc
+
+    @property
+    def paused(self) -> bool:
+        return not self.running.is_set()
+
+    @property
+    def halted(self) -> bool:
+        return self.uc.halted or self.coord.time_next == INFINITY
+
+    def set_pacing(self, pacing: Pacing):
+        self.pacing = pacing
+        self._restart_pacing()
+
+    def _restart_pacing(self):
+        self.pace_wall = time.perf_counter()
+        self.pace_cycles = self.uc.total_cycles
+
+    def _watch(self, address: int, value: int):
+        self.written[address] = value
+
+    def _publish(self, event: StateEvent):
+        if self.closed:
+            return
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+    def _event(self, kind: str) -> StateEvent:
+        return StateEvent(kind, self.uc.instruction_count, self.uc.total_cycles, {}, {})
+
+    def _changes(self, kind: str) -> StateEvent:
+        registers = _registers(self.system)
+        changes = {name: value for name, value in registers.items() if self.registers[name] != value}
+        self.registers = registers
+        memory, self.written = self.written, {}
+        return StateEvent(kind, self.uc.instruction_count, self.uc.total_cycles, changes, memory)
+
+    async def _pace(self):
+        if self.pacing.mode == PACING_MAX:
+            await asyncio.sleep(0)
+            return
+        target = self.pace_wall + (self.uc.total_cycles - self.pace_cycles) / self.pacing.rate
+        await asyncio.sleep(max(0.0, target - time.perf_counter()))
+
+    def _step(self) -> StateEvent | None:
+        if not step_devs_instruction(self.coord, self.uc):
+            return None
+        event = self._changes(EVENT_HALT if self.uc.halted else EVENT_STEP)
+        self._publish(event)
+        return event
+
+    async def step(self) -> StateEvent | None:
+        """Ejecuta una instrucción y devuelve su evento (``None`` si la simulación ya terminó)."""
+        async with self.lock:
+            event = self._step()
+            if event is not None:
+                await self._pace()
+            self._restart_pacing()
+            return event
+
+    async def run_until(self, condition: Callable[["AsyncSimulator"], bool] | None = None,
+                        max_instructions: int | None = None, max_cycles: int | None = None) -> int:
+        """Ejecuta hasta HLT o hasta cumplirse una condición y devuelve las instrucciones ejecutadas."""
+        executed = 0
+        self._restart_pacing()
+        while max_instructions is None or executed < max_instructions:
+            if not self.running.is_set():
+                await self.running.wait()
+                self._restart_pacing()
+            async with self.lock:
+                if max_cycles is not None and self.uc.total_cycles >= max_cycles:
+                    break
+                event = self._step()
+            if event is None:
+                break
+            executed += 1
+            if event.kind == EVENT_HALT:
+                break
+            if condition is not None and condition(self):
+                self._publish(self._event(EVENT_STOP))
+                break
+            await self._pace()
+        return executed
+
+    def pause(self):
+        if self.running.is_set():
+            self.running.clear()
+            self._publish(self._event(EVENT_PAUSE))
+
+    def resume(self):
+        if not self.running.is_set():
+            self.running.set()
+            self._publish(self._event(EVENT_RESUME))
+
+    def close(self):
+        """Termina el flujo de ``events`` tras entregar los eventos pendientes."""
+        if not self.closed:
+            self.closed = True
+            self.running.set()
+            if not self.queue.full():
+                self.queue.put_nowait(None)
+
+    async def events(self) -> AsyncIterator[StateEvent]:
+        """Flujo de eventos hasta ``close``."""
+        while True:
+            if self.closed and self.queue.empty():
+                return
+            event = await self.queue.get()
+            if event is None:
+                return
+            yield event
+
+
+async def _demo(instructions: int, pacing: Pacing, image: bytes):
+    env = CPUSystem()
+    env.vonsim8.mem.load_image(image)
+    simulator = AsyncSimulator(env, pacing)
+
+    async def consume():
+        async for event in simulator.events():
+            changes = ", ".join(f"{name}={value:#04x}" for name, value in event.changes.items())
+            memory = ", ".join(f"[{address:#04x}]={value:#04x}" for address, value in event.memory.items())
+            print(f"{event.cycles:>6} {event.kind:<6} #{event.instruction:<4} {changes} {memory}".rstrip())
+
+    consumer = asyncio.create_task(consume())
+    await simulator.run_until(max_instructions=instructions // 2)
+    simulator.pause()
+    await simulator.step()
+    simulator.resume()
+    await simulator.run_until(max_instructions=instructions - instructions // 2 - 1)
+    simulator.close()
+    await consumer
+    if simulator.dropped:
+        print(f"{simulator.dropped} eventos descartados")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from vonsim8_bench import BENCHMARK_PROGRAM
+
+    parser = argparse.ArgumentParser(description="Demostración de la API asyncio de VonSim8")
+    parser.add_argument("--instructions", type=int, default=20, help="instrucciones a ejecutar")
+    parser.add_argument("--hz", type=float, default=None, help="ciclos simulados por segundo (por defecto, sin límite)")
+    args = parser.parse_args()
+
+    asyncio.run(_demo(args.instructions, Pacing.cycles_per_second(args.hz) if args.hz else Pacing.max_speed(),
+                      BENCHMARK_PROGRAM))
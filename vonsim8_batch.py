@@ -0,0 +1,153 @@
+"""Simulación por lotes de miles de instancias VonSim8 vectorizada con NumPy.
+
+Cada instancia (carril) ocupa una fila de los arrays de estado: IP, registros AL-DL, flags, memoria y
+contadores de ciclos. ``step`` ejecuta una instrucción en todos los carriles activos a la vez; los
+carriles con control de flujo divergente simplemente avanzan con su propio IP, y los que han
+ejecutado HLT quedan enmascarados.
+"""
+import numpy as np
+
+from vonsim8 import (EXECUTE_COSTS, FETCH_COST, FLAG_C, FLAG_O, FLAG_S, FLAG_Z, ISS_ALU, ISS_DECODER,
+                     ISS_HLT, ISS_JUMP, ISS_LOAD, ISS_MOV, ISS_STORE, REGISTER_NAMES, VonSim8System)
+
+ALU_ADD, ALU_SUB, ALU_CMP = 1, 2, 3
+
+DECODE_KIND = np.array([entry[0] for entry in ISS_DECODER], dtype=np.uint8)
+DECODE_DST = np.array([entry[1] for entry in ISS_DECODER], dtype=np.intp)
+DECODE_SRC = np.array([entry[2] for entry in ISS_DECODER], dtype=np.intp)
+DECODE_ALU = np.array([{"ADD": ALU_ADD, "SUB": ALU_SUB, "CMP": ALU_CMP}.get(entry[3], 0)
+                       for entry in ISS_DECODER], dtype=np.uint8)
+DECODE_COND_MASK = np.array([entry[4] for entry in ISS_DECODER], dtype=np.uint8)
+DECODE_COND_VALUE = np.array([entry[5] for entry in ISS_DECODER], dtype=np.uint8)
+EXECUTE_COST = np.array(EXECUTE_COSTS, dtype=np.int64)
+
+
+class BatchSimulator:
+    """Estado de ``lanes`` instancias VonSim8 con una fila por instancia."""
+
+    def __init__(self, lanes: int, address_bits: int = 8):
+        self.lanes = lanes
+        self.address_bits = address_bits
+        self.address_mask = (1 << address_bits) - 1
+        self.ip = np.zeros(lanes, dtype=np.int64)
+        self.registers = np.zeros((lanes, len(REGISTER_NAMES)), dtype=np.uint8)
+        self.flags = np.zeros(lanes, dtype=np.uint8)
+        self.memory = np.zeros((lanes, 1 << address_bits), dtype=np.uint8)
+        self.halted = np.zeros(lanes, dtype=bool)
+        self.instruction_count = np.zeros(lanes, dtype=np.int64)
+        self.fetch_cycles = np.zeros(lanes, dtype=np.int64)
+        self.execute_cycles = np.zeros(lanes, dtype=np.int64)
+
+    @property
+    def total_cycles(self) -> np.ndarray:
+        return self.fetch_cycles + self.execute_cycles
+
+    @classmethod
+    def from_systems(cls, systems: list[VonSim8System]) -> "BatchSimulator":
+        """Construye un lote copiando el estado arquitectónico de cada ``VonSim8System``."""
+        batch = cls(len(systems), systems[0].mem.address_bits)
+        for lane, system in enumerate(systems):
+            batch.ip[lane] = system.ip.value
+            batch.flags[lane] = system.alu.flags
+            batch.memory[lane] = np.frombuffer(system.mem.dump(), dtype=np.uint8)
+            for index, name in enumerate(REGISTER_NAMES):
+                batch.registers[lane, index] = getattr(system.reg_bank, name.lower()).value
+        return batch
+
+    def load_program(self, image, offset: int = 0):
+        """Copia la misma imagen en la memoria de todos los carriles."""
+        data = np.frombuffer(bytes(image), dtype=np.uint8)
+        self.memory[:, offset:offset + len(data)] = data
+
+    def set_register(self, name: str, values):
+        self.registers[:, REGISTER_NAMES.index(name)] = values
+
+    def to_system(self, lane: int) -> VonSim8System:
+        """``VonSim8System`` con el estado arquitectónico y los contadores de un carril."""
+        system = VonSim8System(f"VonSim8[{lane}]", self.address_bits)
+        system.ip.value = int(self.ip[lane])
+        system.alu.flags = int(self.flags[lane])
+        system.mem.load_image(self.memory[lane].tobytes())
+        for index, name in enumerate(REGISTER_NAMES):
+            getattr(system.reg_bank, name.lower()).value = int(self.registers[lane, index])
+        uc = system.uc
+        uc.flags = system.alu.flags
+        uc.halted = bool(self.halted[lane])
+        uc.instruction_count = int(self.instruction_count[lane])
+        uc.fetch_cycles = int(self.fetch_cycles[lane])
+        uc.execute_cycles = int(self.execute_cycles[lane])
+        uc.total_cycles = uc.fetch_cycles + uc.execute_cycles
+        return system
+
+    def step(self) -> int:
+        """Ejecuta una instrucción en todos los carriles no detenidos. Devuelve cuántos la ejecutaron."""
+        lanes = np.flatnonzero(~self.halted)
+        if lanes.size == 0:
+            return 0
+
+        mask = self.address_mask
+        memory = self.memory
+        registers = self.registers
+        ip = self.ip[lanes]
+        opcode = memory[lanes, ip]
+        kind = DECODE_KIND[opcode]
+        dst = DECODE_DST[opcode]
+        src = DECODE_SRC[opcode]
+
+        self.instruction_count[lanes] += 1
+        self.fetch_cycles[lanes] += FETCH_COST
+        self.execute_cycles[lanes] += EXECUTE_COST[opcode]
+
+        operand = memory[lanes, (ip + 1) & mask]
+        two_bytes = (kind == ISS_LOAD) | (kind == ISS_STORE) | (kind == ISS_JUMP)
+        next_ip = (ip + np.where(two_bytes, 2, 1)) & mask
+
+        selected = kind == ISS_MOV
+        if selected.any():
+            rows = lanes[selected]
+            registers[rows, dst[selected]] = registers[rows, src[selected]]
+
+        selected = kind == ISS_ALU
+        if selected.any():
+            rows = lanes[selected]
+            operation = DECODE_ALU[opcode[selected]]
+            a = registers[rows, dst[selected]].astype(np.int16)
+            b = registers[rows, src[selected]].astype(np.int16)
+            is_add = operation == ALU_ADD
+            raw = np.where(is_add, a + b, a - b)
+            result = raw & 0xFF
+            carry = np.where(is_add, raw > 0xFF, a < b)
+            overflow = np.where(is_add, ~(a ^ b) & (a ^ result), (a ^ b) & (a ^ result)) & 0x80
+            flags = ((result == 0) * FLAG_Z | carry * FLAG_C | ((result & 0x80) != 0) * FLAG_S
+                     | (overflow != 0) * FLAG_O)
+            self.flags[rows] = flags
+            write_back = operation != ALU_CMP
+            registers[rows[write_back], dst[selected][write_back]] = result[write_back]
+
+        selected = kind == ISS_LOAD
+        if selected.any():
+            rows = lanes[selected]
+            registers[rows, dst[selected]] = memory[rows, operand[selected]]
+
+        selected = kind == ISS_STORE
+        if selected.any():
+            rows = lanes[selected]
+            memory[rows, operand[selected]] = registers[rows, src[selected]]
+
+        selected = kind == ISS_JUMP
+        if selected.any():
+            rows = lanes[selected]
+            codes = opcode[selected]
+            taken = (self.flags[rows] & DECODE_COND_MASK[codes]) == DECODE_COND_VALUE[codes]
+            next_ip[np.flatnonzero(selected)[taken]] = operand[selected][taken]
+
+        self.halted[lanes[kind == ISS_HLT]] = True
+        self.ip[lanes] = next_ip
+        return int(lanes.size)
+
+    def run(self, max_instructions: int = 100_000) -> int:
+        """Ejecuta hasta que todos los carriles se detengan o hasta ``max_instructions`` pasos."""
+        steps = 0
+        while steps < max_instructions and self.step():
+            steps += 1
+        return steps
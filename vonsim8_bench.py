@@ -0,0 +1,264 @@
+"""Suite de benchmarks del simulador con comparación contra una línea base.
+
+Mide transiciones DEVS por segundo, µs de reloj por instrucción simulada (DEVS, ISS e ISS con bloques),
+el coste de construir ``VonSim8System`` (directamente y clonándolo de una ``SystemTemplate``) y la
+memoria que ocupa, el CPI con la UC secuencial y segmentada, el escalado con la longitud del programa
+y el sobrecoste de la traza (texto y binaria de puertos). Los resultados se guardan en JSON y, si se
+indica una línea base, se comparan con una tolerancia relativa.
+
+    python vonsim8_bench.py --output bench.json
+    python vonsim8_bench.py --baseline bench_baseline.json --tolerance 0.2
+
+``bench_baseline.json`` es la línea base de referencia del repositorio. Guarda la versión de Python, la
+plataforma, la arquitectura y los núcleos de la máquina en que se midió, y solo sirve para comparar en
+una máquina equivalente; en otra, se regenera con ``--output``.
+"""
+import io
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Callable, NamedTuple
+
+from xdevs.models import Component, Coupled
+
+from vonsim8 import (CPUSystem, Instrumentation, SystemTemplate, Tracer, TRACE_DEBUG, TRACE_INFO,
+                     VonSim8System, run_simulation)
+from vonsim8_trace import PortTraceWriter
+
+LENGTHS = (10, 100, 1_000, 10_000, 100_000)
+QUICK_LENGTHS = (10, 100, 1_000)
+TRACE_LENGTH = 1_000
+CONSTRUCTIONS = 20
+
+# Bucle infinito con ALU, STORE, LOAD, CMP y saltos; cada ejecución se acota con max_instructions.
+BENCHMARK_PROGRAM = bytes([
+    0x19,           # 00: ADD CL, BL
+    0x46, 0x80,     # 01: STORE [0x80], CL
+    0x43, 0x80,     # 03: LOAD DL, [0x80]
+    0x33,           # 05: CMP AL, DL
+    0x52, 0x00,     # 06: JNZ 0x00
+    0x50, 0x00,     # 08: JMP 0x00
+])
+
+
+class Metric(NamedTuple):
+    """Valor medido, su unidad y el sentido en que mejora."""
+    value: float
+    unit: str
+    higher_is_better: bool
+
+
+class Regression(NamedTuple):
+    """Métrica que empeora respecto a la línea base más allá de la tolerancia."""
+    name: str
+    baseline: float
+    value: float
+    change: float
+
+
+def _best_of(repeat: int, run: Callable[[], float]) -> float:
+    return min(run() for _ in range(repeat))
+
+
+def _program_env() -> CPUSystem:
+    env = CPUSystem("VonSim8Environment")
+    env.vonsim8.mem.load_image(BENCHMARK_PROGRAM)
+    return env
+
+
+def _timed_run(engine: str, instructions: int, tracer_level: int | None = None, port_trace: bool = False) -> float:
+    env = _program_env()
+    tracer = Tracer(level=tracer_level) if tracer_level is not None else None
+    writer = PortTraceWriter(io.BytesIO()) if port_trace else None
+    start = time.perf_counter()
+    run_simulation(env, engine, instructions, tracer=tracer, port_trace=writer)
+    if writer is not None:
+        writer.close()
+    elapsed = time.perf_counter() - start
+    if tracer is not None:
+        tracer.detach()
+    return elapsed
+
+
+def measure_cpi(pipelined: bool, instructions: int = 10_000) -> float:
+    """CPI del programa de benchmark con la UC secuencial o segmentada (motor ISS)."""
+    env = CPUSystem("VonSim8Environment", pipelined=pipelined)
+    env.vonsim8.mem.load_image(BENCHMARK_PROGRAM)
+    summary = run_simulation(env, "iss", instructions)
+    return summary.total_cycles / summary.instructions
+
+
+def count_transitions(instructions: int) -> int:
+    """Transiciones DEVS (δ_int + δ_ext) necesarias para ``instructions`` instrucciones del benchmark."""
+    instrumentation = Instrumentation(phases=False)
+    run_simulation(_program_env(), "devs", instructions, instrumentation=instrumentation)
+    return instrumentation.transitions
+
+
+def measure_construction(repeat: int) -> float:
+    """µs por construcción de ``VonSim8System`` (mejor media de ``repeat`` tandas)."""
+    def run():
+        start = time.perf_counter()
+        for _ in range(CONSTRUCTIONS):
+            VonSim8System()
+        return (time.perf_counter() - start) / CONSTRUCTIONS
+    return _best_of(repeat, run) * 1e6
+
+
+def measure_cloning(repeat: int) -> float:
+    """µs por ``SystemTemplate.instantiate`` (mejor media de ``repeat`` tandas; la plantilla no cuenta)."""
+    template = SystemTemplate()
+
+    def run():
+        start = time.perf_counter()
+        for _ in range(CONSTRUCTIONS):
+            template.instantiate()
+        return (time.perf_counter() - start) / CONSTRUCTIONS
+    return _best_of(repeat, run) * 1e6
+
+
+def measure_footprint() -> float:
+    """KiB asignados por cada ``VonSim8System`` vivo (media de ``CONSTRUCTIONS`` sistemas, con tracemalloc)."""
+    tracemalloc.start()
+    try:
+        systems = [VonSim8System() for _ in range(CONSTRUCTIONS)]
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del systems
+    return size / CONSTRUCTIONS / 1024
+
+
+def measure_slots() -> tuple[float, float]:
+    """KiB por ``VonSim8System`` en los ``__dict__`` de sus modelos atómicos y KiB que ahorran los ``__slots__``.
+
+    Las clases base de xDEVS no declaran ``__slots__``, así que cada modelo sigue teniendo un ``__dict__``
+    con los atributos de xDEVS; los ``__slots__`` solo sacan de él los atributos propios del modelo. El
+    Los ``__dict__`` se miden como copias (``sys.getsizeof``), porque el tamaño de un ``__dict__`` de
+    instancia depende de cuántas claves comparte con los de su clase; el ahorro es lo que crecería cada
+    copia con los atributos de los huecos menos los 8 bytes por hueco que ocupan en el objeto.
+    """
+    system = VonSim8System()
+    pending: list[Component] = [system]
+    dicts = saved = 0
+    while pending:
+        model = pending.pop()
+        if isinstance(model, Coupled):
+            pending.extend(model.components)
+            continue
+        names = [name for klass in type(model).__mro__ for name in getattr(klass, "__slots__", ())]
+        own = dict(model.__dict__)
+        merged = dict(own)
+        merged.update((name, getattr(model, name)) for name in names if hasattr(model, name))
+        dicts += sys.getsizeof(own)
+        saved += sys.getsizeof(merged) - sys.getsizeof(own) - 8 * len(names)
+    return dicts / 1024, saved / 1024
+
+
+def run_benchmarks(lengths: tuple[int, ...] = LENGTHS, repeat: int = 3,
+                   log: Callable[[str], None] | None = None) -> dict[str, Metric]:
+    """Ejecuta la suite completa. Las longitudes por encima de 1000 instrucciones se miden una sola vez."""
+    metrics: dict[str, Metric] = {}
+
+    def record(name: str, metric: Metric):
+        metrics[name] = metric
+        if log is not None:
+            log(f"  {name:<40} {metric.value:>14.3f} {metric.unit}")
+
+    record("construction.us", Metric(measure_construction(repeat), "µs", False))
+    record("construction.clone_us", Metric(measure_cloning(repeat), "µs", False))
+    record("construction.kib", Metric(measure_footprint(), "KiB", False))
+    dicts, saved = measure_slots()
+    record("construction.model_dict_kib", Metric(dicts, "KiB", False))
+    record("construction.slots_saved_kib", Metric(saved, "KiB", True))
+    record("cpi.sequential", Metric(measure_cpi(False), "ciclos", False))
+    record("cpi.pipelined", Metric(measure_cpi(True), "ciclos", False))
+    for length in lengths:
+        runs = repeat if length <= 1_000 else 1
+        devs = _best_of(runs, lambda: _timed_run("devs", length))
+        iss = _best_of(repeat, lambda: _timed_run("iss", length))
+        bbt = _best_of(repeat, lambda: _timed_run("bbt", length))
+        record(f"devs.us_per_instruction[{length}]", Metric(devs / length * 1e6, "µs", False))
+        record(f"devs.transitions_per_sec[{length}]", Metric(count_transitions(length) / devs, "1/s", True))
+        record(f"iss.us_per_instruction[{length}]", Metric(iss / length * 1e6, "µs", False))
+        record(f"bbt.us_per_instruction[{length}]", Metric(bbt / length * 1e6, "µs", False))
+
+    trace_length = min(TRACE_LENGTH, max(lengths))
+    for label, level in (("off", None), ("info", TRACE_INFO), ("debug", TRACE_DEBUG)):
+        elapsed = _best_of(repeat, lambda: _timed_run("devs", trace_length, level))
+        record(f"trace_{label}.us_per_instruction", Metric(elapsed / trace_length * 1e6, "µs", False))
+    elapsed = _best_of(repeat, lambda: _timed_run("devs", trace_length, port_trace=True))
+    record("trace_ports.us_per_instruction", Metric(elapsed / trace_length * 1e6, "µs", False))
+    return metrics
+
+
+def save_results(path: str, metrics: dict[str, Metric]):
+    document = {
+        "python": f"{platform.python_implementation()} {platform.python_version()}",
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor() or None,
+        "cpus": os.cpu_count(),
+        "metrics": {name: metric._asdict() for name, metric in metrics.items()},
+    }
+    with open(path, "w", encoding="utf-8") as handle:
+        json.dump(document, handle, indent=2, ensure_ascii=False)
+
+
+def load_results(path: str) -> dict[str, Metric]:
+    with open(path, encoding="utf-8") as handle:
+        document = json.load(handle)
+    return {name: Metric(**fields) for name, fields in document["metrics"].items()}
+
+
+def compare(metrics: dict[str, Metric], baseline: dict[str, Metric], tolerance: float) -> list[Regression]:
+    """Métricas presentes en ambos conjuntos que empeoran más de ``tolerance`` (relativa)."""
+    regressions = []
+    for name, reference in baseline.items():
+        metric = metrics.get(name)
+        if metric is None or reference.value == 0:
+            continue
+        change = (metric.value - reference.value) / reference.value
+        worse = -change if reference.higher_is_better else change
+        if worse > tolerance:
+            regressions.append(Regression(name, reference.value, metric.value, change))
+    return regressions
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmarks del simulador VonSim8")
+    parser.add_argument("--output", default=None, help="guarda los resultados en este fichero JSON")
+    parser.add_argument("--baseline", default=None, help="JSON de referencia con el que comparar")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="empeoramiento relativo admitido antes de marcar una regresión (0.2 = 20%%)")
+    parser.add_argument("--repeat", type=int, default=3, help="repeticiones por medida (se toma la mejor)")
+    parser.add_argument("--lengths", default=None,
+                        help="longitudes de programa separadas por comas (por defecto 10..100000)")
+    parser.add_argument("--quick", action="store_true", help="solo longitudes hasta 1000 instrucciones")
+    args = parser.parse_args()
+
+    if args.lengths:
+        lengths = tuple(int(value) for value in args.lengths.split(","))
+    else:
+        lengths = QUICK_LENGTHS if args.quick else LENGTHS
+
+    print("Benchmarks VonSim8")
+    metrics = run_benchmarks(lengths, args.repeat, log=print)
+    if args.output:
+        save_results(args.output, metrics)
+        print(f"\nResultados guardados en {args.output}")
+
+    if args.baseline:
+        regressions = compare(metrics, load_results(args.baseline), args.tolerance)
+        if regressions:
+            print(f"\n✗ {len(regressions)} regresiones (tolerancia {args.tolerance:.0%}):")
+            for regression in regressions:
+                print(f"  {regression.name}: {regression.baseline:.3f} → {regression.value:.3f} "
+                      f"({regression.change:+.1%})")
+            sys.exit(1)
+        print(f"\n✓ Sin regresiones respecto a {args.baseline} (tolerancia {args.tolerance:.0%})")
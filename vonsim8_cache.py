@@ -0,0 +1,353 @@
+"""Caché persistente de resultados de simulación direccionada por contenido.
+
+La clave de cada ejecución es un SHA-256 de la imagen de programa, el estado inicial, la configuración
+del modelo (``SweepConfig``) y la versión del modelo (hash del código de ``vonsim8.py``,
+``vonsim8_sweep.py`` y xDEVS), así que un cambio en el simulador invalida todas las entradas. Un acierto
+devuelve el estado arquitectónico final, los ciclos y los eventos DEVS sin simular.
+
+Cada entrada es un fichero propio que se escribe en un temporal y se publica con ``os.replace``: varios
+procesos pueden leer y escribir a la vez sin bloqueos, y una entrada borrada o truncada por otro proceso
+cuenta como fallo. El tamaño total está acotado con expulsión LRU: cada acierto actualiza la fecha de
+modificación del fichero y, al superar ``max_bytes``, se borran las entradas más antiguas hasta bajar a
+``low_water`` · ``max_bytes``. Cada proceso anota sus aciertos, fallos, escrituras y expulsiones en su
+propio fichero de ``stats/``, y ``stats`` los suma, así que las estadísticas cubren todos los procesos.
+
+Uso::
+
+    python vonsim8_cache.py programa.bin --cache-dir .vonsim8_cache
+    python vonsim8_cache.py --cache-dir .vonsim8_cache --stats
+"""
+import hashlib
+import os
+import pickle
+import tempfile
+import time
+import zlib
+from importlib import metadata
+from typing import NamedTuple
+
+import xdevs.models
+import xdevs.sim
+
+import vonsim8
+import vonsim8_sweep
+from vonsim8 import architectural_state
+from vonsim8_sweep import SweepConfig, simulate_config
+
+CACHE_FORMAT = 1
+ENTRY_SUFFIX = ".vs8r"
+TEMPORARY_SUFFIX = ".tmp"
+TEMPORARY_MAX_AGE = 300.0
+STATS_DIRECTORY = "stats"
+STATS_SUFFIX = ".log"
+STAT_HIT, STAT_MISS, STAT_STORE, STAT_EVICTION = b"h", b"m", b"s", b"e"
+
+MODEL_MODULES = (vonsim8, vonsim8_sweep, xdevs.models, xdevs.sim)
+
+_model_version: str | None = None
+
+
+def model_version() -> str:
+    """Hash del código de ``MODEL_MODULES``, de la versión instalada de xDEVS y del formato de las entradas."""
+    global _model_version
+    if _model_version is None:
+        digest = hashlib.sha256()
+        for module in MODEL_MODULES:
+            with open(module.__file__, "rb") as handle:
+                digest.update(hashlib.sha256(handle.read()).digest())
+        try:
+            digest.update(metadata.version("xdevs").encode())
+        except metadata.PackageNotFoundError:
+            pass
+        digest.update(CACHE_FORMAT.to_bytes(4, "little"))
+        _model_version = digest.hexdigest()
+    return _model_version
+
+
+def config_key(config: SweepConfig) -> str:
+    """Clave hexadecimal de ``config`` junto con la versión del modelo."""
+    canonical = (model_version(), bytes(config.image), tuple(sorted((config.registers or {}).items())),
+                 tuple(sorted((config.cycle_costs or {}).items())), config.engine, config.max_instructions,
+                 config.address_bits, config.pipelined,
+                 tuple(config.cache) if config.cache is not None else None,
+                 tuple(config.dcache) if config.dcache is not None else None)
+    return hashlib.sha256(repr(canonical).encode()).hexdigest()
+
+
+class CachedResult(NamedTuple):
+    """Resultado guardado: estado arquitectónico final (``architectural_state``), ciclos y eventos."""
+    state: dict[str, object]
+    instructions: int
+    total_cycles: int
+    fetch_cycles: int
+    execute_cycles: int
+    transitions: int
+    messages: int
+    stop_reason: str | None
+
+    def to_bytes(self) -> bytes:
+        return zlib.compress(pickle.dumps(tuple(self), protocol=pickle.HIGHEST_PROTOCOL), 6)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "CachedResult":
+        """Reconstruye una entrada (solo de directorios de confianza: usa pickle)."""
+        return cls(*pickle.loads(zlib.decompress(data)))
+
+
+class CacheStats(NamedTuple):
+    hits: int
+    misses: int
+    stores: int
+    evictions: int
+    entries: int
+    size: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class ResultCache:
+    """Directorio de resultados con expulsión LRU acotada a ``max_bytes``.
+
+    Las entradas se reparten en subdirectorios por los dos primeros caracteres de la clave. ``hits``,
+    ``misses``, ``stores`` y ``evictions`` son los de esta instancia; ``stats`` suma los de todos los
+    procesos y lee ``entries`` y ``size`` del disco.
+
+    Antes de comparar con ``max_bytes``, ``put`` vuelve a medir el directorio, así que el límite se cumple
+    aunque escriban varios procesos (salvo lo que escriban entre la medida y la expulsión). Medir cuesta
+    un ``stat`` por entrada; con ``rescan_interval`` > 0 solo se mide si la última medida tiene más de
+    esos segundos y entre medidas se suma lo que escribe este proceso, de modo que el directorio puede
+    pasar de ``max_bytes`` en lo que escriban los demás durante ese intervalo.
+    """
+
+    def __init__(self, directory: str | os.PathLike, max_bytes: int = 256 << 20, low_water: float = 0.8,
+                 rescan_interval: float = 0.0):
+        self.directory = os.fspath(directory)
+        self.max_bytes = max_bytes
+        self.low_water = low_water
+        self.rescan_interval = rescan_interval
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.size_estimate: int | None = None
+        self.scanned_at = 0.0
+        self.stats_stream = None
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + ENTRY_SUFFIX)
+
+    def _scan(self) -> tuple[list[tuple[float, int, str]], list[tuple[float, int, str]]]:
+        """Entradas y temporales de escritura como ``(fecha, tamaño, ruta)``."""
+        entries, temporaries = [], []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if name.endswith(ENTRY_SUFFIX):
+                    found = entries
+                elif name.endswith(TEMPORARY_SUFFIX):
+                    found = temporaries
+                else:
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    info = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                found.append((info.st_mtime, info.st_size, path))
+        return entries, temporaries
+
+    def _entries(self) -> list[tuple[float, int, str]]:
+        return self._scan()[0]
+
+    def _count(self, stat: bytes, times: int = 1):
+        """Anota ``stat`` en el fichero de estadísticas de esta instancia (solo se añade al final)."""
+        if self.stats_stream is None:
+            directory = os.path.join(self.directory, STATS_DIRECTORY)
+            os.makedirs(directory, exist_ok=True)
+            name = f"{os.getpid()}-{os.urandom(4).hex()}{STATS_SUFFIX}"
+            self.stats_stream = open(os.path.join(directory, name), "ab", buffering=0)
+        self.stats_stream.write(stat * times)
+
+    def get(self, key: str) -> CachedResult | None:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as handle:
+                result = CachedResult.from_bytes(handle.read())
+        except FileNotFoundError:
+            self.misses += 1
+            self._count(STAT_MISS)
+            return None
+        except (zlib.error, pickle.UnpicklingError, EOFError, TypeError, ValueError):
+            self.misses += 1
+            self._count(STAT_MISS)
+            self._remove(path)
+            return None
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        self.hits += 1
+        self._count(STAT_HIT)
+        return result
+
+    def put(self, key: str, result: CachedResult):
+        path = self._path(key)
+        data = result.to_bytes()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        handle, temporary = tempfile.mkstemp(dir=os.path.dirname(path), suffix=TEMPORARY_SUFFIX)
+        try:
+            with os.fdopen(handle, "wb") as stream:
+                stream.write(data)
+            os.replace(temporary, path)
+        except BaseException:
+            self._remove(temporary)
+            raise
+        self.stores += 1
+        self._count(STAT_STORE)
+        now = time.monotonic()
+        if self.size_estimate is None or now - self.scanned_at >= self.rescan_interval:
+            entries, temporaries = self._scan()
+            self.size_estimate = sum(size for _, size, _ in entries + temporaries)
+            self.scanned_at = now
+        else:
+            self.size_estimate += len(data)
+        if self.size_estimate > self.max_bytes:
+            self.evict()
+
+    def _remove(self, path: str) -> bool:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def evict(self):
+        """Borra las entradas menos usadas hasta bajar de ``low_water`` · ``max_bytes``.
+
+        También borra los temporales de más de ``TEMPORARY_MAX_AGE`` segundos, que deja un proceso
+        interrumpido a mitad de ``put``; los más recientes cuentan en el tamaño pero no se tocan.
+        """
+        entries, temporaries = self._scan()
+        stale = time.time() - TEMPORARY_MAX_AGE
+        size = 0
+        for modified, temporary_size, path in temporaries:
+            if modified >= stale or not self._remove(path):
+                size += temporary_size
+        entries.sort()
+        size += sum(entry_size for _, entry_size, _ in entries)
+        target = self.max_bytes * self.low_water
+        evicted = 0
+        for _, entry_size, path in entries:
+            if size <= target:
+                break
+            if self._remove(path):
+                evicted += 1
+            size -= entry_size
+        if evicted:
+            self.evictions += evicted
+            self._count(STAT_EVICTION, evicted)
+        self.size_estimate = size
+        self.scanned_at = time.monotonic()
+
+    def _stats_files(self) -> list[str]:
+        directory = os.path.join(self.directory, STATS_DIRECTORY)
+        try:
+            names = os.listdir(directory)
+        except FileNotFoundError:
+            return []
+        return [os.path.join(directory, name) for name in names if name.endswith(STATS_SUFFIX)]
+
+    def clear(self):
+        """Vacía la caché y sus estadísticas."""
+        if self.stats_stream is not None:
+            self.stats_stream.close()
+            self.stats_stream = None
+        entries, temporaries = self._scan()
+        for _, _, path in entries + temporaries:
+            self._remove(path)
+        for path in self._stats_files():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self.hits = self.misses = self.stores = self.evictions = 0
+        self.size_estimate = 0
+
+    def stats(self) -> CacheStats:
+        """Estadísticas de todos los procesos que usaron el directorio, y entradas y tamaño actuales."""
+        counts = dict.fromkeys((STAT_HIT, STAT_MISS, STAT_STORE, STAT_EVICTION), 0)
+        for path in self._stats_files():
+            try:
+                with open(path, "rb") as handle:
+                    recorded = handle.read()
+            except FileNotFoundError:
+                continue
+            for stat in counts:
+                counts[stat] += recorded.count(stat)
+        entries = self._entries()
+        return CacheStats(counts[STAT_HIT], counts[STAT_MISS], counts[STAT_STORE], counts[STAT_EVICTION],
+                          len(entries), sum(size for _, size, _ in entries))
+
+    def report(self) -> list[str]:
+        stats = self.stats()
+        return [f"Aciertos: {stats.hit_rate:.1%} ({stats.hits} aciertos, {stats.misses} fallos, "
+                f"{stats.stores} escrituras, {stats.evictions} expulsiones)",
+                f"Entradas: {stats.entries} ({stats.size / 1024:.1f} KiB de {self.max_bytes / 1024:.0f} KiB)"]
+
+
+def simulate(config: SweepConfig) -> CachedResult:
+    """Ejecuta ``config`` con ``vonsim8_sweep.simulate_config`` y devuelve el resultado para guardar."""
+    system, summary, instrumentation = simulate_config(config)
+    return CachedResult(architectural_state(system), summary.instructions, summary.total_cycles,
+                        summary.fetch_cycles, summary.execute_cycles, instrumentation.transitions,
+                        instrumentation.messages, summary.stop_reason)
+
+
+def run_cached(config: SweepConfig, cache: ResultCache) -> tuple[CachedResult, bool]:
+    """Resultado de ``config`` desde ``cache`` o simulándolo (y guardándolo); indica si fue un acierto."""
+    key = config_key(config)
+    result = cache.get(key)
+    if result is not None:
+        return result, True
+    result = simulate(config)
+    cache.put(key, result)
+    return result, False
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from vonsim8 import ENGINES, REGISTER_NAMES
+
+    parser = argparse.ArgumentParser(description="Simulación con caché persistente de resultados")
+    parser.add_argument("images", nargs="*", help="imágenes binarias de programa")
+    parser.add_argument("--cache-dir", default=".vonsim8_cache", help="directorio de la caché")
+    parser.add_argument("--max-mb", type=float, default=256, help="tamaño máximo de la caché en MiB")
+    parser.add_argument("--rescan-interval", type=float, default=0.0,
+                        help="segundos entre medidas del directorio al escribir (0: en cada escritura)")
+    parser.add_argument("--engine", choices=ENGINES, default="devs", help="motor de simulación")
+    parser.add_argument("--max-instructions", type=int, default=100_000, help="límite de instrucciones")
+    parser.add_argument("--pipeline", action="store_true", help="UC segmentada")
+    parser.add_argument("--stats", action="store_true", help="muestra las estadísticas de la caché")
+    parser.add_argument("--clear", action="store_true", help="vacía la caché y sus estadísticas antes de empezar")
+    args = parser.parse_args()
+
+    result_cache = ResultCache(args.cache_dir, int(args.max_mb * (1 << 20)), rescan_interval=args.rescan_interval)
+    if args.clear:
+        result_cache.clear()
+    for image_path in args.images:
+        with open(image_path, "rb") as image_file:
+            image = image_file.read()
+        start = time.perf_counter()
+        result, hit = run_cached(SweepConfig(image, engine=args.engine, max_instructions=args.max_instructions,
+                                             pipelined=args.pipeline), result_cache)
+        registers = " ".join(f"{name}={result.state[name]:#04x}" for name in REGISTER_NAMES)
+        print(f"{image_path}: {'acierto' if hit else 'fallo'} en {(time.perf_counter() - start) * 1e3:.1f} ms · "
+              f"{result.instructions} instrucciones, {result.total_cycles} ciclos, {result.transitions} "
+              f"transiciones · IP={result.state['IP']:#04x} {registers}")
+    if args.stats or not args.images:
+        for line in result_cache.report():
+            print(line)
@@ -0,0 +1,369 @@
+"""Fuzzing diferencial entre el modelo DEVS y una semántica de referencia independiente.
+
+Genera programas VonSim8 válidos con registros y memoria iniciales aleatorios y ejecuta cada caso, en
+lockstep, en ``VonSim8System`` (coordinador DEVS) y en ``ReferenceMachine``, un intérprete escrito
+directamente a partir de la especificación del ISA: decodifica por campos de bits y no usa la ROM, los
+decodificadores ni las tablas de costes del simulador. Tras cada instrucción compara IP, AL–DL, flags,
+memoria, contador de instrucciones y ciclos. Las divergencias se minimizan y se guardan como casos de
+regresión en JSON.
+
+Cada worker reutiliza un único sistema (clonado de una ``SystemTemplate``) para todos sus casos y los
+genera él mismo a partir de una semilla, así que por el pool solo viajan semillas y divergencias.
+
+    python vonsim8_fuzz.py --cases 20000 --workers 8 --corpus fuzz_cases
+    python vonsim8_fuzz.py --replay fuzz_cases
+"""
+import json
+import os
+import random
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, NamedTuple
+
+from xdevs.sim import Coordinator
+
+from vonsim8 import (FLAG_C, FLAG_O, FLAG_S, FLAG_Z, REGISTER_NAMES, SystemTemplate, VonSim8System,
+                     step_devs_instruction)
+
+MEMORY_SIZE = 256
+PROGRAM_LENGTH = 48
+MAX_INSTRUCTIONS = 64
+BATCH_SIZE = 100
+
+# Costes documentados del ciclo de instrucción: FETCH de 6 pasos (8 ciclos) y EXECUTE por tipo,
+# incluida la decodificación.
+REFERENCE_FETCH_CYCLES = 8
+REFERENCE_EXECUTE_CYCLES = {"MOV": 6, "ALU": 7, "LOAD": 11, "STORE": 9, "JUMP": 6, "HLT": 2, "NOP": 2}
+REFERENCE_CONDITIONS = (FLAG_Z, FLAG_C, FLAG_S, FLAG_O)
+
+# Peso de cada tipo de instrucción al generar programas.
+GENERATOR_WEIGHTS = {"MOV": 4, "ALU": 8, "LOAD": 4, "STORE": 4, "JUMP": 5, "HLT": 1, "NOP": 1}
+
+
+class FuzzCase(NamedTuple):
+    """Caso de prueba: imagen completa de memoria, registros AL–DL iniciales y límite de instrucciones."""
+    memory: bytes
+    registers: tuple[int, ...]
+    max_instructions: int = MAX_INSTRUCTIONS
+
+    def to_json(self) -> dict:
+        return {"memory": self.memory.hex(), "registers": list(self.registers),
+                "max_instructions": self.max_instructions}
+
+    @classmethod
+    def from_json(cls, document: dict) -> "FuzzCase":
+        return cls(bytes.fromhex(document["memory"]), tuple(document["registers"]), document["max_instructions"])
+
+
+class FuzzState(NamedTuple):
+    """Estado comparado tras cada instrucción."""
+    ip: int
+    registers: tuple[int, ...]
+    flags: int
+    halted: bool
+    instructions: int
+    cycles: int
+    memory: bytes
+
+
+class Mismatch(NamedTuple):
+    """Primera instrucción (``index``) tras la que los estados DEVS y de referencia difieren."""
+    case: FuzzCase
+    index: int
+    fields: tuple[str, ...]
+    devs: FuzzState
+    reference: FuzzState
+
+    def describe(self) -> list[str]:
+        lines = [f"Divergencia tras la instrucción {self.index}:"]
+        for field in self.fields:
+            lines.append(f"  {field}: DEVS {getattr(self.devs, field)!r} ≠ referencia {getattr(self.reference, field)!r}")
+        return lines
+
+
+class FuzzReport(NamedTuple):
+    """Resultado de una campaña: casos ejecutados, divergencias (minimizadas) y tiempo de reloj."""
+    cases: int
+    mismatches: list[Mismatch]
+    wall_time: float
+
+    @property
+    def cases_per_minute(self) -> float:
+        return self.cases / self.wall_time * 60 if self.wall_time else 0.0
+
+
+def _decode(opcode: int) -> tuple[str, int, int]:
+    """Tipo, destino y fuente de un opcode según sus campos de bits."""
+    if opcode < 0x40:
+        return ("MOV" if opcode < 0x10 else "ALU"), (opcode >> 2) & 0x03, opcode & 0x03
+    if opcode < 0x44:
+        return "LOAD", opcode & 0x03, 0
+    if opcode < 0x48:
+        return "STORE", 0, opcode & 0x03
+    if 0x50 <= opcode <= 0x58:
+        return "JUMP", 0, 0
+    if opcode == 0xFF:
+        return "HLT", 0, 0
+    return "NOP", 0, 0
+
+
+def _signed(value: int) -> int:
+    return value - 0x100 if value & 0x80 else value
+
+
+class ReferenceMachine:
+    """Intérprete de referencia de VonSim8 (memoria de 256 bytes, costes por defecto, sin caché ni cauce)."""
+
+    def __init__(self, case: FuzzCase):
+        self.memory = bytearray(case.memory)
+        self.registers = list(case.registers)
+        self.ip = 0
+        self.flags = 0
+        self.halted = False
+        self.instructions = 0
+        self.cycles = 0
+
+    def _fetch(self) -> int:
+        value = self.memory[self.ip]
+        self.ip = (self.ip + 1) % MEMORY_SIZE
+        return value
+
+    def step(self) -> bool:
+        """Ejecuta una instrucción. Devuelve False si la máquina ya estaba detenida."""
+        if self.halted:
+            return False
+        opcode = self._fetch()
+        kind, dst, src = _decode(opcode)
+        registers = self.registers
+        if kind == "MOV":
+            registers[dst] = registers[src]
+        elif kind == "ALU":
+            a, b = registers[dst], registers[src]
+            operation = opcode >> 4
+            if operation == 1:
+                wide, signed = a + b, _signed(a) + _signed(b)
+                carry = wide > 0xFF
+            else:
+                wide, signed = a - b, _signed(a) - _signed(b)
+                carry = wide < 0
+            result = wide % 0x100
+            self.flags = ((FLAG_Z if result == 0 else 0) | (FLAG_C if carry else 0)
+                          | (FLAG_S if result >= 0x80 else 0) | (FLAG_O if not -0x80 <= signed <= 0x7F else 0))
+            if operation != 3:
+                registers[dst] = result
+        elif kind == "LOAD":
+            registers[dst] = self.memory[self._fetch()]
+        elif kind == "STORE":
+            self.memory[self._fetch()] = registers[src]
+        elif kind == "JUMP":
+            target = self._fetch()
+            taken = True
+            if opcode != 0x50:
+                condition = opcode - 0x51
+                flag_set = bool(self.flags & REFERENCE_CONDITIONS[condition // 2])
+                taken = flag_set if condition % 2 == 0 else not flag_set
+            if taken:
+                self.ip = target
+        elif kind == "HLT":
+            self.halted = True
+        self.instructions += 1
+        self.cycles += REFERENCE_FETCH_CYCLES + REFERENCE_EXECUTE_CYCLES[kind]
+        return True
+
+    def state(self) -> FuzzState:
+        return FuzzState(self.ip, tuple(self.registers), self.flags, self.halted, self.instructions, self.cycles,
+                         bytes(self.memory))
+
+
+_OPCODES = {kind: tuple(opcode for opcode in range(0x100) if _decode(opcode)[0] == kind) for kind in GENERATOR_WEIGHTS}
+_KINDS = tuple(GENERATOR_WEIGHTS)
+_KIND_WEIGHTS = tuple(GENERATOR_WEIGHTS.values())
+
+
+def generate_case(rng: random.Random, program_length: int = PROGRAM_LENGTH,
+                  max_instructions: int = MAX_INSTRUCTIONS) -> FuzzCase:
+    """Programa aleatorio de instrucciones válidas en la dirección 0 y datos aleatorios en el resto.
+
+    Los saltos apuntan al programa y los LOAD/STORE sobre todo a la zona de datos, de modo que hay
+    bucles, código automodificable ocasional y accesos a memoria en casi todos los casos.
+    """
+    memory = bytearray(rng.randbytes(MEMORY_SIZE))
+    address = 0
+    while address < program_length:
+        kind = rng.choices(_KINDS, _KIND_WEIGHTS)[0]
+        memory[address] = rng.choice(_OPCODES[kind])
+        address += 1
+        if kind == "JUMP":
+            memory[address] = rng.randrange(program_length)
+            address += 1
+        elif kind in ("LOAD", "STORE"):
+            memory[address] = rng.randrange(MEMORY_SIZE) if rng.random() < 0.1 else rng.randrange(program_length,
+                                                                                                  MEMORY_SIZE)
+            address += 1
+    registers = tuple(rng.randrange(0x100) for _ in REGISTER_NAMES)
+    return FuzzCase(bytes(memory), registers, max_instructions)
+
+
+_system: VonSim8System | None = None
+
+
+def worker_system() -> VonSim8System:
+    """Sistema DEVS del proceso, clonado una vez de una plantilla y reutilizado en todos los casos."""
+    global _system
+    if _system is None:
+        _system = SystemTemplate().instantiate()
+    return _system
+
+
+def _load(system: VonSim8System, case: FuzzCase):
+    system.mem.load_image(case.memory)
+    for name, value in zip(REGISTER_NAMES, case.registers):
+        getattr(system.reg_bank, name.lower()).value = value
+    system.ip.value = 0
+    system.alu.flags = 0
+
+
+def _devs_state(system: VonSim8System) -> FuzzState:
+    uc = system.uc
+    registers = tuple(getattr(system.reg_bank, name.lower()).value for name in REGISTER_NAMES)
+    return FuzzState(system.ip.value, registers, system.alu.flags, uc.halted, uc.instruction_count,
+                     uc.total_cycles, system.mem.dump())
+
+
+def run_case(case: FuzzCase, system: VonSim8System | None = None) -> Mismatch | None:
+    """Ejecuta ``case`` en DEVS y en la referencia en lockstep; devuelve la primera divergencia o None."""
+    system = system if system is not None else worker_system()
+    _load(system, case)
+    coord = Coordinator(system)
+    coord.initialize()
+    reference = ReferenceMachine(case)
+    try:
+        for index in range(case.max_instructions):
+            devs_running = step_devs_instruction(coord, system.uc)
+            reference_running = reference.step()
+            devs, expected = _devs_state(system), reference.state()
+            if devs != expected:
+                fields = tuple(field for field, a, b in zip(FuzzState._fields, devs, expected) if a != b)
+                return Mismatch(case, index, fields, devs, expected)
+            if not (devs_running or reference_running):
+                break
+    finally:
+        coord.exit()
+    return None
+
+
+def minimize(mismatch: Mismatch, system: VonSim8System | None = None) -> Mismatch:
+    """Reduce un caso divergente: recorta el límite de instrucciones hasta la divergencia y pone a cero
+    registros y bloques de memoria (de 128 bytes a 1) mientras el caso siga divergiendo."""
+    best = mismatch
+
+    def attempt(candidate: FuzzCase) -> bool:
+        nonlocal best
+        found = run_case(candidate._replace(max_instructions=best.index + 1), system)
+        if found is None:
+            return False
+        best = found._replace(case=found.case._replace(max_instructions=found.index + 1))
+        return True
+
+    attempt(best.case)
+    for position in range(len(REGISTER_NAMES)):
+        registers = best.case.registers
+        if registers[position]:
+            attempt(best.case._replace(registers=registers[:position] + (0,) + registers[position + 1:]))
+    size = MEMORY_SIZE // 2
+    while size:
+        for start in range(0, MEMORY_SIZE, size):
+            memory = best.case.memory
+            if any(memory[start:start + size]):
+                attempt(best.case._replace(memory=memory[:start] + bytes(size) + memory[start + size:]))
+        size //= 2
+    return best
+
+
+def fuzz_batch(seed: int, count: int, max_instructions: int = MAX_INSTRUCTIONS,
+               shrink: bool = True) -> list[Mismatch]:
+    """Genera y ejecuta ``count`` casos a partir de ``seed`` en el sistema del proceso."""
+    rng = random.Random(seed)
+    system = worker_system()
+    mismatches = []
+    for _ in range(count):
+        found = run_case(generate_case(rng, max_instructions=max_instructions), system)
+        if found is not None:
+            mismatches.append(minimize(found, system) if shrink else found)
+    return mismatches
+
+
+def fuzz(cases: int, max_workers: int | None = None, seed: int = 0, batch_size: int = BATCH_SIZE,
+         max_instructions: int = MAX_INSTRUCTIONS, shrink: bool = True) -> FuzzReport:
+    """Reparte ``cases`` casos en lotes de ``batch_size`` entre ``max_workers`` procesos."""
+    start = time.perf_counter()
+    batches = [(seed * 1_000_003 + index, min(batch_size, cases - offset))
+               for index, offset in enumerate(range(0, cases, batch_size))]
+    mismatches: list[Mismatch] = []
+    with ProcessPoolExecutor(max_workers or os.cpu_count() or 1) as executor:
+        futures = [executor.submit(fuzz_batch, batch_seed, count, max_instructions, shrink)
+                   for batch_seed, count in batches]
+        for future in futures:
+            mismatches.extend(future.result())
+    return FuzzReport(cases, mismatches, time.perf_counter() - start)
+
+
+def save_regression(mismatch: Mismatch, directory: str | os.PathLike) -> str:
+    """Guarda el caso de ``mismatch`` como ``case_<crc32>.json`` en ``directory`` y devuelve la ruta."""
+    os.makedirs(directory, exist_ok=True)
+    document = mismatch.case.to_json()
+    document["fields"] = list(mismatch.fields)
+    document["index"] = mismatch.index
+    data = json.dumps(document, indent=2)
+    path = os.path.join(directory, f"case_{zlib.crc32(mismatch.case.memory + bytes(mismatch.case.registers)):08x}.json")
+    with open(path, "w", encoding="utf-8") as handle:
+        handle.write(data)
+    return path
+
+
+def load_regressions(directory: str | os.PathLike) -> Iterator[tuple[str, FuzzCase]]:
+    """Casos guardados en ``directory``, en orden de nombre de fichero."""
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(".json"):
+            path = os.path.join(directory, name)
+            with open(path, encoding="utf-8") as handle:
+                yield path, FuzzCase.from_json(json.load(handle))
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Fuzzing diferencial DEVS ↔ referencia de VonSim8")
+    parser.add_argument("--cases", type=int, default=10_000, help="número de casos a generar")
+    parser.add_argument("--workers", type=int, default=None, help="procesos (por defecto, uno por CPU)")
+    parser.add_argument("--seed", type=int, default=0, help="semilla de la campaña")
+    parser.add_argument("--batch", type=int, default=BATCH_SIZE, help="casos por lote enviado a un worker")
+    parser.add_argument("--max-instructions", type=int, default=MAX_INSTRUCTIONS,
+                        help="instrucciones ejecutadas como máximo por caso")
+    parser.add_argument("--corpus", default=None, help="directorio donde guardar los casos divergentes")
+    parser.add_argument("--replay", default=None, metavar="DIR", help="vuelve a ejecutar los casos guardados en DIR")
+    parser.add_argument("--no-shrink", action="store_true", help="no minimiza los casos divergentes")
+    args = parser.parse_args()
+
+    if args.replay:
+        failures = 0
+        for path, case in load_regressions(args.replay):
+            found = run_case(case)
+            print(f"{'✗' if found else '✓'} {path}")
+            if found is not None:
+                failures += 1
+                for line in found.describe():
+                    print("    " + line)
+        sys.exit(1 if failures else 0)
+
+    report = fuzz(args.cases, args.workers, args.seed, args.batch, args.max_instructions, not args.no_shrink)
+    print(f"{report.cases} casos en {report.wall_time:.1f} s ({report.cases_per_minute:,.0f} casos/min), "
+          f"{len(report.mismatches)} divergencias")
+    for mismatch in report.mismatches:
+        for line in mismatch.describe():
+            print("  " + line)
+        if args.corpus:
+            print(f"  → {save_regression(mismatch, args.corpus)}")
+    sys.exit(1 if report.mismatches else 0)
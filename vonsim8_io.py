@@ -0,0 +1,405 @@
+"""Periféricos mapeados en memoria: temporizador, UART sobre ficheros y controlador de interrupciones.
+
+Cada periférico es un modelo atómico pasivo salvo en su próximo evento programado (fin de cuenta del
+temporizador, llegada de un byte a la UART): entre eventos no tiene transiciones, y una UC que espera
+en HLT con la línea de interrupción conectada salta de una vez hasta ese evento. Los accesos desde la
+CPU llegan como peticiones de la memoria y se contestan en tiempo cero.
+
+Mapa por defecto (direcciones de un byte, accesibles con LOAD/STORE)::
+
+    0xF0 PIC_PENDING   0xF1 PIC_MASK
+    0xF4 TIMER_PERIOD  0xF5 TIMER_PRESCALE  0xF6 TIMER_CONTROL  0xF7 TIMER_STATUS  0xF8 TIMER_COUNT
+    0xFA UART_DATA     0xFB UART_STATUS
+"""
+import os
+from typing import Iterable
+
+from xdevs import INFINITY
+from xdevs.models import Atomic, Port
+
+from vonsim8 import TRACE_DELTEXT, TRACE_DELTINT, VonSim8System
+
+PIC_BASE = 0xF0
+TIMER_BASE = 0xF4
+UART_BASE = 0xFA
+
+TIMER_PERIOD, TIMER_PRESCALE, TIMER_CONTROL, TIMER_STATUS, TIMER_COUNT = range(5)
+TIMER_ENABLE = 0x01
+TIMER_PERIODIC = 0x02
+TIMER_EXPIRED = 0x01
+
+UART_DATA, UART_STATUS = range(2)
+UART_RX_READY = 0x01
+UART_TX_READY = 0x02
+UART_OVERRUN = 0x04
+
+PIC_PENDING, PIC_MASK = range(2)
+
+
+class Peripheral(Atomic):
+    """Base de los periféricos mapeados en memoria.
+
+    ``remaining`` es el tiempo hasta el próximo evento propio (``INFINITY`` si no hay ninguno): al
+    llegar se llama a ``expire``, que devuelve el retardo hasta el siguiente. Las subclases definen
+    ``size`` y los accesos ``io_read``/``io_write`` por desplazamiento.
+    """
+
+    __slots__ = ("trace", "irq_line", "request", "response", "irq", "remaining", "pending_response", "irq_request")
+    size = 1
+    state_fields = ("remaining", "pending_response", "irq_request")
+
+    def __init__(self, name: str, irq_line: int | None = None):
+        super().__init__(name)
+        self.trace = None
+        self.irq_line = irq_line
+
+        self.request = Port(tuple, name="request")
+        self.add_in_port(self.request)
+        self.response = Port(int, name="response")
+        self.add_out_port(self.response)
+        self.irq = Port(int, name="irq")
+        self.add_out_port(self.irq)
+
+        self.remaining = INFINITY
+        self.pending_response: int | None = None
+        self.irq_request = False
+
+    def initialize(self):
+        self.pending_response = None
+        self.irq_request = False
+        self.remaining = self.start()
+        self._schedule()
+
+    def start(self) -> float:
+        """Retardo hasta el primer evento al inicializar."""
+        return INFINITY
+
+    def expire(self) -> float:
+        """Evento programado; devuelve el retardo hasta el siguiente."""
+        return INFINITY
+
+    def io_read(self, offset: int) -> int:
+        return 0x00
+
+    def io_write(self, offset: int, value: int):
+        pass
+
+    def interrupt(self):
+        if self.irq_line is not None:
+            self.irq_request = True
+
+    def _schedule(self):
+        if self.pending_response is not None or self.irq_request:
+            self.activate("RESPONDING")
+        elif self.remaining == INFINITY:
+            self.passivate()
+        else:
+            self.hold_in("WAITING", self.remaining)
+
+    def deltext(self, e: float):
+        self.remaining -= e
+        for offset, value in self.request.values:
+            if self.trace is not None:
+                self.trace(TRACE_DELTEXT, offset)
+            if value is None:
+                self.pending_response = self.io_read(offset) & 0xFF
+            else:
+                self.io_write(offset, value)
+        self._schedule()
+
+    def deltint(self):
+        self.remaining -= self.sigma
+        self.pending_response = None
+        self.irq_request = False
+        if self.remaining <= 0:
+            self.remaining = self.expire()
+            if self.trace is not None:
+                self.trace(TRACE_DELTINT, int(min(self.remaining, 0xFFFF)))
+        self._schedule()
+
+    def lambdaf(self):
+        if self.pending_response is not None:
+            self.response.add(self.pending_response)
+        if self.irq_request:
+            self.irq.add(self.irq_line)
+
+    def exit(self):
+        pass
+
+
+class Timer(Peripheral):
+    """Temporizador programable: cuenta ``PERIOD`` ticks de ``2**PRESCALE`` ciclos (``PERIOD=0`` son 256).
+
+    ``CONTROL`` activa la cuenta (``TIMER_ENABLE``) y la repite (``TIMER_PERIODIC``); al escribirlo se
+    reinicia. Al vencer marca ``TIMER_EXPIRED`` en ``STATUS`` (cualquier escritura lo borra) y pide su
+    interrupción. ``COUNT`` devuelve los ticks restantes calculados a partir del tiempo transcurrido.
+    """
+
+    __slots__ = ("period", "prescale", "control", "status")
+    size = 5
+    state_fields = Peripheral.state_fields + ("period", "prescale", "control", "status")
+
+    def __init__(self, name: str = "TIMER", irq_line: int | None = 0):
+        super().__init__(name, irq_line)
+        self.period = 0
+        self.prescale = 0
+        self.control = 0
+        self.status = 0
+
+    @property
+    def period_cycles(self) -> int:
+        return (self.period or 0x100) << self.prescale
+
+    def start(self) -> float:
+        return self.period_cycles if self.control & TIMER_ENABLE else INFINITY
+
+    def expire(self) -> float:
+        self.status |= TIMER_EXPIRED
+        self.interrupt()
+        if self.control & TIMER_PERIODIC:
+            return self.period_cycles
+        self.control &= ~TIMER_ENABLE
+        return INFINITY
+
+    def io_read(self, offset: int) -> int:
+        if offset == TIMER_PERIOD:
+            return self.period
+        if offset == TIMER_PRESCALE:
+            return self.prescale
+        if offset == TIMER_CONTROL:
+            return self.control
+        if offset == TIMER_STATUS:
+            return self.status
+        if self.remaining == INFINITY:
+            return 0
+        return min(-(-int(self.remaining) >> self.prescale), 0xFF)
+
+    def io_write(self, offset: int, value: int):
+        if offset == TIMER_PERIOD:
+            self.period = value
+        elif offset == TIMER_PRESCALE:
+            self.prescale = value & 0x0F
+        elif offset == TIMER_CONTROL:
+            self.control = value & (TIMER_ENABLE | TIMER_PERIODIC)
+            self.remaining = self.start()
+        elif offset == TIMER_STATUS:
+            self.status = 0
+
+
+class Uart(Peripheral):
+    """UART simulada sobre ficheros locales.
+
+    Los bytes de ``input_path`` llegan a ``DATA`` uno cada ``rx_interval`` ciclos, marcando
+    ``UART_RX_READY`` y pidiendo interrupción; si llega uno sin haber leído el anterior se marca
+    ``UART_OVERRUN``. Escribir ``DATA`` añade el byte a ``output_path`` (o a ``transmitted``).
+    """
+
+    __slots__ = ("input_path", "output_path", "rx_interval", "rx_buffer", "rx_position", "rx_data", "status",
+                 "transmitted", "_output")
+    size = 2
+    state_fields = Peripheral.state_fields + ("rx_data", "status", "rx_position")
+
+    def __init__(self, name: str = "UART", input_path: str | os.PathLike | None = None,
+                 output_path: str | os.PathLike | None = None, rx_interval: int = 100,
+                 irq_line: int | None = 1):
+        super().__init__(name, irq_line)
+        self.input_path = input_path
+        self.output_path = output_path
+        self.rx_interval = rx_interval
+        self.rx_buffer = b""
+        self.rx_position = 0
+        self.rx_data = 0
+        self.status = UART_TX_READY
+        self.transmitted = bytearray()
+        self._output = None
+
+    def initialize(self):
+        if self.input_path is not None:
+            with open(self.input_path, "rb") as stream:
+                self.rx_buffer = stream.read()
+        if self.output_path is not None and self._output is None:
+            self._output = open(self.output_path, "wb")
+        self.rx_position = 0
+        self.status = UART_TX_READY
+        super().initialize()
+
+    def start(self) -> float:
+        return self.rx_interval if self.rx_position < len(self.rx_buffer) else INFINITY
+
+    def expire(self) -> float:
+        if self.status & UART_RX_READY:
+            self.status |= UART_OVERRUN
+        self.rx_data = self.rx_buffer[self.rx_position]
+        self.rx_position += 1
+        self.status |= UART_RX_READY
+        self.interrupt()
+        return self.start()
+
+    def io_read(self, offset: int) -> int:
+        if offset == UART_STATUS:
+            return self.status
+        self.status &= ~(UART_RX_READY | UART_OVERRUN)
+        return self.rx_data
+
+    def io_write(self, offset: int, value: int):
+        if offset == UART_DATA:
+            self.transmitted.append(value)
+            if self._output is not None:
+                self._output.write(bytes((value,)))
+
+    def exit(self):
+        if self._output is not None:
+            self._output.close()
+            self._output = None
+
+
+class InterruptController(Peripheral):
+    """Controlador de interrupciones de 8 líneas con salida por nivel hacia la UC.
+
+    Cada petición en ``irq_in`` (número de línea) marca su bit en ``PENDING``; escribir ``PENDING``
+    borra los bits a 1 (fin de interrupción) y ``MASK`` habilita líneas. ``intr`` cambia de nivel cuando
+    ``PENDING & MASK`` pasa de cero a distinto de cero o al revés.
+    """
+
+    __slots__ = ("irq_in", "intr", "pending", "mask", "level", "signal")
+    size = 2
+    state_fields = Peripheral.state_fields + ("pending", "mask", "level", "signal")
+
+    def __init__(self, name: str = "PIC"):
+        super().__init__(name)
+        self.irq_in = Port(int, name="irq_in")
+        self.add_in_port(self.irq_in)
+        self.intr = Port(bool, name="intr")
+        self.add_out_port(self.intr)
+        self.pending = 0
+        self.mask = 0
+        self.level = False
+        self.signal = False
+
+    def initialize(self):
+        self.pending = 0
+        self.mask = 0
+        self.level = False
+        self.signal = False
+        super().initialize()
+
+    def io_read(self, offset: int) -> int:
+        return self.pending if offset == PIC_PENDING else self.mask
+
+    def io_write(self, offset: int, value: int):
+        if offset == PIC_PENDING:
+            self.pending &= ~value
+        else:
+            self.mask = value
+
+    def _schedule(self):
+        super()._schedule()
+        active = bool(self.pending & self.mask)
+        if active != self.level:
+            self.level = active
+            self.signal = True
+        if self.signal:
+            self.activate("SIGNALING")
+
+    def deltext(self, e: float):
+        for line in self.irq_in.values:
+            self.pending |= 1 << line
+        super().deltext(e)
+
+    def deltint(self):
+        self.signal = False
+        super().deltint()
+
+    def lambdaf(self):
+        super().lambdaf()
+        if self.signal:
+            self.intr.add(self.level)
+
+
+def attach_devices(system: VonSim8System, devices: Iterable[tuple[int, Peripheral]],
+                   pic_base: int | None = PIC_BASE) -> InterruptController | None:
+    """Mapea ``(base, periférico)`` en ``system`` y, con ``pic_base``, añade un ``InterruptController``
+    conectado a la UC al que se acoplan las líneas de interrupción de los periféricos."""
+    pic = None
+    if pic_base is not None:
+        pic = InterruptController("PIC")
+        system.map_device(pic, pic_base)
+        system.connect_interrupt(pic.intr)
+    for base, device in devices:
+        system.map_device(device, base)
+        if device.irq_line is not None:
+            if pic is None:
+                raise ValueError(f"{device.name} usa la línea {device.irq_line} pero no hay controlador de interrupciones")
+            system.add_coupling(device.irq, pic.irq_in)
+    return pic
+
+
+DEMO_PROGRAM = """
+; Duerme en HLT hasta cada interrupción del temporizador, TICKS veces, y lo apaga con las
+; interrupciones enmascaradas para que el HLT final detenga la UC.
+PIC_PENDING     EQU 0xF0
+PIC_MASK        EQU 0xF1
+TIMER_PERIOD    EQU 0xF4
+TIMER_PRESCALE  EQU 0xF5
+TIMER_CONTROL   EQU 0xF6
+TIMER_STATUS    EQU 0xF7
+
+        LOAD AL, [periodo]
+        STORE [TIMER_PERIOD], AL
+        LOAD AL, [prescala]
+        STORE [TIMER_PRESCALE], AL
+        LOAD DL, [uno]
+        STORE [PIC_MASK], DL
+        LOAD AL, [control]
+        STORE [TIMER_CONTROL], AL
+        LOAD CL, [ticks]
+espera: HLT
+        STORE [TIMER_STATUS], AL
+        STORE [PIC_PENDING], DL
+        SUB CL, DL
+        JNZ espera
+        LOAD AL, [cero]
+        STORE [TIMER_CONTROL], AL
+        STORE [PIC_MASK], AL
+        HLT
+        .data
+cero:     DB 0
+uno:      DB 1
+control:  DB 3
+periodo:  DB {period}
+prescala: DB {prescale}
+ticks:    DB {ticks}
+"""
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    from vonsim8 import CPUSystem, Instrumentation, run_simulation
+    from vonsim8_asm import load_program
+
+    parser = argparse.ArgumentParser(description="Demostración de periféricos: la CPU duerme entre interrupciones")
+    parser.add_argument("--ticks", type=int, default=5, help="interrupciones del temporizador a esperar")
+    parser.add_argument("--period", type=int, default=250, help="periodo del temporizador en ticks (1-255)")
+    parser.add_argument("--prescale", type=int, default=8, help="cada tick dura 2**prescale ciclos")
+    args = parser.parse_args()
+
+    env = CPUSystem("VonSim8Environment")
+    system = env.vonsim8
+    load_program(system.mem, DEMO_PROGRAM.format(period=args.period, prescale=args.prescale, ticks=args.ticks))
+    attach_devices(system, [(TIMER_BASE, Timer())])
+
+    instrumentation = Instrumentation(phases=False)
+    start = time.perf_counter()
+    summary = run_simulation(env, "devs", None, instrumentation=instrumentation)
+    elapsed = time.perf_counter() - start
+    summary.coordinator.exit()
+
+    uc = system.uc
+    print(f"Instrucciones:        {summary.instructions}")
+    print(f"Ciclos de CPU:        {uc.total_cycles}")
+    print(f"Ciclos en espera:     {uc.idle_cycles}")
+    print(f"Transiciones DEVS:    {instrumentation.transitions}")
+    print(f"Transiciones TIMER:   {instrumentation.components['TIMER'].transitions}")
+    print(f"Tiempo real:          {elapsed * 1000:.2f} ms")
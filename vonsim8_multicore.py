@@ -0,0 +1,418 @@
+"""Sistemas multinúcleo: varios procesadores VonSim8 que comparten una ``Memory`` a través de un bus arbitrado.
+
+Cada núcleo (``CPUCore``) envía sus accesos a ``MemoryBus``, que ordena las peticiones simultáneas
+según la política de arbitraje y reserva el bus ``tenure`` ciclos por acceso. Al núcleo que no obtiene
+el bus en el acto se le avisan los ciclos de espera por ``mem_wait``, como hace ``Cache``: la UC alarga
+el micro-paso en curso y el acceso llega a la memoria cuando le toca. Con un solo núcleo y
+``tenure=1`` la temporización coincide con la de ``VonSim8System``.
+
+Uso::
+
+    python vonsim8_multicore.py --cores 1,2,4,8,16 --policy round-robin --instructions 200
+"""
+import functools
+import time
+from collections import deque
+from typing import Mapping, NamedTuple
+
+from xdevs import INFINITY
+from xdevs.models import Atomic, Coupled, Port
+from xdevs.sim import Coordinator
+
+from vonsim8 import CPUCore, Memory, ParallelCoordinator
+from vonsim8_bench import BENCHMARK_PROGRAM
+
+ARBITRATION_ROUND_ROBIN = "round-robin"
+ARBITRATION_PRIORITY = "priority"
+ARBITRATION_POLICIES = (ARBITRATION_ROUND_ROBIN, ARBITRATION_PRIORITY)
+
+
+class MemoryBus(Atomic):
+    """Bus de memoria compartido por ``cores`` núcleos, con arbitraje y estados de espera.
+
+    Cada núcleo ``i`` tiene sus puertos de entrada ``addr_i``/``rw_i``/``wr_i``/``data_in_i`` y de salida
+    ``data_out_i``/``wait_i``; hacia la memoria salen ``mem_addr``/``mem_rw``/``mem_wr``/``mem_data_out``
+    y su respuesta vuelve por ``mem_data``. Las peticiones que llegan juntas se ordenan por la política
+    (``round-robin`` rota la prioridad tras cada concesión, ``priority`` favorece al núcleo de menor
+    índice); cada una se concede en cuanto el bus queda libre y las lecturas se devuelven al núcleo que
+    las pidió en el orden de concesión.
+    """
+
+    __slots__ = ("cores", "policy", "tenure", "address_mask", "time", "free_at", "next_core", "pending_addr",
+                 "pending_read", "pending_write", "grants", "readers", "waits", "deliveries", "accesses",
+                 "stall_cycles", "busy_cycles", "addr_ports", "rw_ports", "wr_ports", "data_in_ports",
+                 "data_out_ports", "wait_ports", "mem_data", "mem_addr", "mem_rw", "mem_wr", "mem_data_out")
+    state_fields = ("time", "free_at", "next_core", "pending_addr", "pending_read", "pending_write", "grants",
+                    "readers", "waits", "deliveries", "accesses", "stall_cycles", "busy_cycles")
+
+    def __init__(self, name: str = "MEMBUS", cores: int = 2, policy: str = ARBITRATION_ROUND_ROBIN,
+                 tenure: int = 1, address_mask: int = 0xFF):
+        super().__init__(name)
+        if policy not in ARBITRATION_POLICIES:
+            raise ValueError(f"Política de arbitraje desconocida: {policy} "
+                             f"(opciones: {', '.join(ARBITRATION_POLICIES)})")
+        if tenure < 1:
+            raise ValueError("Cada acceso debe ocupar el bus al menos un ciclo")
+        self.cores = cores
+        self.policy = policy
+        self.tenure = tenure
+        self.address_mask = address_mask
+        self._reset()
+
+        self.addr_ports = tuple(Port(int, name=f"addr_{core}") for core in range(cores))
+        self.rw_ports = tuple(Port(bool, name=f"rw_{core}") for core in range(cores))
+        self.wr_ports = tuple(Port(bool, name=f"wr_{core}") for core in range(cores))
+        self.data_in_ports = tuple(Port(int, name=f"data_in_{core}") for core in range(cores))
+        self.data_out_ports = tuple(Port(int, name=f"data_out_{core}") for core in range(cores))
+        self.wait_ports = tuple(Port(int, name=f"wait_{core}") for core in range(cores))
+        for ports in zip(self.addr_ports, self.rw_ports, self.wr_ports, self.data_in_ports):
+            for port in ports:
+                self.add_in_port(port)
+        for ports in zip(self.data_out_ports, self.wait_ports):
+            for port in ports:
+                self.add_out_port(port)
+        self.mem_data = Port(int, name="mem_data")
+        self.add_in_port(self.mem_data)
+
+        self.mem_addr = Port(int, name="mem_addr")
+        self.add_out_port(self.mem_addr)
+        self.mem_rw = Port(bool, name="mem_rw")
+        self.add_out_port(self.mem_rw)
+        self.mem_wr = Port(bool, name="mem_wr")
+        self.add_out_port(self.mem_wr)
+        self.mem_data_out = Port(int, name="mem_data_out")
+        self.add_out_port(self.mem_data_out)
+
+    def _reset(self):
+        self.time = 0.0
+        self.free_at = 0.0
+        self.next_core = 0
+        self.pending_addr: list[int | None] = [None] * self.cores
+        self.pending_read = [False] * self.cores
+        self.pending_write = [False] * self.cores
+        self.grants: deque[tuple[float, int, int, int | None]] = deque()
+        self.readers: deque[int] = deque()
+        self.waits: list[tuple[int, int]] = []
+        self.deliveries: list[tuple[int, int]] = []
+        self.accesses = [0] * self.cores
+        self.stall_cycles = [0] * self.cores
+        self.busy_cycles = 0
+
+    def initialize(self):
+        self._reset()
+        self.passivate()
+
+    def _arbitrate(self, requests: list[tuple[int, int, int | None]]):
+        """Concede el bus a las peticiones ``(núcleo, dirección, valor)`` llegadas en el mismo instante."""
+        if self.policy == ARBITRATION_ROUND_ROBIN and len(requests) > 1:
+            first = self.next_core
+            cores = self.cores
+            requests.sort(key=lambda request: (request[0] - first) % cores)
+        for core, address, value in requests:
+            start = self.free_at if self.free_at > self.time else self.time
+            self.free_at = start + self.tenure
+            self.grants.append((start, core, address, value))
+            self.accesses[core] += 1
+            self.busy_cycles += self.tenure
+            wait = int(start - self.time)
+            if wait:
+                self.waits.append((core, wait))
+                self.stall_cycles[core] += wait
+        self.next_core = (requests[-1][0] + 1) % self.cores
+
+    def _schedule(self):
+        if self.waits or self.deliveries:
+            self.activate("GRANTING")
+        elif self.grants:
+            self.hold_in("BUSY", self.grants[0][0] - self.time)
+        else:
+            self.passivate()
+
+    def deltext(self, e: float):
+        self.continuef(e)
+        self.time += e
+
+        requests = []
+        for core in range(self.cores):
+            if self.addr_ports[core]:
+                self.pending_addr[core] = self.addr_ports[core].get() & self.address_mask
+            if self.rw_ports[core]:
+                self.pending_read[core] = self.rw_ports[core].get()
+            if self.wr_ports[core]:
+                self.pending_write[core] = self.wr_ports[core].get()
+            address = self.pending_addr[core]
+            if address is None:
+                continue
+            if self.pending_read[core]:
+                requests.append((core, address, None))
+            elif self.pending_write[core] and self.data_in_ports[core]:
+                requests.append((core, address, self.data_in_ports[core].get()))
+            else:
+                continue
+            self.pending_addr[core] = None
+            self.pending_read[core] = False
+            self.pending_write[core] = False
+        if requests:
+            self._arbitrate(requests)
+
+        if self.mem_data:
+            self.deliveries.append((self.readers.popleft(), self.mem_data.get()))
+
+        if requests or self.deliveries:
+            self._schedule()
+
+    def deltint(self):
+        self.time += self.sigma
+        self.waits.clear()
+        self.deliveries.clear()
+        if self.grants and self.grants[0][0] <= self.time:
+            _, core, _, value = self.grants.popleft()
+            if value is None:
+                self.readers.append(core)
+        self._schedule()
+
+    def lambdaf(self):
+        for core, wait in self.waits:
+            self.wait_ports[core].add(wait)
+        for core, value in self.deliveries:
+            self.data_out_ports[core].add(value)
+        if self.grants and self.grants[0][0] <= self.time + self.sigma:
+            _, _, address, value = self.grants[0]
+            self.mem_addr.add(address)
+            if value is None:
+                self.mem_rw.add(True)
+            else:
+                self.mem_wr.add(True)
+                self.mem_data_out.add(value)
+
+    def exit(self):
+        pass
+
+
+class MultiCoreSystem(Coupled):
+    """Modelo acoplado con ``cores`` núcleos ``CPUCore`` que comparten una ``Memory`` por un ``MemoryBus``.
+
+    Todos los núcleos empiezan en la dirección 0 salvo que se indique otra en ``entry_points``. La
+    jerarquía se aplana al construir (``flatten``) para que un único coordinador recorra todos los
+    modelos atómicos; ``cores``, ``mem`` y ``bus`` siguen dando acceso a cada parte.
+    """
+
+    def __init__(self, name: str = "VonSim8MP", cores: int = 2, address_bits: int = 8,
+                 cycle_costs: Mapping[str, int] | None = None, pipelined: bool = False,
+                 policy: str = ARBITRATION_ROUND_ROBIN, tenure: int = 1,
+                 entry_points: tuple[int, ...] | None = None, flatten: bool = True):
+        super().__init__(name)
+        if cores < 1:
+            raise ValueError("Hace falta al menos un núcleo")
+
+        self.mem = Memory("MEM", address_bits)
+        self.bus = MemoryBus("MEMBUS", cores, policy, tenure, self.mem.address_mask)
+        self.cores = tuple(CPUCore(f"CORE{index}", self.mem.address_mask, cycle_costs, pipelined)
+                           for index in range(cores))
+        if entry_points is not None:
+            for core, entry in zip(self.cores, entry_points, strict=True):
+                core.ip.value = entry & self.mem.address_mask
+
+        self.add_component(self.mem)
+        self.add_component(self.bus)
+        for core in self.cores:
+            self.add_component(core)
+
+        bus = self.bus
+        for index, core in enumerate(self.cores):
+            self.add_coupling(core.mem_addr, bus.addr_ports[index])
+            self.add_coupling(core.mem_rw, bus.rw_ports[index])
+            self.add_coupling(core.mem_wr, bus.wr_ports[index])
+            self.add_coupling(core.mem_data_out, bus.data_in_ports[index])
+            self.add_coupling(bus.data_out_ports[index], core.mem_data_in)
+            self.add_coupling(bus.wait_ports[index], core.mem_wait)
+        self.add_coupling(bus.mem_addr, self.mem.addr)
+        self.add_coupling(bus.mem_rw, self.mem.rw)
+        self.add_coupling(bus.mem_wr, self.mem.wr)
+        self.add_coupling(bus.mem_data_out, self.mem.data_in)
+        self.add_coupling(self.mem.data_out, bus.mem_data)
+
+        if flatten:
+            self.flatten()
+
+
+class MultiCoreSummary(NamedTuple):
+    """Resultado de ``run_multicore``: contadores por núcleo y del bus."""
+    policy: str
+    cycles: int
+    instructions: tuple[int, ...]
+    core_cycles: tuple[int, ...]
+    stall_cycles: tuple[int, ...]
+    accesses: tuple[int, ...]
+    bus_busy_cycles: int
+    wall_time: float
+
+    @property
+    def throughput(self) -> float:
+        """Instrucciones por ciclo del conjunto de núcleos."""
+        return sum(self.instructions) / self.cycles if self.cycles else 0.0
+
+    @property
+    def cpi(self) -> tuple[float, ...]:
+        return tuple(cycles / count if count else 0.0 for cycles, count in zip(self.core_cycles, self.instructions))
+
+    @property
+    def bus_utilization(self) -> float:
+        return self.bus_busy_cycles / self.cycles if self.cycles else 0.0
+
+    def report(self) -> list[str]:
+        lines = [f"{len(self.instructions)} núcleos ({self.policy}): {sum(self.instructions)} instrucciones en "
+                 f"{self.cycles} ciclos, {self.throughput:.3f} instrucciones/ciclo",
+                 f"Bus: {self.bus_utilization:.1%} ocupado ({self.bus_busy_cycles} ciclos, "
+                 f"{sum(self.accesses)} accesos), {sum(self.stall_cycles)} ciclos de espera por contención",
+                 f"{'Núcleo':<8} {'instr.':>8} {'ciclos':>8} {'CPI':>7} {'accesos':>8} {'espera':>8}"]
+        for index, (count, cycles, cpi, accesses, stalls) in enumerate(
+                zip(self.instructions, self.core_cycles, self.cpi, self.accesses, self.stall_cycles)):
+            lines.append(f"CORE{index:<4} {count:>8} {cycles:>8} {cpi:>7.2f} {accesses:>8} {stalls:>8}")
+        return lines
+
+
+class ActiveSetCoordinator(Coordinator):
+    """Coordinador para modelos aplanados que en cada iteración solo visita los simuladores activos.
+
+    ``Coordinator`` recorre todos los simuladores para λ, δ y la limpieza de puertos aunque casi todos
+    los núcleos estén a mitad de un micro-paso. Aquí λ se pide a los simuladores cuyo ``time_next`` es el
+    instante actual, y δ y la limpieza solo tocan a esos y a los que reciben mensajes, en el mismo orden
+    que ``Coordinator``, de modo que los resultados son idénticos.
+    """
+
+    def _build_hierarchy(self):
+        super()._build_hierarchy()
+        if self.coordinators:
+            raise ValueError("ActiveSetCoordinator necesita un modelo aplanado (sin acoplados anidados)")
+        self.order = {simulator: index for index, simulator in enumerate(self.simulators)}
+        self.owners = {port: simulator for simulator in self.simulators for port in simulator.model.in_ports}
+        self.active = []
+
+    def ta(self):
+        return min((simulator.time_next for simulator in self.simulators), default=INFINITY) - self.clock.time
+
+    def lambdaf(self):
+        now = self.clock.time
+        couplings = self.model.ic
+        outputs = self.model.eoc
+        owners = self.owners
+        active = {}
+        for simulator in self.simulators:
+            if simulator.time_next != now:
+                continue
+            active[simulator] = None
+            simulator.model.lambdaf()
+            for port in simulator.model.used_out_ports:
+                for coupling in couplings.get(port, {}).values():
+                    coupling.propagate()
+                    active[owners[coupling.port_to]] = None
+                for coupling in outputs.get(port, {}).values():
+                    coupling.propagate()
+        self.active = sorted(active, key=self.order.__getitem__)
+
+    def deltfcn(self):
+        self.propagate_input()
+        for port in self.model.used_in_ports:
+            for coupling in self.model.eic.get(port, {}).values():
+                self.active.append(self.owners[coupling.port_to])
+        for simulator in self.active:
+            simulator.deltfcn()
+        self.trigger_event_transducers()
+        self.time_last = self.clock.time
+        self.time_next = self.time_last + self.ta()
+
+    def clear(self):
+        for simulator in self.active:
+            simulator.clear()
+        self.active = []
+        for port in self.model.in_ports:
+            port.clear()
+        for port in self.model.out_ports:
+            port.clear()
+
+
+def run_multicore(system: MultiCoreSystem, max_instructions: int | None = 100_000,
+                  coordinator_class: type[Coordinator] = ActiveSetCoordinator) -> MultiCoreSummary:
+    """Simula ``system`` hasta que cada núcleo se detiene en HLT o completa ``max_instructions``.
+
+    Los núcleos que llegan antes al límite siguen ejecutando mientras terminan los demás, como en una
+    máquina real; sus contadores incluyen esas instrucciones.
+    """
+    limit = max_instructions if max_instructions is not None else 1 << 62
+    ucs = [core.uc for core in system.cores]
+    start = time.perf_counter()
+    coord = coordinator_class(system)
+    coord.initialize()
+    while coord.time_next != INFINITY:
+        coord.simulate(num_iters=1)
+        if all(uc.halted or uc.instruction_count > limit or (uc.instruction_count == limit and uc.micro_step == 0)
+               for uc in ucs):
+            break
+    while coord.time_next == coord.time_last:
+        coord.simulate(num_iters=1)
+    coord.exit()
+    wall_time = time.perf_counter() - start
+    bus = system.bus
+    return MultiCoreSummary(bus.policy, max(uc.total_cycles for uc in ucs),
+                            tuple(uc.instruction_count for uc in ucs), tuple(uc.total_cycles for uc in ucs),
+                            tuple(bus.stall_cycles), tuple(bus.accesses), bus.busy_cycles, wall_time)
+
+
+def scaling(core_counts, instructions: int = 200, policy: str = ARBITRATION_ROUND_ROBIN, tenure: int = 1,
+            image: bytes = BENCHMARK_PROGRAM, coordinator_class: type[Coordinator] = ActiveSetCoordinator,
+            **options) -> list[MultiCoreSummary]:
+    """Ejecuta ``image`` en sistemas de cada número de núcleos de ``core_counts`` (todos con el mismo programa)."""
+    summaries = []
+    for cores in core_counts:
+        system = MultiCoreSystem(cores=cores, policy=policy, tenure=tenure, **options)
+        system.mem.load_image(image)
+        summaries.append(run_multicore(system, instructions, coordinator_class))
+    return summaries
+
+
+def scaling_table(summaries: list[MultiCoreSummary]) -> list[str]:
+    lines = [f"{'núcleos':>7} {'ciclos':>8} {'instr.':>8} {'IPC':>7} {'acel.':>6} {'bus':>6} {'espera/instr.':>14} "
+             f"{'µs/instr.':>10}"]
+    base = summaries[0].throughput if summaries else 0.0
+    for summary in summaries:
+        count = sum(summary.instructions)
+        lines.append(f"{len(summary.instructions):>7} {summary.cycles:>8} {count:>8} {summary.throughput:>7.3f} "
+                     f"{summary.throughput / base if base else 0.0:>6.2f} {summary.bus_utilization:>6.1%} "
+                     f"{sum(summary.stall_cycles) / count if count else 0.0:>14.2f} "
+                     f"{summary.wall_time * 1e6 / count if count else 0.0:>10.1f}")
+    return lines
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Escalado de un sistema VonSim8 multinúcleo con memoria compartida")
+    parser.add_argument("--cores", default="1,2,4,8,16", help="números de núcleos a comparar, separados por comas")
+    parser.add_argument("--policy", choices=ARBITRATION_POLICIES, default=ARBITRATION_ROUND_ROBIN,
+                        help="política de arbitraje del bus")
+    parser.add_argument("--tenure", type=int, default=1, help="ciclos que ocupa el bus cada acceso")
+    parser.add_argument("--instructions", type=int, default=200, help="instrucciones por núcleo")
+    parser.add_argument("--image", default=None, help="imagen binaria a cargar (por defecto, un bucle LOAD/STORE)")
+    parser.add_argument("--pipeline", action="store_true", help="núcleos con UC segmentada")
+    parser.add_argument("--detail", action="store_true", help="muestra los contadores por núcleo de cada sistema")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="hilos de ParallelCoordinator (0: ActiveSetCoordinator secuencial)")
+    args = parser.parse_args()
+
+    program = BENCHMARK_PROGRAM
+    if args.image is not None:
+        with open(args.image, "rb") as handle:
+            program = handle.read()
+    coordinator = ActiveSetCoordinator
+    if args.workers:
+        coordinator = functools.partial(ParallelCoordinator, workers=args.workers, min_parallel=args.workers)
+    results = scaling([int(count) for count in args.cores.split(",")], args.instructions, args.policy,
+                      args.tenure, program, coordinator, pipelined=args.pipeline)
+    for line in scaling_table(results):
+        print(line)
+    if args.detail:
+        for result in results:
+            print()
+            for line in result.report():
+                print(line)
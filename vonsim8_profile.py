@@ -0,0 +1,270 @@
+"""Perfilador del programa simulado: dónde pasa el tiempo el código VonSim8, no el intérprete de Python.
+
+``GuestProfiler`` se pasa a ``run_simulation(profiler=...)`` y recibe la dirección de cada instrucción
+ejecutada. Con los contadores que ya lleva la ``ControlUnit`` (``total_cycles``, ``fetch_cycles``,
+``execute_cycles``) atribuye a esa dirección sus ciclos totales, de FETCH y de EXECUTE, y con la imagen
+en memoria cuenta los bytes leídos al buscar la instrucción, las lecturas y escrituras de datos de
+LOAD/STORE y los saltos tomados hacia atrás (bucles; el repertorio no tiene llamadas). Todo se guarda en
+``array`` preasignados indexados por dirección, así que cada instrucción cuesta unas pocas escrituras.
+
+Salidas: un informe ordenado por ciclos (``report``), mapas de calor de la memoria (``heatmap``) y un
+fichero de pilas plegadas para flamegraph.pl / speedscope (``write_collapsed``), con los bucles como
+marcos anidados.
+
+Uso::
+
+    python vonsim8_profile.py programa.asm --instructions 100000 --collapsed perfil.folded
+"""
+from array import array
+from typing import NamedTuple
+
+from vonsim8 import INSTRUCTION_SET, JUMP_CONDITIONS, OP_LOAD, OP_STORE, describe_instruction
+
+HEAT_LEVELS = " .:-=+*#%@"
+HEAT_COLUMNS = 16
+
+
+class Loop(NamedTuple):
+    """Bucle detectado por un salto hacia atrás de ``tail`` a ``head``."""
+    head: int
+    tail: int
+    iterations: int
+    cycles: int
+
+
+class GuestProfiler:
+    """Contadores por dirección del programa simulado sobre ``array`` de tamaño fijo.
+
+    ``attach`` dimensiona los arrays para la memoria del sistema; ``record(address)`` se llama tras cada
+    instrucción con la dirección en la que empezó, y ``record_block`` tras cada bloque del motor ``bbt``.
+    ``symbols`` (p. ej. ``AssembledProgram.symbols``) da nombre a las direcciones en el informe y en las
+    pilas.
+    """
+
+    def __init__(self, symbols: dict[str, int] | None = None):
+        self.labels = {address: name for name, address in (symbols or {}).items()}
+        self.system = None
+        self.size = 0
+        self.address_mask = 0
+        self.instructions = 0
+        self.total_cycles = 0
+
+    def attach(self, system):
+        """Prepara los arrays para ``system`` (``VonSim8System``) y toma sus contadores actuales como base."""
+        self.system = system
+        memory = system.mem
+        if memory.size != self.size:
+            self.size = memory.size
+            self.address_mask = memory.address_mask
+            self.counts = array("Q", bytes(8 * self.size))
+            self.cycles = array("Q", bytes(8 * self.size))
+            self.fetch = array("Q", bytes(8 * self.size))
+            self.execute = array("Q", bytes(8 * self.size))
+            self.fetch_reads = array("Q", bytes(8 * self.size))
+            self.data_reads = array("Q", bytes(8 * self.size))
+            self.data_writes = array("Q", bytes(8 * self.size))
+            self.back_edges = array("Q", bytes(8 * self.size))
+            self.back_targets = array("q", [-1]) * self.size
+        uc = system.uc
+        self.last_total = uc.total_cycles
+        self.last_fetch = uc.fetch_cycles
+        self.last_execute = uc.execute_cycles
+
+    def record(self, address: int):
+        """Atribuye a ``address`` la instrucción que acaba de ejecutarse."""
+        system = self.system
+        uc = system.uc
+        storage = system.mem.storage
+        total, fetch, execute = uc.total_cycles, uc.fetch_cycles, uc.execute_cycles
+        self._account(address, total - self.last_total, fetch - self.last_fetch, execute - self.last_execute,
+                      storage[address], storage[(address + 1) & self.address_mask], system.ip.value)
+        self.last_total, self.last_fetch, self.last_execute = total, fetch, execute
+
+    def record_block(self, block, count: int, fetch_cost: int, next_ip: int):
+        """Atribuye las ``count`` primeras instrucciones de un ``TranslatedBlock`` de ``BlockTranslator``.
+
+        Los ciclos salen de ``block.execute_prefix`` y los opcodes y operandos del código traducido, así
+        que no hace falta volcar los contadores en la UC ni releer una memoria que el bloque pudo
+        modificar. ``next_ip`` es la dirección siguiente al bloque.
+        """
+        code = block.code
+        prefix = block.execute_prefix
+        position = 0
+        for index in range(count):
+            execute = prefix[index + 1] - prefix[index]
+            opcode = code[position]
+            operand = code[position + 1] if position + 1 < len(code) else 0
+            self._account(block.starts[index], fetch_cost + execute, fetch_cost, execute, opcode, operand,
+                          next_ip)
+            position += INSTRUCTION_SET.get(opcode, {}).get("size", 1)
+        self.last_total += fetch_cost * count + prefix[count]
+        self.last_fetch += fetch_cost * count
+        self.last_execute += prefix[count]
+
+    def _account(self, address: int, cycles: int, fetch: int, execute: int, opcode: int, operand: int,
+                 next_ip: int):
+        mask = self.address_mask
+        self.counts[address] += 1
+        self.cycles[address] += cycles
+        self.fetch[address] += fetch
+        self.execute[address] += execute
+        self.instructions += 1
+
+        fetch_reads = self.fetch_reads
+        fetch_reads[address] += 1
+        if INSTRUCTION_SET.get(opcode, {}).get("size", 1) == 2:
+            fetch_reads[(address + 1) & mask] += 1
+            if OP_LOAD <= opcode < OP_LOAD + 4:
+                self.data_reads[operand & mask] += 1
+            elif OP_STORE <= opcode < OP_STORE + 4:
+                self.data_writes[operand & mask] += 1
+            elif opcode in JUMP_CONDITIONS:
+                if next_ip == operand & mask and next_ip <= address:
+                    self.back_edges[address] += 1
+                    self.back_targets[address] = next_ip
+
+    def label(self, address: int) -> str:
+        name = self.labels.get(address)
+        return f"{address:#04x} {name}" if name else f"{address:#04x}"
+
+    def instruction_text(self, address: int) -> str:
+        storage = self.system.mem.storage
+        opcode = storage[address]
+        text = describe_instruction(opcode)
+        if INSTRUCTION_SET.get(opcode, {}).get("size", 1) == 2:
+            text = text.replace("[addr]", f"[{storage[(address + 1) & self.address_mask]:#04x}]")
+            text = text.replace("addr", f"{storage[(address + 1) & self.address_mask]:#04x}")
+        return text
+
+    def loops(self) -> list[Loop]:
+        """Bucles por ciclos dentro de ``[head, tail]``, de más a menos costosos."""
+        loops = []
+        for tail in range(self.size):
+            iterations = self.back_edges[tail]
+            if iterations:
+                head = self.back_targets[tail]
+                loops.append(Loop(head, tail, iterations, sum(self.cycles[head:tail + 1])))
+        loops.sort(key=lambda loop: loop.cycles, reverse=True)
+        return loops
+
+    def hotspots(self, limit: int | None = None) -> list[int]:
+        """Direcciones ejecutadas ordenadas por ciclos atribuidos."""
+        addresses = [address for address in range(self.size) if self.counts[address]]
+        addresses.sort(key=lambda address: self.cycles[address], reverse=True)
+        return addresses[:limit] if limit is not None else addresses
+
+    def report(self, limit: int = 20) -> list[str]:
+        total = sum(self.cycles) or 1
+        fetch = sum(self.fetch)
+        execute = sum(self.execute)
+        lines = [f"{self.instructions} instrucciones, {sum(self.cycles)} ciclos (FETCH {fetch}, EXECUTE {execute})",
+                 f"{'Dirección':<14} {'Instrucción':<16} {'veces':>9} {'ciclos':>10} {'%':>6} {'FETCH':>9} "
+                 f"{'EXECUTE':>9} {'CPI':>6}"]
+        for address in self.hotspots(limit):
+            count = self.counts[address]
+            cycles = self.cycles[address]
+            lines.append(f"{self.label(address):<14} {self.instruction_text(address):<16} {count:>9} {cycles:>10} "
+                         f"{cycles / total:>6.1%} {self.fetch[address]:>9} {self.execute[address]:>9} "
+                         f"{cycles / count:>6.2f}")
+        loops = self.loops()
+        if loops:
+            lines.append("Bucles (salto hacia atrás):")
+            for loop in loops[:limit]:
+                lines.append(f"  {self.label(loop.head)} .. {loop.tail:#04x}: {loop.iterations} iteraciones, "
+                             f"{loop.cycles} ciclos ({loop.cycles / total:.1%})")
+        data = [address for address in range(self.size) if self.data_reads[address] or self.data_writes[address]]
+        if data:
+            data.sort(key=lambda address: self.data_reads[address] + self.data_writes[address], reverse=True)
+            lines.append("Datos más accedidos:")
+            for address in data[:limit]:
+                lines.append(f"  {self.label(address)}: {self.data_reads[address]} lecturas, "
+                             f"{self.data_writes[address]} escrituras")
+        return lines
+
+    def heatmap(self, kind: str = "data") -> list[str]:
+        """Mapa de calor de ``HEAT_COLUMNS`` direcciones por fila: ``data`` (LOAD/STORE), ``fetch`` o ``cycles``.
+
+        Solo se muestran las filas con algún acceso; la escala es logarítmica hasta el máximo.
+        """
+        if kind == "data":
+            values = [reads + writes for reads, writes in zip(self.data_reads, self.data_writes)]
+        elif kind == "fetch":
+            values = self.fetch_reads
+        elif kind == "cycles":
+            values = self.cycles
+        else:
+            raise ValueError(f"Mapa desconocido: {kind} (opciones: data, fetch, cycles)")
+        peak = max(values, default=0)
+        if not peak:
+            return []
+        scale = (len(HEAT_LEVELS) - 1) / peak.bit_length()
+        lines = ["      " + "".join(f"{column:X}" for column in range(HEAT_COLUMNS))]
+        for row in range(0, self.size, HEAT_COLUMNS):
+            cells = values[row:row + HEAT_COLUMNS]
+            if any(cells):
+                lines.append(f"{row:#06x} " + "".join(HEAT_LEVELS[min(len(HEAT_LEVELS) - 1,
+                                                                      round(value.bit_length() * scale))]
+                                                      if value else " " for value in cells))
+        return lines
+
+    def collapsed_stacks(self, root: str = "programa") -> list[str]:
+        """Pilas plegadas ``raíz;bucle;...;instrucción ciclos``; los bucles más amplios van por fuera."""
+        loops = sorted(self.loops(), key=lambda loop: (loop.head, -loop.tail))
+        lines = []
+        for address in range(self.size):
+            cycles = self.cycles[address]
+            if not cycles:
+                continue
+            frames = [root]
+            for loop in loops:
+                if loop.head <= address <= loop.tail:
+                    frames.append(f"bucle {self.label(loop.head)}..{loop.tail:#04x}")
+            frames.append(f"{self.label(address)} {self.instruction_text(address)}")
+            lines.append(";".join(frame.replace(";", ",") for frame in frames) + f" {cycles}")
+        return lines
+
+    def write_collapsed(self, path) -> int:
+        lines = self.collapsed_stacks()
+        with open(path, "w", encoding="utf-8") as stream:
+            for line in lines:
+                stream.write(line + "\n")
+        return len(lines)
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    from vonsim8 import ENGINES, VonSim8System, run_simulation
+    from vonsim8_asm import load_program
+
+    parser = argparse.ArgumentParser(description="Perfil del programa simulado en VonSim8")
+    parser.add_argument("program", help="fuente .asm o imagen (.bin raw, .hex Intel HEX)")
+    parser.add_argument("--engine", choices=ENGINES, default="devs", help="motor de simulación")
+    parser.add_argument("--instructions", type=int, default=100_000, help="límite de instrucciones")
+    parser.add_argument("--pipeline", action="store_true", help="UC segmentada")
+    parser.add_argument("--top", type=int, default=20, help="filas de cada tabla del informe")
+    parser.add_argument("--heatmap", choices=("data", "fetch", "cycles"), default="data",
+                        help="mapa de calor a mostrar")
+    parser.add_argument("--collapsed", default=None, metavar="FICHERO",
+                        help="escribe las pilas plegadas para flamegraph.pl o speedscope")
+    args = parser.parse_args()
+
+    system = VonSim8System(pipelined=args.pipeline)
+    symbols = None
+    if args.program.lower().endswith(".asm"):
+        symbols = load_program(system.mem, args.program).symbols
+    else:
+        system.mem.load_file(args.program)
+    profiler = GuestProfiler(symbols)
+    start = time.perf_counter()
+    run_simulation(system, args.engine, args.instructions, profiler=profiler)
+    elapsed = time.perf_counter() - start
+    for line in profiler.report(args.top):
+        print(line)
+    print(f"Mapa de calor ({args.heatmap}):")
+    for line in profiler.heatmap(args.heatmap):
+        print(line)
+    if args.collapsed:
+        print(f"{profiler.write_collapsed(args.collapsed)} pilas en {args.collapsed}")
+    print(f"Tiempo de reloj: {elapsed:.2f} s")
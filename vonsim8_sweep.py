@@ -0,0 +1,114 @@
+"""Barridos de programas y parámetros sobre ``VonSim8System`` repartidos en un pool de procesos.
+
+Cada configuración (imagen de programa, registros iniciales, tabla de costes por fase, UC secuencial o
+segmentada y cachés) se simula en un worker de ``ProcessPoolExecutor`` y vuelve como un registro
+compacto. Cada worker guarda una ``SystemTemplate`` por combinación de parámetros de construcción y
+clona el sistema en cada ejecución. ``sweep`` entrega los resultados en el orden de entrada y nunca
+mantiene más de ``max_pending`` lotes en vuelo, de modo que la memoria usada no depende de la longitud
+del barrido.
+"""
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Iterable, Iterator, Mapping, NamedTuple
+
+from vonsim8 import (REGISTER_NAMES, CacheConfig, Instrumentation, RunSummary, SystemTemplate, VonSim8System,
+                     run_simulation)
+
+_templates: dict[tuple, SystemTemplate] = {}
+
+
+class SweepConfig(NamedTuple):
+    """Configuración de una ejecución del barrido."""
+    image: bytes
+    registers: Mapping[str, int] | None = None
+    cycle_costs: Mapping[str, int] | None = None
+    engine: str = "devs"
+    max_instructions: int = 100_000
+    address_bits: int = 8
+    pipelined: bool = False
+    cache: CacheConfig | None = None
+    dcache: CacheConfig | None = None
+
+
+class SweepResult(NamedTuple):
+    """Resultado compacto de una configuración: estado final, ciclos, eventos, tiempo de reloj y, por
+    caché, la tasa de aciertos y el AMAT."""
+    index: int
+    registers: tuple[int, ...]
+    ip: int
+    flags: int
+    halted: bool
+    instructions: int
+    total_cycles: int
+    fetch_cycles: int
+    execute_cycles: int
+    events: int
+    wall_time: float
+    cache_stats: tuple[tuple[float, float], ...] = ()
+
+
+def template_for(config: SweepConfig) -> SystemTemplate:
+    """Plantilla del proceso para los parámetros de construcción de ``config`` (se crea la primera vez)."""
+    costs = tuple(sorted(config.cycle_costs.items())) if config.cycle_costs else None
+    key = (config.address_bits, costs, config.pipelined, config.cache, config.dcache)
+    template = _templates.get(key)
+    if template is None:
+        template = _templates[key] = SystemTemplate(config.address_bits, config.cycle_costs, config.pipelined,
+                                                    config.cache, config.dcache)
+    return template
+
+
+def simulate_config(config: SweepConfig) -> tuple[VonSim8System, RunSummary, Instrumentation]:
+    """Clona un sistema de la plantilla de ``config``, carga la imagen y los registros y lo ejecuta hasta HLT."""
+    system = template_for(config).instantiate()
+    system.mem.load_image(config.image)
+    for name, value in (config.registers or {}).items():
+        getattr(system.reg_bank, name.lower()).value = value & 0xFF
+
+    instrumentation = Instrumentation(phases=False)
+    summary = run_simulation(system, config.engine, config.max_instructions, instrumentation=instrumentation)
+    if summary.coordinator is not None:
+        summary.coordinator.exit()
+    return system, summary, instrumentation
+
+
+def run_config(config: SweepConfig, index: int = 0) -> SweepResult:
+    """Ejecuta ``config`` con ``simulate_config`` y resume el resultado."""
+    start = time.perf_counter()
+    system, summary, instrumentation = simulate_config(config)
+    return SweepResult(index, tuple(getattr(system.reg_bank, name.lower()).value for name in REGISTER_NAMES),
+                       system.ip.value, system.alu.flags, system.uc.halted, summary.instructions,
+                       summary.total_cycles, summary.fetch_cycles, summary.execute_cycles,
+                       instrumentation.transitions, time.perf_counter() - start,
+                       tuple((model.hit_rate, model.amat) for model in system.cache.models)
+                       if system.cache is not None else ())
+
+
+def _run_chunk(chunk: list[tuple[int, SweepConfig]]) -> list[SweepResult]:
+    return [run_config(config, index) for index, config in chunk]
+
+
+def sweep(configs: Iterable[SweepConfig], max_workers: int | None = None, chunksize: int = 1,
+          max_pending: int | None = None) -> Iterator[SweepResult]:
+    """Ejecuta ``configs`` en paralelo y entrega los resultados en el mismo orden.
+
+    Las configuraciones se consumen de forma perezosa en lotes de ``chunksize``; como mucho hay
+    ``max_pending`` lotes enviados sin recoger (por defecto, dos por worker).
+    """
+    workers = max_workers or os.cpu_count() or 1
+    max_pending = max_pending or 2 * workers
+    numbered = enumerate(configs)
+    pending = deque()
+    executor = ProcessPoolExecutor(workers)
+    try:
+        while chunk := list(islice(numbered, chunksize)):
+            if len(pending) >= max_pending:
+                yield from pending.popleft().result()
+            pending.append(executor.submit(_run_chunk, chunk))
+        while pending:
+            yield from pending.popleft().result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,517 @@
+"""Traza binaria de los mensajes de puerto y exportación a VCD.
+
+``PortTraceWriter`` captura cada mensaje emitido por los puertos de salida de los modelos atómicos
+(``ip_read``, ``mem_read``, ``mbr_enable``, ``reg_enable_in``/``reg_enable_out``, los puertos de datos...)
+con su instante y su valor. Los vuelca en un fichero binario de solo anexado, en bloques columnares
+comprimidos con zlib. ``PortTrace`` lee el fichero con acceso aleatorio, por índice o por instante, sin
+descomprimir más bloques de los necesarios. ``export_vcd`` lo convierte en VCD para visores de formas
+de onda (GTKWave, Surfer...).
+
+    python vonsim8.py --trace off --port-trace traza.vs8t
+    python vonsim8_trace.py traza.vs8t --vcd traza.vcd
+    python vonsim8_trace.py traza.vs8t --dump --port VonSim8.UC.mem_read --from 100 --to 200
+
+Formato: cabecera ``VS8T`` + versión, seguida de bloques ``etiqueta (1 byte) + longitud (uint32) +
+contenido``, todo en little-endian:
+
+- ``P``: puertos nuevos, en JSON (nombre ``MODELO.puerto`` y tipo ``bool``/``int``/``str``/``tuple``/
+  ``object``). Los identificadores son consecutivos en orden de aparición.
+- ``S``: cadenas nuevas de la tabla de símbolos, que guarda los valores de los puertos de símbolos:
+  ``str`` tal cual (``alu_op``), ``tuple`` en JSON (``null`` para ``None``, p. ej. los ``(offset, valor)``
+  de los puertos ``io_*`` de la memoria) y ``object`` (cualquier otro tipo) con su ``repr``.
+- ``D``: hasta ``chunk_size`` registros. Lleva el número de registros, el primer y el último instante,
+  y las columnas de instantes (``float64``), puertos (``uint16``) y valores (``int64``), comprimidas
+  cada una por separado.
+
+El lector construye el índice recorriendo solo las cabeceras de los bloques. Un último bloque
+incompleto (p. ej. tras interrumpir la simulación) se ignora, y ``append=True`` continúa un fichero
+existente a partir del último bloque completo.
+"""
+import json
+import os
+import struct
+import sys
+import zlib
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from typing import BinaryIO, Iterable, Iterator, NamedTuple
+
+from xdevs.models import Atomic, Component, Coupled
+
+MAGIC = b"VS8T"
+VERSION = 1
+CHUNK_PORTS = b"P"
+CHUNK_SYMBOLS = b"S"
+CHUNK_DATA = b"D"
+CHUNK_HEADER = struct.Struct("<cI")
+DATA_HEADER = struct.Struct("<IddIII")
+DEFAULT_CHUNK_SIZE = 65_536
+DECODED_CHUNKS = 4
+
+VCD_IDENTIFIER_CHARS = "".join(chr(code) for code in range(33, 127))
+
+
+class PortRecord(NamedTuple):
+    """Mensaje de un puerto: instante, puerto (``MODELO.puerto``) y valor."""
+    time: float
+    port: str
+    value: int | bool | str | tuple
+
+
+SYMBOL_TYPES = ("str", "tuple", "object")
+
+
+def _port_type(p_type) -> str:
+    if p_type is bool:
+        return "bool"
+    if p_type is str:
+        return "str"
+    if p_type is tuple:
+        return "tuple"
+    if isinstance(p_type, type) and issubclass(p_type, int):
+        return "int"
+    return "object"
+
+
+def _little_endian(column: array) -> bytes:
+    if sys.byteorder == "big":
+        column = array(column.typecode, column)
+        column.byteswap()
+    return column.tobytes()
+
+
+def _column(typecode: str, data: bytes) -> array:
+    column = array(typecode)
+    column.frombytes(data)
+    if sys.byteorder == "big":
+        column.byteswap()
+    return column
+
+
+class PortTraceWriter:
+    """Escritor en streaming de la traza binaria de mensajes de puerto.
+
+    ``attach`` sustituye el ``lambdaf`` de cada modelo atómico por uno que, tras emitir, anota los
+    mensajes de sus puertos de salida. La sustitución es un atributo de instancia, así que los modelos
+    sin escritor conectado no pagan nada. Los registros se acumulan en columnas ``array`` y se
+    comprimen cada ``chunk_size`` mensajes.
+    """
+
+    def __init__(self, target: str | os.PathLike | BinaryIO, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 level: int = 6, append: bool = False):
+        self.chunk_size = chunk_size
+        self.level = level
+        self.clock = None
+        self.ports: dict[str, int] = {}
+        self.symbols: dict[str, int] = {}
+        self.written = 0
+        self._models: list[Atomic] = []
+        self._times = array("d")
+        self._port_ids = array("H")
+        self._values = array("q")
+        self._owned = isinstance(target, (str, os.PathLike))
+        if self._owned and append and os.path.exists(target) and os.path.getsize(target):
+            with PortTrace(target) as existing:
+                self.ports = {name: index for index, name in enumerate(existing.ports)}
+                self.symbols = {symbol: index for index, symbol in enumerate(existing.symbols)}
+                self.written = len(existing)
+                end = existing.end
+            self.stream = open(target, "r+b")
+            self.stream.truncate(end)
+            self.stream.seek(end)
+        else:
+            self.stream = open(target, "wb") if self._owned else target
+            self.stream.write(MAGIC + bytes((VERSION,)))
+
+    def __len__(self) -> int:
+        return self.written + len(self._times)
+
+    def __enter__(self) -> "PortTraceWriter":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def attach(self, model: Component, clock=None, prefix: str = ""):
+        """Conecta el escritor a los modelos atómicos de ``model``. Los puertos se nombran con la ruta
+        de modelos por debajo de ``model`` (p. ej. ``VonSim8.REG_BANK.AL.data_out``)."""
+        if clock is not None:
+            self.clock = clock
+        if isinstance(model, Coupled):
+            for component in model.components:
+                self.attach(component, None, f"{prefix}{component.name}." if isinstance(component, Coupled)
+                            else prefix)
+            return
+        ports = []
+        new_ports = []
+        for port in model.out_ports:
+            name = f"{prefix}{model.name}.{port.name}"
+            port_id = self.ports.get(name)
+            if port_id is None:
+                port_id = self.ports[name] = len(self.ports)
+                new_ports.append({"name": name, "type": _port_type(port.p_type)})
+            ports.append((port, port_id, self._encoder(_port_type(port.p_type))))
+        if new_ports:
+            self._write_chunk(CHUNK_PORTS, json.dumps(new_ports).encode())
+        model.lambdaf = self._recorder(model, tuple(ports))
+        self._models.append(model)
+
+    def detach(self):
+        """Devuelve a los modelos su ``lambdaf`` original."""
+        for model in self._models:
+            model.__dict__.pop("lambdaf", None)
+        self._models.clear()
+
+    def _encoder(self, kind: str):
+        """Convierte los valores de un puerto ``kind`` en índices de símbolo (None: se guardan tal cual)."""
+        if kind not in SYMBOL_TYPES:
+            return None
+        symbols = self.symbols
+        text = {"str": str, "tuple": lambda value: json.dumps(list(value)), "object": repr}[kind]
+
+        def encode(value) -> int:
+            value = text(value)
+            symbol = symbols.get(value)
+            return symbol if symbol is not None else self._symbol(value)
+
+        return encode
+
+    def _recorder(self, model: Atomic, ports: tuple):
+        emit = type(model).lambdaf.__get__(model)
+        times, port_ids, values = self._times, self._port_ids, self._values
+        chunk_size = self.chunk_size
+
+        def lambdaf():
+            emit()
+            time = self.clock.time if self.clock is not None else 0.0
+            for port, port_id, encode in ports:
+                if port:
+                    for value in port.values:
+                        if encode is not None:
+                            value = encode(value)
+                        times.append(time)
+                        port_ids.append(port_id)
+                        values.append(value)
+            if len(times) >= chunk_size:
+                self.flush()
+
+        return lambdaf
+
+    def _symbol(self, value: str) -> int:
+        symbol = self.symbols[value] = len(self.symbols)
+        self._write_chunk(CHUNK_SYMBOLS, json.dumps([value]).encode())
+        return symbol
+
+    def _write_chunk(self, tag: bytes, payload: bytes):
+        self.stream.write(CHUNK_HEADER.pack(tag, len(payload)))
+        self.stream.write(payload)
+
+    def flush(self):
+        """Comprime y escribe los registros pendientes como un bloque de datos."""
+        count = len(self._times)
+        if not count:
+            return
+        columns = [zlib.compress(_little_endian(column), self.level)
+                   for column in (self._times, self._port_ids, self._values)]
+        header = DATA_HEADER.pack(count, self._times[0], self._times[-1], *(len(column) for column in columns))
+        self._write_chunk(CHUNK_DATA, header + b"".join(columns))
+        self.written += count
+        del self._times[:], self._port_ids[:], self._values[:]
+
+    def close(self):
+        """Vacía los registros pendientes, desconecta los modelos y cierra el fichero si lo abrió el escritor."""
+        self.flush()
+        self.detach()
+        if self._owned:
+            self.stream.close()
+        else:
+            self.stream.flush()
+
+
+class PortTrace:
+    """Lector con acceso aleatorio de una traza escrita por ``PortTraceWriter``.
+
+    ``trace[i]`` devuelve el registro i-ésimo, ``index_at(t)`` el primer registro en o después de ``t``
+    y ``records`` recorre un intervalo de tiempo filtrando por puerto. Se mantienen descomprimidos los
+    últimos ``DECODED_CHUNKS`` bloques usados.
+    """
+
+    def __init__(self, path: str | os.PathLike):
+        self.path = path
+        self.stream = open(path, "rb")
+        if self.stream.read(len(MAGIC) + 1)[:len(MAGIC)] != MAGIC:
+            self.stream.close()
+            raise ValueError(f"{path} no es una traza de puertos VonSim8")
+        self.ports: list[str] = []
+        self.port_types: list[str] = []
+        self.symbols: list[str] = []
+        self.chunk_offsets: list[int] = []
+        self.chunk_starts: list[int] = []
+        self.chunk_first_times: list[float] = []
+        self.chunk_last_times: list[float] = []
+        self._sizes: list[tuple[int, int, int, int]] = []
+        self._decoded: OrderedDict[int, tuple[array, array, array]] = OrderedDict()
+        self._count = 0
+        self._scan()
+
+    def _scan(self):
+        stream = self.stream
+        size = os.fstat(stream.fileno()).st_size
+        self.end = stream.tell()
+        while True:
+            header = stream.read(CHUNK_HEADER.size)
+            if len(header) < CHUNK_HEADER.size:
+                break
+            tag, length = CHUNK_HEADER.unpack(header)
+            position = stream.tell()
+            if position + length > size:
+                break
+            if tag == CHUNK_DATA:
+                count, first, last, *lengths = DATA_HEADER.unpack(stream.read(DATA_HEADER.size))
+                self.chunk_offsets.append(position + DATA_HEADER.size)
+                self.chunk_starts.append(self._count)
+                self.chunk_first_times.append(first)
+                self.chunk_last_times.append(last)
+                self._sizes.append((count, *lengths))
+                self._count += count
+            elif tag == CHUNK_PORTS:
+                for port in json.loads(stream.read(length)):
+                    self.ports.append(port["name"])
+                    self.port_types.append(port["type"])
+            elif tag == CHUNK_SYMBOLS:
+                self.symbols.extend(json.loads(stream.read(length)))
+            stream.seek(position + length)
+            self.end = position + length
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __enter__(self) -> "PortTrace":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.stream.close()
+
+    @property
+    def chunks(self) -> int:
+        return len(self.chunk_offsets)
+
+    def chunk(self, number: int) -> tuple[array, array, array]:
+        """Columnas (instantes, puertos, valores) del bloque ``number``, descomprimidas."""
+        columns = self._decoded.get(number)
+        if columns is not None:
+            self._decoded.move_to_end(number)
+            return columns
+        _, times_length, ports_length, values_length = self._sizes[number]
+        self.stream.seek(self.chunk_offsets[number])
+        data = self.stream.read(times_length + ports_length + values_length)
+        columns = (_column("d", zlib.decompress(data[:times_length])),
+                   _column("H", zlib.decompress(data[times_length:times_length + ports_length])),
+                   _column("q", zlib.decompress(data[times_length + ports_length:])))
+        self._decoded[number] = columns
+        if len(self._decoded) > DECODED_CHUNKS:
+            self._decoded.popitem(last=False)
+        return columns
+
+    def decode(self, port_id: int, value: int) -> int | bool | str | tuple:
+        """Valor original de un mensaje a partir de su valor almacenado (``object``: su ``repr``)."""
+        kind = self.port_types[port_id]
+        if kind == "str" or kind == "object":
+            return self.symbols[value]
+        if kind == "tuple":
+            return tuple(json.loads(self.symbols[value]))
+        if kind == "bool":
+            return bool(value)
+        return value
+
+    def __getitem__(self, index: int) -> PortRecord:
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("registro fuera de la traza")
+        number = bisect_right(self.chunk_starts, index) - 1
+        times, port_ids, values = self.chunk(number)
+        offset = index - self.chunk_starts[number]
+        port_id = port_ids[offset]
+        return PortRecord(times[offset], self.ports[port_id], self.decode(port_id, values[offset]))
+
+    def index_at(self, time: float) -> int:
+        """Índice del primer registro con instante mayor o igual que ``time``."""
+        number = bisect_left(self.chunk_last_times, time)
+        if number == self.chunks:
+            return self._count
+        return self.chunk_starts[number] + bisect_left(self.chunk(number)[0], time)
+
+    def raw(self, start: float | None = None, end: float | None = None,
+            port_ids: Iterable[int] | None = None) -> Iterator[tuple[float, int, int]]:
+        """Registros ``(instante, id de puerto, valor almacenado)`` en ``[start, end)``, sin decodificar."""
+        selected = set(port_ids) if port_ids is not None else None
+        index = self.index_at(start) if start is not None else 0
+        number = bisect_right(self.chunk_starts, index) - 1 if index < self._count else self.chunks
+        offset = index - self.chunk_starts[number] if number < self.chunks else 0
+        while number < self.chunks:
+            if end is not None and self.chunk_first_times[number] >= end:
+                return
+            times, port_ids_column, values = self.chunk(number)
+            for position in range(offset, len(times)):
+                time = times[position]
+                if end is not None and time >= end:
+                    return
+                port_id = port_ids_column[position]
+                if selected is None or port_id in selected:
+                    yield time, port_id, values[position]
+            number += 1
+            offset = 0
+
+    def port_ids(self, names: Iterable[str]) -> list[int]:
+        """Identificadores de los puertos ``names``; ``KeyError`` si alguno no está en la traza."""
+        index = {name: port_id for port_id, name in enumerate(self.ports)}
+        try:
+            return [index[name] for name in names]
+        except KeyError as error:
+            raise KeyError(f"Puerto desconocido en la traza: {error.args[0]}") from None
+
+    def records(self, start: float | None = None, end: float | None = None,
+                ports: Iterable[str] | None = None) -> Iterator[PortRecord]:
+        """Registros en ``[start, end)`` de los puertos ``ports`` (todos si es None)."""
+        port_ids = self.port_ids(ports) if ports is not None else None
+        names = self.ports
+        for time, port_id, value in self.raw(start, end, port_ids):
+            yield PortRecord(time, names[port_id], self.decode(port_id, value))
+
+
+def _vcd_identifier(index: int) -> str:
+    base = len(VCD_IDENTIFIER_CHARS)
+    identifier = VCD_IDENTIFIER_CHARS[index % base]
+    index //= base
+    while index:
+        index -= 1
+        identifier += VCD_IDENTIFIER_CHARS[index % base]
+        index //= base
+    return identifier
+
+
+def export_vcd(trace: PortTrace, target: str | os.PathLike, ports: Iterable[str] | None = None,
+               start: float | None = None, end: float | None = None, timescale: str = "1 ns",
+               scale: float = 1) -> int:
+    """Escribe en ``target`` un VCD con los puertos ``ports`` (todos si es None) en ``[start, end)``.
+
+    Cada ciclo simulado son ``scale`` unidades de ``timescale``. Como los mensajes DEVS son eventos y no
+    niveles, un puerto toma el valor del mensaje en su instante y vuelve a ``z`` en el siguiente
+    instante con actividad en que no recibe mensaje. Los puertos ``bool`` son señales de 1 bit; los
+    ``int`` tienen la anchura del mayor valor observado (8 bits como mínimo); los ``str``, ``tuple`` y
+    ``object`` se exportan como el índice en la tabla de símbolos, que se lista en un ``$comment``.
+    Devuelve el número de cambios de valor escritos.
+    """
+    port_ids = trace.port_ids(ports) if ports is not None else list(range(len(trace.ports)))
+    widths = {}
+    for port_id in port_ids:
+        kind = trace.port_types[port_id]
+        widths[port_id] = (1 if kind == "bool" else max(1, (len(trace.symbols) - 1).bit_length())
+                           if kind in SYMBOL_TYPES else 8)
+    for _, port_id, value in trace.raw(start, end, port_ids):
+        if value < 0:
+            widths[port_id] = 64
+        elif value.bit_length() > widths[port_id]:
+            widths[port_id] = value.bit_length()
+    identifiers = {port_id: _vcd_identifier(position) for position, port_id in enumerate(port_ids)}
+
+    tree: dict = {}
+    for port_id in port_ids:
+        *scopes, variable = trace.ports[port_id].split(".")
+        node = tree
+        for scope in scopes:
+            node = node.setdefault(scope, {})
+        node[variable] = port_id
+
+    changes = 0
+    with open(target, "w", encoding="utf-8") as stream:
+        write = stream.write
+        write("$version VonSim8 port trace $end\n")
+        write(f"$timescale {timescale} $end\n")
+        if trace.symbols and any(trace.port_types[port_id] in SYMBOL_TYPES for port_id in port_ids):
+            symbols = ", ".join(f"{index}={symbol}" for index, symbol in enumerate(trace.symbols))
+            write(f"$comment símbolos: {symbols} $end\n")
+
+        def declare(node: dict):
+            for name, child in node.items():
+                if isinstance(child, dict):
+                    write(f"$scope module {name} $end\n")
+                    declare(child)
+                    write("$upscope $end\n")
+                else:
+                    write(f"$var wire {widths[child]} {identifiers[child]} {name} $end\n")
+
+        declare(tree)
+        write("$enddefinitions $end\n")
+
+        def high_impedance(port_id: int) -> str:
+            return f"z{identifiers[port_id]}\n" if widths[port_id] == 1 else f"bz {identifiers[port_id]}\n"
+
+        def emit(stamp: int, group: dict[int, int], previous: set[int]) -> set[int]:
+            write(f"#{stamp}\n")
+            for port_id in previous - group.keys():
+                write(high_impedance(port_id))
+            for port_id, value in group.items():
+                width = widths[port_id]
+                if width == 1:
+                    write(f"{value & 1}{identifiers[port_id]}\n")
+                else:
+                    write(f"b{value & ((1 << width) - 1):b} {identifiers[port_id]}\n")
+            return set(group)
+
+        first = trace.index_at(start) if start is not None else 0
+        initial = round((trace[first].time if first < len(trace) else 0) * scale)
+        write(f"#{initial}\n$dumpvars\n")
+        for port_id in port_ids:
+            write(f"x{identifiers[port_id]}\n" if widths[port_id] == 1 else f"bx {identifiers[port_id]}\n")
+        write("$end\n")
+
+        stamp = None
+        group: dict[int, int] = {}
+        active: set[int] = set()
+        for time, port_id, value in trace.raw(start, end, port_ids):
+            current = round(time * scale)
+            if current != stamp:
+                if group:
+                    active = emit(stamp, group, active)
+                    changes += len(group)
+                stamp, group = current, {}
+            group[port_id] = value
+        if group:
+            active = emit(stamp, group, active)
+            changes += len(group)
+            write(f"#{stamp + max(1, round(scale))}\n")
+            for port_id in active:
+                write(high_impedance(port_id))
+    return changes
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Lector de trazas de puertos VonSim8 y exportador VCD")
+    parser.add_argument("trace", help="fichero de traza (.vs8t)")
+    parser.add_argument("--vcd", default=None, help="exporta la traza a este fichero VCD")
+    parser.add_argument("--port", action="append", default=None, metavar="MODELO.puerto",
+                        help="limita la salida a este puerto (repetible)")
+    parser.add_argument("--from", dest="start", type=float, default=None, help="instante inicial (incluido)")
+    parser.add_argument("--to", dest="end", type=float, default=None, help="instante final (excluido)")
+    parser.add_argument("--dump", action="store_true", help="imprime los registros seleccionados")
+    parser.add_argument("--scale", type=float, default=1, help="unidades de tiempo VCD por ciclo")
+    args = parser.parse_args()
+
+    with PortTrace(args.trace) as trace:
+        size = os.path.getsize(args.trace)
+        print(f"{args.trace}: {len(trace)} mensajes, {len(trace.ports)} puertos, {trace.chunks} bloques, "
+              f"{size / 1024:.1f} KiB ({size / max(len(trace), 1):.2f} B/mensaje)")
+        if args.dump:
+            for record in trace.records(args.start, args.end, args.port):
+                print(f"t={record.time:>10g}  {record.port:<32} {record.value!r}")
+        if args.vcd:
+            changes = export_vcd(trace, args.vcd, args.port, args.start, args.end, scale=args.scale)
+            print(f"VCD: {changes} cambios → {args.vcd}")